@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+"""
+Benchmark of :py:class:`pymice.Loader` scaling with and without suspension
+of the cyclic garbage collector.
+
+Usage: LoadingBenchmark.py [<visit number> ...]
+"""
+
+import sys
+import os
+import gc
+import time
+import random
+import zipfile
+import tempfile
+from datetime import datetime, timedelta
+
+import pymice as pm
+
+DATA_DESCRIPTOR = u"""<?xml version="1.0" encoding="utf-8"?>
+<DataDescriptor xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+  <ProductName>IntelliCage Plus</ProductName>
+  <CompanyName>NewBehavior</CompanyName>
+  <Version>IntelliCage_Plus_3</Version>
+</DataDescriptor>"""
+
+VISIT_HEADER = ['VisitID', 'AnimalTag', 'Start', 'End', 'ModuleName', 'Cage',
+                'Corner', 'CornerCondition', 'PlaceError', 'AntennaNumber',
+                'AntennaDuration', 'PresenceNumber', 'PresenceDuration',
+                'VisitSolution']
+NOSEPOKE_HEADER = ['VisitID', 'Start', 'End', 'Side', 'SideCondition',
+                   'SideError', 'TimeError', 'ConditionError', 'LickNumber',
+                   'LickContactTime', 'LickDuration', 'AirState', 'DoorState',
+                   'LED1State', 'LED2State', 'LED3State']
+
+
+def timeStr(t):
+  return t.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+def makeArchive(path, nVisits, nAnimals=16, seed=0):
+  rng = random.Random(seed)
+  lines = ['\t'.join(['AnimalName', 'AnimalTag', 'Sex', 'GroupName', 'AnimalNotes'])]
+  lines.extend('M{0}\t{0}\tMale\tG\t'.format(1000 + i) for i in range(nAnimals))
+  animals = '\r\n'.join(lines) + '\r\n'
+
+  visits = ['\t'.join(VISIT_HEADER)]
+  nosepokes = ['\t'.join(NOSEPOKE_HEADER)]
+  t = datetime(2020, 1, 1)
+  for vid in range(1, nVisits + 1):
+    t += timedelta(seconds=rng.uniform(1., 30.))
+    end = t + timedelta(seconds=rng.uniform(1., 20.))
+    corner = rng.randint(1, 4)
+    visits.append('\t'.join(map(str, [vid, 1000 + rng.randrange(nAnimals),
+                                      timeStr(t), timeStr(end), 'Test', 1,
+                                      corner, 0, 0, 1, '1,5', 1, '1,5', 0])))
+    for i in range(rng.randint(0, 3)):
+      npStart = t + timedelta(seconds=i + 0.25)
+      nosepokes.append('\t'.join(map(str, [vid, timeStr(npStart),
+                                           timeStr(npStart + timedelta(seconds=0.5)),
+                                           2 * corner - rng.randint(0, 1),
+                                           1, 0, 0, 0, 2, '0,1', '0,2',
+                                           0, 0, 0, 0, 0])))
+
+  with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+    zf.writestr('Animals.txt', animals)
+    zf.writestr('DataDescriptor.xml', DATA_DESCRIPTOR)
+    zf.writestr('IntelliCage/Visits.txt', '\r\n'.join(visits) + '\r\n')
+    zf.writestr('IntelliCage/Nosepokes.txt', '\r\n'.join(nosepokes) + '\r\n')
+
+
+def timeLoading(path, **kwargs):
+  gc.collect()
+  start = time.time()
+  data = pm.Loader(path, getNp=True, **kwargs)
+  elapsed = time.time() - start
+  del data
+  gc.collect()
+  return elapsed
+
+
+def main(sizes):
+  tmpDir = tempfile.mkdtemp()
+  print('{:>10} {:>12} {:>12}'.format('visits', 'gc on [s]', 'gc off [s]'))
+  for n in sizes:
+    path = os.path.join(tmpDir, '{}.zip'.format(n))
+    makeArchive(path, n)
+    withGc = timeLoading(path, suspendGc=False)
+    withoutGc = timeLoading(path, suspendGc=True)
+    print('{:>10} {:>12.2f} {:>12.2f}'.format(n, withGc, withoutGc))
+    os.remove(path)
+
+  os.rmdir(tmpDir)
+
+
+if __name__ == '__main__':
+  main([int(x) for x in sys.argv[1:]] or [10000, 30000, 100000, 300000])
@@ -27,32 +27,42 @@ import sys
 if sys.version_info >= (3, 0):
   unicode = str
 
-import os
-import zipfile
-import csv
-try:
-  import cStringIO as io
-
-except ImportError:
-  import io
-
+import heapq
 from operator import methodcaller, attrgetter
 from collections.abc import Container
+from datetime import timedelta
+
+import numpy as np
 
 from .ICNodes import Group # XXX: unnecessary dependency
+from .ICNodes import Visit, Nosepoke
+from ._ICNodesBase import NOSEPOKE_SUMMARY
 
-from ._Tools import timeString, toTimestampUTC, warn, isString
+from ._Tools import toTimestampUTC, warn, isString
 from ._ObjectBase import ObjectBase
+from ._Analysis import encodeKeys, asofIndices
+from ._Columnar import ColumnarWriter
+from ._ICWriter import IntelliCageWriter
+from ._HardwareTimeline import HardwareTimeline
+from ._Sequences import VisitSequences
+from ._CoOccurrence import VisitCoOccurrence
+from ._Ens import Ens
+from .LogAnalyser import ValidationReport
 
 
 # dependence tracking
-from . import _dependencies, ICNodes, _Tools, _ObjectBase
+from . import (_dependencies, ICNodes, _ICNodesBase, _Tools, _ObjectBase,
+               _Analysis, _Columnar, _ICWriter, _HardwareTimeline, _Sequences,
+               _CoOccurrence, _Ens, LogAnalyser)
 import types
 __dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
                                                       if isinstance(x, types.ModuleType)])
 
 
 
+_MICROSECOND = timedelta(microseconds=1)
+
+
 class IdentityManager(object):
   def __getitem__(self, x):
     return x
@@ -72,6 +82,110 @@ class IntIdentityManager(int):
     pass
 
 
+def _orderBy(data, order):
+  if order is None:
+    return list(data)
+
+  key = attrgetter(order) if isString(order) else attrgetter(*order)
+  return sorted(data, key=key)
+
+
+class DataPartition(object):
+  """
+  A lightweight view of a part of the data, created by
+  :py:meth:`Data.partitionBy`.
+
+  The view shares storage with the data it has been created from; selected
+  objects are listed (in order of time) only when requested.
+
+  :ivar Phase: name of the phase
+  :ivar Key: value(s) of the partitioning attribute(s)
+  :ivar Start: start of the phase
+  :ivar End: end of the phase
+  """
+  KINDS = ('visits', 'nosepokes', 'log', 'environment', 'hardware')
+
+  def __init__(self, Phase, Key, Start, End, rows):
+    """
+    :param rows: pairs of an object storage and indices of objects
+                 belonging to the partition by kind of objects
+    :type rows: {str: (numpy.ndarray, numpy.ndarray), ...}
+    """
+    self.Phase = Phase
+    self.Key = Key
+    self.Start = Start
+    self.End = End
+    self.__rows = rows
+
+  def __repr__(self):
+    return '< DataPartition of phase %s, key %s (%s) >' % \
+           (self.Phase, self.Key,
+            ', '.join('%d %s' % (self.count(kind), kind) for kind in self.KINDS))
+
+  def count(self, kind):
+    """
+    :param kind: kind of objects (see :py:attr:`KINDS`)
+    :type kind: str
+
+    :return: number of objects of the kind in the partition
+    :rtype: int
+    """
+    return len(self.getIndices(kind))
+
+  def getIndices(self, kind):
+    """
+    :param kind: kind of objects (see :py:attr:`KINDS`)
+    :type kind: str
+
+    :return: indices of objects of the kind (in order of time) in the storage
+             shared with other partitions
+    :rtype: numpy.ndarray
+    """
+    return self.__rows[kind][1]
+
+  def __get(self, kind, order):
+    objects, indices = self.__rows[kind]
+    return _orderBy(objects[indices], order)
+
+  def getVisits(self, order=None):
+    """
+    :param order: attributes that the returned list is ordered by
+    :type order: str or unicode or their sequence or None
+
+    :return: visits started during the phase
+    :rtype: [:py:class:`Visit`, ...]
+    """
+    return self.__get('visits', order)
+
+  def getNosepokes(self, order=None):
+    """
+    :return: nosepokes started during the phase
+    :rtype: [:py:class:`Nosepoke`, ...]
+    """
+    return self.__get('nosepokes', order)
+
+  def getLog(self, order=None):
+    """
+    :return: log entries registered during the phase
+    :rtype: [:py:class:`LogEntry`, ...]
+    """
+    return self.__get('log', order)
+
+  def getEnvironment(self, order=None):
+    """
+    :return: environment conditions sampled during the phase
+    :rtype: [:py:class:`EnvironmentalConditions`, ...]
+    """
+    return self.__get('environment', order)
+
+  def getHardwareEvents(self, order=None):
+    """
+    :return: hardware events registered during the phase
+    :rtype: [:py:class:`HardwareEvent`, ...]
+    """
+    return self.__get('hardware', order)
+
+
 class Data(object):
   """
   A base class for objects containing behavioural data.
@@ -114,6 +228,11 @@ class Data(object):
     self.__log = ObjectBase({'DateTime': toTimestampUTC})
     self.__environment = ObjectBase({'DateTime': toTimestampUTC})
     self.__hardware = ObjectBase({'DateTime': toTimestampUTC})
+    self.__nosepokeSummary = {name: np.zeros(0) for name in NOSEPOKE_SUMMARY}
+    self.__nosepokes = ObjectBase({
+      'Start': toTimestampUTC,
+      'End': toTimestampUTC})
+    self.__nosepokeVisits = np.zeros(0, dtype=np.intp)
     self._initCache()
 
 #    self._setCageManager(CageManager())
@@ -122,19 +241,6 @@ class Data(object):
   def _setCageManager(self, cageManager):
     self._cageManager = cageManager
 
-  def __del__(self):
-    for cache in [self.__visits,
-                  self.__log,
-                  self.__environment,
-                  self.__hardware]:
-      for node in cache.get():
-        if node:
-          node._del_()
-
-    self._cageManager._del_()
-    #self._sourceManager._del_()
-    #self.__animalsByName._del_()
-
   def getVisits(self, mice=None, start=None, end=None, order=None):
     """
     :param mice: mouse (or mice) which visits are requested
@@ -164,16 +270,48 @@ class Data(object):
     [< Visit of "Minnie" to corner #4 of cage #1 (at 2012-12-18 12:30:02.360) >,
      < Visit of "Mickey" to corner #1 of cage #1 (at 2012-12-18 12:31:00.000) >]
     """
-    selectors = self.__makeTimeSelectors('Start', start, end)
-    if mice is not None:
-      if isString(mice) or not isinstance(mice, Container):
-        mice = [mice]
-
-      selectors['Animal.Name'] = map(unicode, mice)
-
+    selectors = self.__makeVisitSelectors(mice, start, end)
     visits = self.__visits.get(selectors)
     return self.__orderBy(visits, order)
 
+  def getNosepokeSummary(self, mice=None, start=None, end=None):
+    """
+    Nosepoke aggregates of visits as arrays.
+
+    The aggregates are computed once - when the visits are loaded - with
+    segmented reductions over nosepoke attributes; values of
+    :py:attr:`Visit.NosepokeNumber`, :py:attr:`Visit.NosepokeDuration`,
+    :py:attr:`Visit.LickNumber`, :py:attr:`Visit.LickDuration`
+    and :py:attr:`Visit.LickContactTime` properties are also the precomputed
+    ones.
+
+    >>> summary = data.getNosepokeSummary(mice='Mickey')
+    >>> summary.Visit.tolist() == data.getVisits(mice='Mickey')
+    True
+    >>> summary.LickNumber.sum() == sum(v.LickNumber for v in summary.Visit)
+    True
+
+    :param mice: mouse (or mice) which visits are requested
+    :type mice: str or unicode or :py:class:`Animal` or collection of them or None
+
+    :param start: a lower bound of the visit Start attribute
+    :type start: datetime.datetime or None
+
+    :param end: an upper bound of the visit Start attribute
+    :type end: datetime.datetime or None
+
+    :return: array of visits (as ``Visit``) and arrays of their aggregates
+             (durations in seconds; NaN if nosepokes are not loaded or
+             a nosepoke attribute is missing)
+    :rtype: :py:class:`Ens` {str: numpy.ndarray}
+    """
+    selectors = self.__makeVisitSelectors(mice, start, end)
+    indices = self.__visits.getIndices(selectors)
+    summary = {name: self.__nosepokeSummary[name][indices]
+               for name in NOSEPOKE_SUMMARY}
+    summary['Visit'] = self.__visits.getArray()[indices]
+    return Ens(summary)
+
   def getLog(self, start=None, end=None, order=None):
     """
     :param start: a lower bound of the log entries DateTime attribute
@@ -250,6 +388,630 @@ class Data(object):
     hw = self.__hardware.get(selectors)
     return self.__orderBy(hw, order)
 
+  def getVisitSequences(self, timeline=None, phases=None, mice=None):
+    """
+    :param timeline: the timeline of the experiment; if given sequences
+                     are split by phases
+    :type timeline: :py:class:`pymice.Timeline` or None
+
+    :param phases: phase(s) of interest; defaults to all phases
+    :type phases: basestring or [basestring, ...] or None
+
+    :param mice: mouse (or mice) which visits are analysed
+    :type mice: str or unicode or :py:class:`Animal` or collection of them or None
+
+    :return: per-animal sequences of visits
+    :rtype: :py:class:`VisitSequences`
+    """
+    selectors = self.__makeVisitSelectors(mice, None, None)
+    visits, starts, ends = self.__getVisitTimes(selectors)
+    return VisitSequences(visits, timeline, phases, starts=starts, ends=ends)
+
+  def getCoOccurrence(self, mice=None, start=None, end=None):
+    """
+    :param mice: mouse (or mice) which visits are analysed
+    :type mice: str or unicode or :py:class:`Animal` or collection of them or None
+
+    :param start: a lower bound of the visit Start attribute
+    :type start: datetime.datetime or None
+
+    :param end: an upper bound of the visit Start attribute
+    :type end: datetime.datetime or None
+
+    :return: co-occurrence of animals in corners
+    :rtype: :py:class:`VisitCoOccurrence`
+    """
+    selectors = self.__makeVisitSelectors(mice, start, end)
+    visits, starts, ends = self.__getVisitTimes(selectors)
+    return VisitCoOccurrence(visits, starts=starts, ends=ends)
+
+  def __getVisitTimes(self, selectors):
+    indices = self.__visits.getIndices(selectors)
+    starts = np.asarray(self.__visits.getConvertedAttributes('Start'),
+                        dtype=float).reshape(-1)
+    try:
+      ends = np.asarray(self.__visits.getConvertedAttributes('End'),
+                        dtype=float).reshape(-1)[indices]
+
+    except TypeError: # missing End
+      ends = None
+
+    return self.__visits.getArray()[indices], starts[indices], ends
+
+  def getHardwareTimeline(self):
+    """
+    :return: states of hardware (doors, air valves, LEDs) as intervals
+             of constant state
+    :rtype: :py:class:`HardwareTimeline`
+    """
+    return HardwareTimeline(self.__hardware.getArray(),
+                            np.asarray(self.__hardware.getConvertedAttributes('DateTime'),
+                                       dtype=float).reshape(-1))
+
+  def getVisitsExclusionMask(self, report, issue='Presence', visits=None):
+    """
+    :param report: report generated by
+                   :py:class:`pymice.LogAnalyser.DataValidator`
+    :type report: :py:class:`pymice.LogAnalyser.ValidationReport` or
+                  collection(:py:class:`pymice.LogAnalyser.ExcludeMiceData`, ...)
+
+    :param issue: type of the invalidating issue
+    :type issue: basestring
+
+    :param visits: visits to be checked; defaults to all visits
+    :type visits: [:py:class:`Visit`, ...] or None
+
+    :return: mask of visits overlapping with data excluded due to the issue
+             in the same cage and corner
+    :rtype: numpy.ndarray of bool
+    """
+    indices = self.__getStoreIndices(self.__visits, visits)
+    if indices is None:
+      columns = self.__getObjectColumns([(v.Start, v.End, v.Cage, v.Corner)
+                                         for v in visits], 2)
+
+    else:
+      columns = [self.__getTimeColumn(self.__visits, 'Start')[indices],
+                 self.__getTimeColumn(self.__visits, 'End')[indices],
+                 self.__getIntColumn(self.__visits, 'Cage')[indices],
+                 self.__getIntColumn(self.__visits, 'Corner')[indices]]
+
+    return self.__getExclusionMask(report, issue, columns, ('cage', 'corner'))
+
+  def getNosepokesExclusionMask(self, report, issue='Lickometer', nosepokes=None):
+    """
+    :param report: report generated by
+                   :py:class:`pymice.LogAnalyser.DataValidator`
+    :type report: :py:class:`pymice.LogAnalyser.ValidationReport` or
+                  collection(:py:class:`pymice.LogAnalyser.ExcludeMiceData`, ...)
+
+    :param issue: type of the invalidating issue
+    :type issue: basestring
+
+    :param nosepokes: nosepokes to be checked; defaults to nosepokes of all
+                      visits
+    :type nosepokes: [:py:class:`Nosepoke`, ...] or None
+
+    :return: mask of nosepokes overlapping with data excluded due to
+             the issue in the same cage, corner and side
+    :rtype: numpy.ndarray of bool
+    """
+    if nosepokes is None and \
+       (np.diff(self.__nosepokeVisits) < 0).any(): # nosepokes appended later
+      nosepokes = self.__getNosepokes(self.getVisits())
+
+    indices = self.__getStoreIndices(self.__nosepokes, nosepokes)
+    if indices is None:
+      columns = self.__getObjectColumns([(n.Start, n.End, n.Side.Corner.Cage,
+                                          n.Side.Corner, n.Side)
+                                         for n in nosepokes], 3)
+
+    else:
+      visitIndices = self.__nosepokeVisits[indices]
+      columns = [self.__getTimeColumn(self.__nosepokes, 'Start')[indices],
+                 self.__getTimeColumn(self.__nosepokes, 'End')[indices],
+                 self.__getIntColumn(self.__visits, 'Cage')[visitIndices],
+                 self.__getIntColumn(self.__visits, 'Corner')[visitIndices],
+                 self.__getIntColumn(self.__nosepokes, 'Side')[indices]]
+
+    return self.__getExclusionMask(report, issue, columns,
+                                   ('cage', 'corner', 'side'))
+
+  def getValidVisits(self, report, issue='Presence', mice=None, start=None,
+                     end=None, order=None):
+    """
+    :return: visits (see :py:meth:`getVisits`) not excluded by the report
+             (see :py:meth:`getVisitsExclusionMask`)
+    :rtype: [:py:class:`Visit`, ...]
+    """
+    visits = self.getVisits(mice=mice, start=start, end=end, order=order)
+    excluded = self.getVisitsExclusionMask(report, issue, visits)
+    return [v for v, isExcluded in zip(visits, excluded) if not isExcluded]
+
+  def getValidNosepokes(self, report, issue='Lickometer', visits=None):
+    """
+    :param visits: visits which nosepokes are to be checked; defaults to
+                   all visits
+
+    :return: nosepokes not excluded by the report
+             (see :py:meth:`getNosepokesExclusionMask`)
+    :rtype: [:py:class:`Nosepoke`, ...]
+    """
+    nosepokes = self.__getNosepokes(self.getVisits() if visits is None else visits)
+    excluded = self.getNosepokesExclusionMask(report, issue, nosepokes)
+    return [n for n, isExcluded in zip(nosepokes, excluded) if not isExcluded]
+
+  def partitionBy(self, timeline, phases=None, by=('Animal',)):
+    """
+    Split the data by phases of the timeline and by attribute(s) of visits.
+
+    Visits, nosepokes, log entries, environment samples and hardware events
+    are assigned to phases (by their Start or DateTime attribute; phase start
+    inclusive, phase end exclusive) in a single pass over every kind of
+    objects.  Within a phase visits are further split by the ``by``
+    attribute(s), nosepokes follow their visits.  Log entries, environment
+    samples and hardware events are split only if they also have all
+    the ``by`` attributes (e.g. ``'Cage'``), otherwise every partition of
+    a phase contains all of them.  Objects of those kinds with key not
+    found among visits (e.g. ``None`` cage of application log entries) make
+    partitions of their own.
+
+    Partitions share the underlying storage and index arrays; no list of
+    objects is created until requested.
+
+    >>> partitions = data.partitionBy(timeline)
+    >>> partitions['Phase 1', 'Mickey'].getVisits()
+    [< Visit of "Mickey" to corner #1 of cage #1 (at 2012-12-18 12:31:00.000) >]
+
+    :param timeline: the timeline of the experiment
+    :type timeline: :py:class:`pymice.Timeline`
+
+    :param phases: phase(s) of interest; defaults to all phases
+    :type phases: basestring or [basestring, ...] or None
+
+    :param by: name(s) of attribute(s) of visits to split the data by
+    :type by: str or (str, ...)
+
+    :return: views of the data by ``(phase, key)`` pairs; the key is either
+             value of the ``by`` attribute or tuple of values (if ``by`` is
+             not a single attribute name)
+    :rtype: :py:class:`Ens` {(basestring, key): :py:class:`DataPartition`}
+    """
+    if phases is None:
+      phases = timeline.sections()
+
+    elif isString(phases):
+      phases = [phases]
+
+    single = isString(by) or len(by) == 1
+    if isString(by):
+      by = (by,)
+
+    streams = self.__getPartitionStreams(by)
+    keyIndex = {}
+    for stream in streams:
+      keys, codes = stream['codes']
+      if codes is not None:
+        codes = np.array([keyIndex.setdefault(key, len(keyIndex)) for key in keys],
+                         dtype=np.intp)[codes]
+
+      order = np.argsort(stream['times'], kind='stable')
+      stream.update(codes=codes, order=order, times=stream['times'][order])
+
+    keys = sorted(keyIndex, key=keyIndex.get)
+    if single:
+      keys = [key[0] for key in keys]
+
+    empty = np.zeros(0, dtype=np.intp)
+    partitions = {}
+    for phase in phases:
+      start, end = timeline.getTimeBounds(phase)
+      bounds = [toTimestampUTC(start), toTimestampUTC(end)]
+      shared = {}
+      byCode = {}
+      for stream in streams:
+        lo, hi = np.searchsorted(stream['times'], bounds)
+        indices = stream['order'][lo:hi]
+        if stream['codes'] is None:
+          shared[stream['kind']] = indices
+          continue
+
+        codes = stream['codes'][indices]
+        grouped = np.argsort(codes, kind='stable')
+        indices = indices[grouped]
+        codes = codes[grouped]
+        groupStarts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else empty
+        for groupStart, groupEnd in zip(groupStarts, np.r_[groupStarts[1:], len(codes)]):
+          byCode.setdefault(codes[groupStart], {})[stream['kind']] = indices[groupStart:groupEnd]
+
+      for code in sorted(byCode):
+        rows = byCode[code]
+        partitions[phase, keys[code]] = DataPartition(
+          phase, keys[code], start, end,
+          {stream['kind']: (stream['objects'],
+                            shared[stream['kind']] if stream['kind'] in shared
+                            else rows.get(stream['kind'], empty))
+           for stream in streams})
+
+    return Ens(partitions)
+
+  def iterEvents(self, start=None, end=None, cages=None, kinds=None):
+    """
+    Iterate lazily over visits, nosepokes, log entries, environment samples
+    and hardware events in global time order (by their Start or DateTime
+    attribute).
+
+    Every kind of objects is sorted once (as an array of indices); then
+    the sorted streams are merged with a heap, so apart from the index
+    arrays no list of objects is created.  Simultaneous events are yielded
+    in order of :py:attr:`DataPartition.KINDS`, and within a kind in order
+    of loading.
+
+    >>> for kind, event in data.iterEvents(kinds=('visits', 'log')):
+    ...   print(kind, event)
+    log < Log Info, Application (at 2012-12-18 12:13:02.437) >
+    log < Log Info, Application (at 2012-12-18 12:20:37.718) >
+    visits < Visit of "Minnie" to corner #4 of cage #1 (at 2012-12-18 12:30:02.360) >
+    visits < Visit of "Mickey" to corner #1 of cage #1 (at 2012-12-18 12:31:00.000) >
+
+    :param start: a lower bound (inclusive) of the event time
+    :type start: datetime.datetime or None
+
+    :param end: an upper bound (exclusive) of the event time
+    :type end: datetime.datetime or None
+
+    :param cages: cage(s) of interest (cage of a nosepoke is the cage of its
+                  visit); events with no cage (e.g. application log entries)
+                  are skipped if given; defaults to all events
+    :type cages: convertable to int or collection of them or None
+
+    :param kinds: kind(s) of events (see :py:attr:`DataPartition.KINDS`);
+                  defaults to all kinds
+    :type kinds: str or [str, ...] or None
+
+    :return: generator of ``(kind, event)`` pairs
+    :rtype: generator of (str, :py:class:`Visit` or :py:class:`Nosepoke` or
+            :py:class:`LogEntry` or :py:class:`EnvironmentalConditions` or
+            :py:class:`HardwareEvent`)
+    """
+    if kinds is None:
+      kinds = DataPartition.KINDS
+
+    elif isString(kinds):
+      kinds = [kinds]
+
+    unknown = set(kinds).difference(DataPartition.KINDS)
+    if unknown:
+      raise ValueError('Unknown kind(s) of events: %s' % ', '.join(sorted(unknown)))
+
+    if cages is not None:
+      if isString(cages) or not isinstance(cages, Container):
+        cages = [cages]
+
+      cages = frozenset(int(cage) for cage in cages)
+
+    bounds = [-np.inf if start is None else toTimestampUTC(start),
+              np.inf if end is None else toTimestampUTC(end)]
+    streams = [self.__iterEventStream(rank, kind, bounds, cages)
+               for rank, kind in enumerate(DataPartition.KINDS)
+               if kind in kinds]
+    for _, _, _, kind, event in heapq.merge(*streams):
+      yield kind, event
+
+  ASOF_COLUMNS = {'visits': ('Start', 'End', 'Animal', 'Corner'),
+                  'nosepokes': ('Start', 'End', 'Side', 'LickNumber'),
+                  'log': ('DateTime', 'Category', 'Type', 'Notes'),
+                  'environment': ('DateTime', 'Temperature', 'Illumination'),
+                  'hardware': ('DateTime', 'Type', 'State')}
+
+  def asofJoin(self, left='visits', right='environment', on=None, by='Cage',
+               tolerance=None, direction='backward', columns=None, where=None):
+    """
+    Annotate every left object with attributes of the latest preceding
+    (``'backward'``), the earliest following (``'forward'``) or the nearest
+    (``'nearest'``) in time right object of the same key (e.g. cage).
+
+    The right objects are sorted by key and time once, and all left objects
+    of a key are matched with a single :py:func:`numpy.searchsorted` call,
+    so no per-object search is done.
+
+    >>> conditions = data.asofJoin(data.getVisits(order='Start'), 'environment')
+    >>> sorted(conditions)
+    ['DateTime', 'Illumination', 'Left', 'Temperature']
+    >>> conditions.Left.tolist() == data.getVisits(order='Start')
+    True
+
+    Samples older than a minute are not matched:
+
+    >>> data.asofJoin(tolerance=timedelta(minutes=1)).Temperature.tolist()
+    [nan, nan]
+
+    State of doors at nosepoke start might be found with:
+
+    >>> doors = data.asofJoin('nosepokes', 'hardware',
+    ...                       by=[('Visit.Cage', 'Cage'), 'Side'],
+    ...                       where={'Type': [1]})
+
+    :param left: objects to be annotated - either a kind of objects
+                 (see :py:attr:`DataPartition.KINDS`) or a sequence of objects
+    :type left: str or sequence
+
+    :param right: objects the left objects are matched with - either a kind
+                  of objects or a sequence of objects
+    :type right: str or sequence
+
+    :param on: time attribute of left objects; defaults to ``'Start'``
+               (visits and nosepokes) or ``'DateTime'`` (other objects);
+               right objects are always matched by their default time
+               attribute
+    :type on: str or None
+
+    :param by: attribute(s) the objects are matched by; a ``(leftAttribute,
+               rightAttribute)`` pair might be given instead of an attribute
+               of different names (e.g. ``('Visit.Cage', 'Cage')``);
+               attributes missing in nosepokes (e.g. ``'Cage'``) are taken
+               from their visits
+    :type by: str or [str or (str, str), ...] or None
+
+    :param tolerance: maximal time difference of matched objects
+    :type tolerance: datetime.timedelta or float (seconds) or None
+
+    :param direction: ``'backward'``, ``'forward'`` or ``'nearest'``
+    :type direction: str
+
+    :param columns: attributes of right objects to be returned; defaults to
+                    :py:attr:`ASOF_COLUMNS` of the right kind of objects
+                    (or its time attribute if a sequence is given)
+    :type columns: str or [str, ...] or None
+
+    :param where: selectors of right objects of the given kind; either
+                  a collection of accepted values or a predicate for every
+                  attribute (e.g. ``{'Type': [1]}`` for door events)
+    :type where: {str: collection or callable} or None
+
+    :return: column of the matched right objects attribute (an array
+             aligned with left objects; NaN or ``None`` if there is no match)
+             for every requested attribute, and array of left objects as
+             ``Left`` column
+    :rtype: :py:class:`Ens` {str: numpy.ndarray}
+    """
+    leftObjects, leftTimes = self.__getAsofObjects(left, on)
+    rightObjects, rightTimes = self.__getAsofObjects(right, where=where)
+
+    if columns is None:
+      columns = self.ASOF_COLUMNS[right] if isString(right) else \
+                ('Start' if len(rightObjects) and hasattr(rightObjects[0], 'Start')
+                 else 'DateTime',)
+
+    elif isString(columns):
+      columns = (columns,)
+
+    if by is None:
+      by = ()
+
+    elif isString(by):
+      by = [by]
+
+    pairs = [(attribute, attribute) if isString(attribute) else tuple(attribute)
+             for attribute in by]
+    pairs = [(self.__getAsofAttribute(left, l), self.__getAsofAttribute(right, r))
+             for l, r in pairs]
+
+    if isinstance(tolerance, timedelta):
+      tolerance = tolerance.total_seconds()
+
+    indices = asofIndices(leftTimes, rightTimes,
+                          [list(map(attrgetter(l), leftObjects)) for l, _ in pairs],
+                          [list(map(attrgetter(r), rightObjects)) for _, r in pairs],
+                          direction=direction, tolerance=tolerance)
+    matched = indices >= 0
+    result = {'Left': leftObjects}
+    for column in columns:
+      result[column] = self.__takeColumn(list(map(attrgetter(column), rightObjects)),
+                                         indices, matched)
+
+    return Ens(result)
+
+  @staticmethod
+  def __getAsofAttribute(objects, attribute):
+    if isString(objects) and objects == 'nosepokes' and \
+       not hasattr(Nosepoke, attribute.split('.')[0]):
+      return 'Visit.' + attribute
+
+    return attribute
+
+  def __getPartitionStreams(self, by):
+    visits = self.__visits.getArray()
+    visitColumns = [self.__visits.getAttributes(attribute) for attribute in by]
+    visitKeys, visitCodes = self.__encodePartitionKeys(visitColumns, len(visits))
+
+    nosepokes, nosepokeTimes, nosepokeVisits = self.__getNosepokeArrays()
+    streams = [{'kind': 'visits',
+                'objects': visits,
+                'times': np.asarray(self.__visits.getConvertedAttributes('Start'), dtype=float).reshape(-1),
+                'codes': (visitKeys, visitCodes)},
+               {'kind': 'nosepokes',
+                'objects': nosepokes,
+                'times': nosepokeTimes,
+                'codes': (visitKeys, visitCodes[nosepokeVisits])}]
+
+    for kind, store in [('log', self.__log),
+                        ('environment', self.__environment),
+                        ('hardware', self.__hardware)]:
+      objects = store.getArray()
+      try:
+        columns = [store.getAttributes(attribute) for attribute in by]
+
+      except AttributeError:
+        codes = (None, None)
+
+      else:
+        codes = self.__encodePartitionKeys(columns, len(objects)) if len(objects) else (None, None)
+
+      streams.append({'kind': kind,
+                      'objects': objects,
+                      'times': np.asarray(store.getConvertedAttributes('DateTime'), dtype=float).reshape(-1),
+                      'codes': codes})
+
+    return streams
+
+  def __getNosepokeArrays(self):
+    return (self.__nosepokes.getArray(),
+            np.asarray(self.__nosepokes.getConvertedAttributes('Start'), dtype=float).reshape(-1),
+            self.__nosepokeVisits)
+
+  def __getEventStream(self, kind):
+    if kind == 'visits':
+      return (self.__visits.getArray(),
+              np.asarray(self.__visits.getConvertedAttributes('Start'), dtype=float).reshape(-1),
+              lambda cages: self.__getCageMask(self.__visits, cages))
+
+    if kind == 'nosepokes':
+      nosepokes, times, nosepokeVisits = self.__getNosepokeArrays()
+      return (nosepokes, times,
+              lambda cages: self.__getCageMask(self.__visits, cages)[nosepokeVisits])
+
+    store = self.__getStore(kind)
+    return (store.getArray(),
+            np.asarray(store.getConvertedAttributes('DateTime'), dtype=float).reshape(-1),
+            lambda cages: self.__getCageMask(store, cages))
+
+  @staticmethod
+  def __getCageMask(store, cages):
+    mask = np.zeros(len(store), dtype=bool)
+    mask[store.getIndices({'Cage': sorted(cages)})] = True
+    return mask
+
+  def __getStore(self, kind):
+    return {'visits': self.__visits,
+            'log': self.__log,
+            'environment': self.__environment,
+            'hardware': self.__hardware}[kind]
+
+  def __getAsofObjects(self, objects, on=None, where=None):
+    if isString(objects):
+      if objects not in DataPartition.KINDS:
+        raise ValueError('Unknown kind of objects: %s' % objects)
+
+      if on is None:
+        on = 'Start' if objects in ('visits', 'nosepokes') else 'DateTime'
+
+      if objects == 'nosepokes':
+        nosepokes, times, _ = self.__getNosepokeArrays()
+        if on == 'Start' and where is None:
+          return nosepokes, times
+
+        objects = [n for n in nosepokes
+                   if where is None or all(self.__isSelected(n, attribute, selector)
+                                           for attribute, selector in where.items())]
+
+      else:
+        store = self.__getStore(objects)
+        if where is not None:
+          objects = store.get(where)
+
+        elif on in ('Start', 'End', 'DateTime'):
+          return (store.getArray(),
+                  np.asarray(store.getConvertedAttributes(on), dtype=float).reshape(-1))
+
+        else:
+          objects = store.getArray()
+
+    array = np.empty(len(objects), dtype=object)
+    array[:] = list(objects)
+    if on is None:
+      on = 'Start' if len(array) and hasattr(array[0], 'Start') else 'DateTime'
+
+    return array, np.array([toTimestampUTC(getattr(o, on)) for o in array],
+                           dtype=float)
+
+  @staticmethod
+  def __isSelected(obj, attribute, selector):
+    value = attrgetter(attribute)(obj)
+    return selector(value) if hasattr(selector, '__call__') else value in selector
+
+  @staticmethod
+  def __takeColumn(values, indices, matched):
+    column = np.asarray(values) if len(values) else np.zeros(0)
+    if column.ndim != 1:
+      column = np.empty(len(values), dtype=object)
+      column[:] = values
+
+    if matched.all():
+      return column[indices]
+
+    if column.dtype.kind in 'biuf':
+      result = np.full(len(indices), np.nan)
+
+    else:
+      result = np.full(len(indices), None, dtype=object)
+
+    result[matched] = column[indices[matched]]
+    return result
+
+  def __iterEventStream(self, rank, kind, bounds, cages):
+    objects, times, getCageMask = self.__getEventStream(kind)
+    order = np.argsort(times, kind='stable')
+    lo, hi = np.searchsorted(times[order], bounds)
+    order = order[lo:hi]
+    if cages is not None and len(order):
+      order = order[getCageMask(cages)[order]]
+
+    for i in order.tolist():
+      yield times[i], rank, i, kind, objects[i]
+
+  @staticmethod
+  def __encodePartitionKeys(columns, n):
+    if not columns:
+      return [()], np.zeros(n, dtype=np.intp)
+
+    keys, codes = encodeKeys(*columns)
+    if len(columns) == 1:
+      keys = [(key,) for key in keys]
+
+    return keys, codes
+
+  @staticmethod
+  def __getNosepokes(visits):
+    return [n for v in visits if v.Nosepokes for n in v.Nosepokes]
+
+  @staticmethod
+  def __getExclusionMask(report, issue, columns, locationNames):
+    if not isinstance(report, ValidationReport):
+      report = ValidationReport(report)
+
+    return report.overlapsEvents(issue, columns[0], columns[1],
+                                 **dict(zip(locationNames, columns[2:])))
+
+  @staticmethod
+  def __getStoreIndices(store, objects):
+    if objects is None:
+      return np.arange(len(store))
+
+    positions = dict((id(o), i) for i, o in enumerate(store.getArray()))
+    try:
+      return np.array([positions[id(o)] for o in objects], dtype=np.intp)
+
+    except KeyError: # objects not loaded into the store
+      return None
+
+  @staticmethod
+  def __getTimeColumn(store, attribute):
+    return np.asarray(store.getConvertedAttributes(attribute),
+                      dtype=float).reshape(-1)
+
+  @staticmethod
+  def __getIntColumn(store, attribute):
+    return np.asarray(store.getConvertedAttributes(attribute)).astype(int).reshape(-1)
+
+  @staticmethod
+  def __getObjectColumns(rows, locations):
+    columns = list(zip(*rows)) if rows else [()] * (2 + locations)
+    return [np.array([toTimestampUTC(t) for t in columns[0]], dtype=float),
+            np.array([toTimestampUTC(t) for t in columns[1]], dtype=float)] + \
+           [np.array([int(x) for x in column], dtype=int)
+            for column in columns[2:]]
+
   def getCage(self, mouse):
     """
     :param mouse: mouse name or representation
@@ -365,11 +1127,24 @@ class Data(object):
     self.__animal2cage = {}
 
   def _buildCache(self):
+    self.__cageAnimalPairs = set((int(c), unicode(a)) for (c, a) in self.__visits.getAttributes('Cage', 'Animal.Name'))
+    self.__buildCageCache()
+
+  def _updateCache(self, visits):
+    """
+    Update the cache with newly inserted visits.
+    """
+    pairs = set((int(v.Cage), unicode(v.Animal.Name)) for v in visits)
+    if not pairs <= self.__cageAnimalPairs:
+      self.__cageAnimalPairs |= pairs
+      self.__buildCageCache()
+
+  def __buildCageCache(self):
     self.__cages = {}
     self.__animal2cage = {}
     currentCage = None
     animals = []
-    cursor = sorted(set((int(c), unicode(a)) for (c, a) in self.__visits.getAttributes('Cage', 'Animal.Name')))
+    cursor = sorted(self.__cageAnimalPairs)
 
     for cage, animal in cursor:
       if animal not in self.__animal2cage:
@@ -430,6 +1205,14 @@ class Data(object):
   def freeze(self):
     self.__frozen = True
 
+  def _fingerprint(self):
+    """
+    :return: a digest identifying the data (e.g. by its sources) or None
+             if the data can not be identified without being inspected
+    :rtype: str or None
+    """
+    return None
+
   def _raiseIfFrozen(self):
     if self.__frozen:
       raise self.UnableToInsertIntoFrozen
@@ -449,7 +1232,98 @@ class Data(object):
     self._insertNewVisits(newVisits)
 
   def _insertNewVisits(self, visits):
+    visits = list(visits)
+    columns, summaries = self.__summarizeNosepokes(visits)
+    for visit, summary in zip(visits, summaries):
+      if isinstance(visit, Visit):
+        visit._setNosepokeSummary(summary)
+
+    visitNosepokes = [getattr(v, 'Nosepokes', None) or () for v in visits]
+    self.__nosepokeVisits = np.concatenate([
+      self.__nosepokeVisits,
+      np.repeat(np.arange(len(self.__visits), len(self.__visits) + len(visits)),
+                [len(n) for n in visitNosepokes])])
+    self.__nosepokes.put([n for vNosepokes in visitNosepokes for n in vNosepokes])
     self.__visits.put(visits)
+    for name in NOSEPOKE_SUMMARY:
+      self.__nosepokeSummary[name] = np.concatenate([self.__nosepokeSummary[name],
+                                                     columns[name]])
+
+  def _appendNosepokes(self, visitIndices, nosepokes):
+    """
+    Append nosepokes to already inserted visits (e.g. nosepokes exported
+    after their visit).
+
+    :param visitIndices: (unique) indices of the visits in order of insertion
+    :type visitIndices: [int, ...]
+
+    :param nosepokes: nosepokes of every visit
+    :type nosepokes: [[Nosepoke, ...], ...]
+    """
+    indices = np.asarray(visitIndices, dtype=np.intp).reshape(-1)
+    visits = self.__visits.getArray()[indices].tolist()
+    for visit, vNosepokes in zip(visits, nosepokes):
+      visit._appendNosepokes(vNosepokes)
+
+    columns, summaries = self.__summarizeNosepokes(visits)
+    for visit, summary in zip(visits, summaries):
+      visit._setNosepokeSummary(summary)
+
+    for name in NOSEPOKE_SUMMARY:
+      self.__nosepokeSummary[name][indices] = columns[name]
+
+    self.__nosepokeVisits = np.concatenate([
+      self.__nosepokeVisits,
+      np.repeat(indices, [len(n) for n in nosepokes])])
+    self.__nosepokes.put([n for vNosepokes in nosepokes for n in vNosepokes])
+
+  @staticmethod
+  def __summarizeNosepokes(visits):
+    visitNosepokes = [getattr(v, 'Nosepokes', None) for v in visits]
+    counts = np.array([-1 if n is None else len(n) for n in visitNosepokes],
+                      dtype=np.intp)
+    sizes = np.maximum(counts, 0)
+    nonEmpty = sizes > 0
+    offsets = (np.cumsum(sizes) - sizes)[nonEmpty]
+    nosepokes = [n for vNosepokes in visitNosepokes if vNosepokes
+                 for n in vNosepokes]
+
+    noNosepokes = counts < 0
+    columns = {'NosepokeNumber': np.where(noNosepokes, np.nan, sizes)}
+    values = [[None if isNone else count
+               for isNone, count in zip(noNosepokes.tolist(), sizes.tolist())]]
+    for name, attribute, isDuration in [('NosepokeDuration', 'Duration', True),
+                                        ('LickNumber', 'LickNumber', False),
+                                        ('LickDuration', 'LickDuration', True),
+                                        ('LickContactTime', 'LickContactTime', True)]:
+      raw = [Data.__getNosepokeValue(n, attribute) for n in nosepokes]
+      missing = np.array([x is None for x in raw], dtype=bool)
+      if isDuration:
+        raw = [0 if x is None else x // _MICROSECOND for x in raw]
+
+      else:
+        raw = [0 if x is None else x for x in raw]
+
+      sums = np.zeros(len(visits), dtype=np.int64)
+      incomplete = noNosepokes.copy()
+      if len(nosepokes):
+        sums[nonEmpty] = np.add.reduceat(np.array(raw, dtype=np.int64), offsets)
+        incomplete[nonEmpty] |= np.logical_or.reduceat(missing, offsets)
+
+      columns[name] = np.where(incomplete, np.nan, sums / 1e6 if isDuration else sums)
+      toValue = (lambda x: timedelta(microseconds=x)) if isDuration else int
+      values.append([None if isIncomplete else toValue(x)
+                     for isIncomplete, x in zip(incomplete.tolist(), sums.tolist())])
+
+    return columns, list(zip(*values))
+
+  @staticmethod
+  def __getNosepokeValue(nosepoke, attribute):
+    try:
+      return getattr(nosepoke, attribute)
+
+    except AttributeError:
+      return None
 
   def _registerGroup(self, Name, Animals=[], **kwargs):
     Animals = [self.getAnimal(animal) for animal in Animals] # XXX sanity
@@ -482,11 +1356,7 @@ class Data(object):
 
   @staticmethod
   def __orderBy(data, order):
-    if order is None:
-      return list(data)
-
-    key = attrgetter(order) if isString(order) else attrgetter(*order)
-    return sorted(data, key=key)
+    return _orderBy(data, order)
 
   @staticmethod
   def __makeTimeFilter(start, end):
@@ -509,9 +1379,63 @@ class Data(object):
 
     return {attributeName: Data.__makeTimeFilter(start, end)}
 
+  @staticmethod
+  def __makeVisitSelectors(mice, start, end):
+    selectors = Data.__makeTimeSelectors('Start', start, end)
+    if mice is not None:
+      if isString(mice) or not isinstance(mice, Container):
+        mice = [mice]
+
+      selectors['Animal.Name'] = map(unicode, mice)
+
+    return selectors
+
   class UnableToInsertIntoFrozen(TypeError):
     pass
 
+  def saveColumnar(self, path, force=False):
+    """
+    Save the data in a columnar binary format (NumPy arrays and a JSON
+    manifest), which might be loaded with :py:class:`pymice.ColumnarLoader`
+    much faster than the original data.
+
+    Only requested kinds of data (see the constructor) are saved.
+
+    :param path: path to a directory (or, if ends with '.zip', a zip
+                 archive) the data has to be saved to
+    :type path: basestring
+
+    :param force: whether to overwrite an existing file
+    :type force: bool
+    """
+    ColumnarWriter(path, force=force).write(self)
+
+  def saveIntelliCage(self, path, force=False, tz=None, parallel=False):
+    """
+    Save the data as an IntelliCage Plus archive, which might be loaded
+    with :py:class:`pymice.Loader`.  The archive is written in a streaming
+    manner, chunk by chunk.
+
+    Only requested kinds of data (see the constructor) are saved.
+    Visits are renumbered in order of their start and all times are
+    converted to a single timezone.
+
+    :param path: path to the zip archive the data has to be saved to
+    :type path: basestring
+
+    :param force: whether to overwrite an existing file
+    :type force: bool
+
+    :param tz: timezone of the saved times (the timezone of the earliest
+               visit by default)
+    :type tz: datetime.tzinfo or None
+
+    :param parallel: whether to compress the archive in a background thread
+    :type parallel: bool
+    """
+    IntelliCageWriter(path, force=force, tz=tz,
+                      parallel=parallel).write(self)
+
   def _save(self, filename, force=False):
     """
     An experimental method for saving the data.
@@ -526,158 +1450,7 @@ class Data(object):
     if not filename.lower().endswith('.zip'):
       filename += '.zip'
 
-    if os.path.exists(filename) and not force:
-      raise ValueError("File %s already exists." % filename)
-
-    fh = zipfile.ZipFile(filename, 'w')
-
-    # Animals
-    buf = io.StringIO()
-    keys = set()
-    animals = {}
-    for animal in self.__animals: # FIXME: __animals nor _aid is no longer valid
-      keys.update(animal.keys())
-      name = unicode(animal)
-      assert name not in animals
-      animals[name] = str(len(animals))
-
-    keys.discard('_aid')
-    keys.discard('Tag')
-
-    keys = list(keys)
-    writer = csv.writer(buf, delimiter='\t')
-    writer.writerow(['_aid', 'Tag'] + keys)
-    for animal in self.__animals:
-      _aid = animals[unicode(animal)]
-      try:
-        tag = animal.Tag
-        if isinstance(tag, set):
-          tag = ','.join(str(x) for x in sorted(tag))
-
-        else:
-          tag = str(tag)
-
-      except:
-        tag = ''
-
-      row = animal.select(keys)
-      row = [str(x) if x is not None else '' for x in row]
-      writer.writerow([_aid, tag] + row)
-
-    fh.writestr('Animals.txt', buf.getvalue(), zipfile.ZIP_DEFLATED)
-    buf.reset()
-    buf.truncate()
-
-    sources = set()
-    logKeys = set()
-    envKeys = set()
-    visKeys = set()
-    npKeys = set()
-    visits = {}
-
-    for visit in self.__visits.get():
-      visKeys.update(visit.keys())
-      sources.add(visit._source)
-      visits[id(visit)] = str(len(visits)) #vid
-
-    for log in self.__log.get():
-      logKeys.update(log.keys())
-      sources.add(log._source)
-
-    for env in self.__environment.get():
-      envKeys.update(env.keys())
-      sources.add(env._source)
-
-
-    sources = [(str(i), src) for (i, src) in enumerate(sorted(sources))]
-    writer = csv.writer(buf, delimiter='\t')
-    writer.writerow(['_sid', '_source'])
-    writer.writerows(sources)
-    sources = dict((_source, _sid) for (_sid, _source) in sources)
-
-    fh.writestr('_Sources.txt', buf.getvalue(), zipfile.ZIP_DEFLATED)
-    buf.reset()
-    buf.truncate()
-
-    if visKeys:
-      visKeys.remove('Animal')
-      visKeys.remove('Start')
-      visKeys.remove('End')
-      visKeys.remove('_source')
-      visKeys.discard('Nosepokes')
-      visKeys.remove('_vid')
-      visKeys = list(visKeys)
-
-      writer = csv.writer(buf, delimiter='\t')
-      writer.writerow(['_vid', '_aid', 'Start', 'End'] + visKeys + ['_sid'])
-      for visit in self.__visits.get():
-        _vid = visits[id(visit)]
-        _aid = animals[unicode(visit.Animal)]
-        Start = timeString(visit.Start)
-        End = timeString(visit.End)
-        _sid = sources[visit._source]
-        row = visit.select(visKeys)
-        row = [_vid, _aid, Start, End] +\
-              [str(x) if x is not None else '' for x in row] +\
-              [_sid]
-        writer.writerow(row)
-
-      fh.writestr('IntelliCage/Visits.txt', buf.getvalue(), zipfile.ZIP_DEFLATED)
-      buf.reset()
-      buf.truncate()
-
-    if npKeys:
-      npKeys.remove('_nid')
-      npKeys.remove('_source')
-      npKeys.remove('Visit')
-      npKeys.remove('Start')
-      npKeys.remove('End')
-      npKeys = list(npKeys)
-
-      writer = csv.writer(buf, delimiter='\t')
-      writer.writerow(['_vid', 'Start', 'End'] + visKeys + ['_sid'])
-
-      fh.writestr('IntelliCage/Nosepokes.txt', buf.getvalue(), zipfile.ZIP_DEFLATED)
-      buf.reset()
-      buf.truncate()
-
-    if logKeys:
-      logKeys.remove('_source')
-      logKeys.remove('DateTime')
-      logKeys = list(logKeys)
-
-      writer = csv.writer(buf, delimiter='\t')
-      writer.writerow(['DateTime'] + visKeys + ['_sid'])
-      for log in self.__log.get():
-        _sid = sources[log._source]
-        DateTime = timeString(log.DateTime)
-        row = log.select(logKeys)
-        row = [DateTime] + row + [_sid]
-        writer.writerow(row)
-
-      fh.writestr('IntelliCage/Log.txt', buf.getvalue(), zipfile.ZIP_DEFLATED)
-      buf.reset()
-      buf.truncate()
-
-    if envKeys:
-      envKeys.remove('_source')
-      envKeys.remove('DateTime')
-      envKeys = list(envKeys)
-
-      writer = csv.writer(buf, delimiter='\t')
-      writer.writerow(['DateTime'] + visKeys + ['_sid'])
-      for env in self.__environment.get():
-        _sid = sources[env._source]
-        DateTime = timeString(env.DateTime)
-        row = env.select(logKeys)
-        row = [DateTime] + row + [_sid]
-        writer.writerow(row)
-
-      fh.writestr('IntelliCage/Environment.txt', buf.getvalue(), zipfile.ZIP_DEFLATED)
-      buf.reset()
-      buf.truncate()
-
-    fh.close()
+    self.saveIntelliCage(filename, force=force)
 
 # # TO BE MOVED TO DEBUG MODULE
 #import matplotlib.pyplot as plt
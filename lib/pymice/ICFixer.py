@@ -23,19 +23,74 @@
 #                                                                             #
 ###############################################################################
 
-import sys
+"""
+A transcoder of IntelliCage archives: renames columns of tables to
+the names used by PyMICE, converts decimal commas to dots and (optionally)
+converts times to another timezone.  Archive members are streamed row by
+row, so archives of any size might be processed.
 
-from datetime import datetime
+Usage: ICFixer.py [-j <jobs>] [--tz <timezone>] [--tz-out <timezone>]
+                  <src> <dst> [<src> <dst> ...]
+"""
 
-import zipfile
+import sys
+import io
 import csv
-
+import shutil
+import zipfile
+import argparse
 import operator
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timezone
 
-import cStringIO
+import numpy as np
 
 convertFloat = operator.methodcaller('replace', ',', '.')
 
+_TIME_FIELDS = frozenset(['Start', 'End', 'DateTime', 'Time', 'LickStartTime'])
+
+
+class _TimeConverter(object):
+  """
+  Converts local times of one timezone to local times of another one in
+  batches.  UTC offsets are determined once per distinct minute of a batch
+  (timezone transitions happen at full minutes), the rest is vectorized.
+  """
+  def __init__(self, tzIn, tzOut):
+    self.__tzIn = tzIn
+    self.__tzOut = tzOut
+
+  def __call__(self, strings):
+    local = np.array([s.strip() or 'NaT' for s in strings],
+                     dtype='datetime64[us]')
+    utc = local - self.__getOffsets(local, self.__localOffset)
+    converted = utc + self.__getOffsets(utc, self.__utcOffset)
+    return [u'' if s == 'NaT' else s.replace('T', ' ')
+            for s in np.datetime_as_string(converted, unit='us')]
+
+  @staticmethod
+  def __getOffsets(times, getOffset):
+    minutes, inverse = np.unique(times.astype('datetime64[m]'),
+                                 return_inverse=True)
+    offsets = np.array([np.timedelta64(0, 'us') if np.isnat(m) else
+                        np.timedelta64(getOffset(m.astype(object)), 'us')
+                        for m in minutes], dtype='timedelta64[us]')
+    return offsets[inverse.reshape(-1)]
+
+  def __localOffset(self, dt):
+    try:
+      localize = self.__tzIn.localize
+
+    except AttributeError:
+      return dt.replace(tzinfo=self.__tzIn).utcoffset()
+
+    return localize(dt, is_dst=None).utcoffset()
+
+  def __utcOffset(self, dt):
+    return dt.replace(tzinfo=timezone.utc).astimezone(self.__tzOut).utcoffset()
+
+
 class ICFixer(object):
   _fnAliases = {'IntelliCage/Groups.txt': 'Groups.txt'}
   _aliasesZip = {'Animals.txt': {'AnimalName': 'Name',
@@ -116,58 +171,96 @@ class ICFixer(object):
                                                },
                 }
 
-  def _fixData(self, data, convertors=None):
-    if convertors:
-      data = dict((k, map(convertors[k], v) if k in convertors else v) for (k, v) in data.items())
-
-    return data
 
-  def toZIP(self, fnameOut, tzOut=None):
-    if tzOut and self.tz:
-      def convertTime(tStr):
-        tSplit = tStr.replace('-', ' ').replace(':', ' ').split()
-        subSec = float(tSplit[5]) if len(tSplit) == 6 else 0.
-        sec = int(subSec)
-        ms = (1000000 * (subSec - sec))
-        dt = datetime(*(map(int, tSplit[:5]) + [sec, ms]))
-        dt = self.tz.localize(dt, None) # FIXME: mwahahaha!!!
-        dt = dt.astimezone(tzOut)
-        return dt.strftime('%Y-%m-%d %H:%M:%S.%f')
-
-    else:
-      convertTime = None
+  def __init__(self, fname, tz=None):
+    """
+    :param fname: path to the archive to be fixed
+    :type fname: basestring
 
-    zfIn = zipfile.ZipFile(self.fname)
-    zfOut = zipfile.ZipFile(fnameOut, 'w')
+    :param tz: timezone of times in the archive
+    :type tz: datetime.tzinfo or None
+    """
+    self.fname = fname
+    self.tz = tz
 
-    for src in zfIn.namelist():
-      dst = self._fnAliases.get(src, src)
-      if dst in self._aliasesZip or dst in self._convertZip:
-        labels, data = self.fromCSV(zfIn.open(src))
-        aliases = self._aliasesZip.get(dst)
+  def toZIP(self, fnameOut, tzOut=None, chunkSize=4096):
+    """
+    Write the fixed archive.
 
-        if aliases:
-          labels = [aliases.get(l, l) for l in labels]
-          data = dict((aliases.get(l, l), d) for (l, d) in data.items())
+    :param fnameOut: path to the output archive
+    :type fnameOut: basestring
 
-        data = self._fixData(data, self._convertZip.get(dst))
+    :param tzOut: timezone of times in the output archive; times are
+                  converted only if both timezones are given
+    :type tzOut: datetime.tzinfo or None
 
-        buf = cStringIO.StringIO()
-        self.toCSV(buf, data, labels=labels)
-        zfOut.writestr(dst, buf.getvalue(),
-                       zipfile.ZIP_DEFLATED)
+    :param chunkSize: number of rows converted at once
+    :type chunkSize: int
+    """
+    convertTime = _TimeConverter(self.tz, tzOut) if tzOut and self.tz else None
+
+    with zipfile.ZipFile(self.fname) as zfIn, \
+         zipfile.ZipFile(fnameOut, 'w', zipfile.ZIP_DEFLATED,
+                         allowZip64=True) as zfOut:
+      for info in zfIn.infolist():
+        src = info.filename
+        dst = self._fnAliases.get(src, src)
+        if info.is_dir():
+          zfOut.writestr(dst, b'')
+
+        elif dst in self._aliasesZip or dst in self._convertZip:
+          with zfIn.open(src) as fhIn, \
+               zfOut.open(dst, 'w', force_zip64=True) as fhOut:
+            self._fixCSV(fhIn, fhOut,
+                         self._aliasesZip.get(dst, {}),
+                         self._convertZip.get(dst, {}),
+                         convertTime, chunkSize)
+
+        else:
+          with zfIn.open(src) as fhIn, \
+               zfOut.open(dst, 'w', force_zip64=True) as fhOut:
+            shutil.copyfileobj(fhIn, fhOut)
 
-      else:
-        buf = zfIn.read(src)
-        zfOut.writestr(dst, buf, zipfile.ZIP_DEFLATED)
+  @staticmethod
+  def _fixCSV(fhIn, fhOut, aliases, convertors, convertTime=None,
+              chunkSize=4096):
+    reader = csv.reader(io.TextIOWrapper(fhIn, encoding='utf-8-sig',
+                                         newline=''),
+                        delimiter='\t')
+    textOut = io.TextIOWrapper(fhOut, encoding='utf-8', newline='')
+    writer = csv.writer(textOut, delimiter='\t')
+    try:
+      labels = [aliases.get(l, l) for l in next(reader)]
 
-    zfOut.close()
+    except StopIteration:
+      textOut.detach()
+      return
 
-  def __init__(self, fname, tz=None):
-    """
-    """
-    self.fname = fname
-    self.tz = tz
+    writer.writerow(labels)
+    convert = [(i, convertors[l]) for i, l in enumerate(labels)
+               if l in convertors]
+    times = [i for i, l in enumerate(labels) if l in _TIME_FIELDS] \
+            if convertTime is not None else []
+    while True:
+      rows = list(islice(reader, chunkSize))
+      if not rows:
+        break
+
+      for row in rows:
+        for i, f in convert:
+          if i < len(row):
+            row[i] = f(row[i])
+
+      for i in times:
+        column = [row[i] for row in rows if i < len(row)]
+        for row, value in zip((row for row in rows if i < len(row)),
+                              convertTime(column)):
+          row[i] = value
+
+      writer.writerows(rows)
+
+    textOut.flush()
+    textOut.detach()
 
   @staticmethod
   def fromCSV(fname):
@@ -179,16 +272,16 @@ class ICFixer(object):
     labels = None
     result = None
 
-    if type(fname) is str:
-      fname = open(fname)
+    if isinstance(fname, str):
+      fname = open(fname, encoding='utf-8', newline='')
 
     reader = csv.reader(fname, delimiter='\t')
     try:
-      labels = reader.next()
+      labels = next(reader)
       data = [x for x in reader]
       n = len(data)
       if n > 0:
-        data = zip(*data)
+        data = list(zip(*data))
 
       else:
         data = [[] for x in labels]
@@ -215,7 +308,7 @@ class ICFixer(object):
       return
 
     if labels is None:
-      labels = data.keys()
+      labels = list(data.keys())
 
     data = [data[l] for l in labels]
 
@@ -224,10 +317,61 @@ class ICFixer(object):
     writer.writerows(zip(*data))
 
 
-if __name__ == '__main__':
-  if len(sys.argv) != 3:
-    print('Usage: {} <src> <dst>'.format(sys.argv[0]))
+def fixArchive(src, dst, tz=None, tzOut=None):
+  """
+  Fix an IntelliCage archive (see :py:class:`ICFixer`).
+
+  :param src: path to the archive to be fixed
+  :type src: basestring
+
+  :param dst: path to the output archive
+  :type dst: basestring
+
+  :param tz: timezone (or its name) of times in the archive
+  :type tz: datetime.tzinfo or basestring or None
+
+  :param tzOut: timezone (or its name) of times in the output archive
+  :type tzOut: datetime.tzinfo or basestring or None
+
+  :return: path to the output archive
+  """
+  ICFixer(src, _getTimezone(tz)).toZIP(dst, _getTimezone(tzOut))
+  return dst
+
+
+def _getTimezone(tz):
+  if isinstance(tz, str):
+    import pytz
+    return pytz.timezone(tz)
+
+  return tz
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Fix IntelliCage archives.')
+  parser.add_argument('paths', nargs='+', metavar='<src> <dst>',
+                      help='pairs of paths to input and output archives')
+  parser.add_argument('--tz', help='timezone of times in the input archives')
+  parser.add_argument('--tz-out', dest='tzOut',
+                      help='timezone of times in the output archives')
+  parser.add_argument('-j', '--jobs', type=int, default=1,
+                      help='number of archives processed in parallel')
+  args = parser.parse_args(argv)
+  if len(args.paths) % 2:
+    parser.error('an output archive for every input archive is required')
+
+  pairs = list(zip(args.paths[::2], args.paths[1::2]))
+  if args.jobs > 1 and len(pairs) > 1:
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+      futures = [executor.submit(fixArchive, src, dst, args.tz, args.tzOut)
+                 for src, dst in pairs]
+      for future in futures:
+        future.result()
 
   else:
-    icf = ICFixer(sys.argv[1])
-    icf.toZIP(sys.argv[2])
+    for src, dst in pairs:
+      fixArchive(src, dst, args.tz, args.tzOut)
+
+
+if __name__ == '__main__':
+  main()
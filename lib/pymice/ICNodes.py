@@ -24,6 +24,7 @@
 ###############################################################################
 
 import sys
+import weakref
 
 from ._ICNodesBase import DurationAware, getTimeString
 from ._Tools import toDt, isString
@@ -211,7 +212,26 @@ class Nosepoke(BaseNode, SideAware, DurationAware):
                           source, self.___line)
 
   def _bindToVisit(self, Visit):
-    self.__Visit = Visit
+    # A weak reference avoids a Visit <-> Nosepoke reference cycle,
+    # so dropping the data requires no garbage collection pass.
+    self.__Visit = weakref.ref(Visit)
+
+  @property
+  def Visit(self):
+    """
+    The visit the nosepoke belongs to.
+
+    The nosepoke refers to the visit weakly, so the visit has to be
+    referenced elsewhere (e.g. by the data object it was loaded with).
+
+    :raises ReferenceError: if the visit no longer exists
+    """
+    visit = self.__Visit()
+    if visit is None:
+      raise ReferenceError('The visit of the nosepoke no longer exists; '
+                           'keep a reference to the visit (or the data).')
+
+    return visit
 
   def __repr__(self):
     return '< Nosepoke to %5s door (at %s) >' % \
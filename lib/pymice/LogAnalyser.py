@@ -27,15 +27,17 @@ from datetime import datetime
 from pytz import UTC
 from math import ceil
 import collections
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-import matplotlib.mlab as mmlab
 
 from ._Tools import toTimestampUTC, warn
+from ._Analysis import encodeKeys, groupOrder
 
 # dependence tracking
-# import matplotlib, pytz
-from . import _Tools, _dependencies
+# import pytz
+from . import _Tools, _Analysis, _dependencies
 import types
 __dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
                                                       if isinstance(x, types.ModuleType)])
@@ -44,11 +46,24 @@ __dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().value
 class DataValidator(object):
   """
   A class of objects performing data validation.
+
+  Analyzers providing an `analyzeLog` method are given a :py:class:`LogView`
+  of the data shared by all of them (so the log is scanned once per
+  validation), other analyzers are called with the data.
   """
-  def __init__(self, *analyzers):
+  def __init__(self, *analyzers, **kwargs):
     """
     :arg analyzers: a set of analyzers defining validation criteria
+
+    :keyword workers: number of threads running analyzers concurrently;
+                      if None or 1, analyzers are run one after another
+    :type workers: int or None
     """
+    self.__workers = kwargs.pop('workers', None)
+    for key in kwargs:
+      warn.warn("Unknown argument %s given for DataValidator constructor" % key,
+                stacklevel=2)
+
     self.__analyzers = tuple(analyzers)
 
   def __call__(self, data):
@@ -59,13 +74,106 @@ class DataValidator(object):
     :return: description of data found invalid
     :rtype: (:py:class:`ExcludeMiceData`, ...)
     """
+    view = LogView(data) if any(hasattr(analyzer, 'analyzeLog')
+                                for analyzer in self.__analyzers) else None
+
+    def analyze(analyzer):
+      if hasattr(analyzer, 'analyzeLog'):
+        return analyzer.analyzeLog(view)
+
+      return analyzer(data)
+
+    if self.__workers is None or self.__workers <= 1:
+      reports = map(analyze, self.__analyzers)
+
+    else:
+      with ThreadPoolExecutor(self.__workers) as executor:
+        reports = list(executor.map(analyze, self.__analyzers))
+
     excluded = []
-    for analyzer in self.__analyzers:
-      excluded.extend(analyzer(data))
+    for report in reports:
+      excluded.extend(report)
 
     return tuple(excluded)
 
 
+class LogView(object):
+  """
+  A read-only view of the log of data, scanned once, sorted by DateTime
+  and stored as columns, to be shared by log analyzers.
+  """
+  LOCATION_ATTRIBUTES = ('Cage', 'Corner', 'Side')
+
+  def __init__(self, md):
+    """
+    :param md: data which log is to be viewed
+    :type md: :py:class:`pymice.Data.Data`
+    """
+    self.cages = md.getInmates()
+    rows = [(toTimestampUTC(l.DateTime), l.Type, l.Notes, l.Cage, l.Corner, l.Side)
+            for l in md.getLog()]
+    timestamps = np.array([row[0] for row in rows], dtype=float)
+    order = np.argsort(timestamps, kind='stable')
+    self.__timestamps = timestamps[order]
+    self.__columns = {}
+    for i, name in enumerate(('Type', 'Notes') + self.LOCATION_ATTRIBUTES, 1):
+      column = np.empty(len(rows), dtype=object)
+      column[:] = [row[i] for row in rows]
+      self.__columns[name] = column[order]
+
+  def __len__(self):
+    return len(self.__timestamps)
+
+  def getTimestamps(self, mask=None):
+    """
+    :return: (sorted) timestamps of selected log entries
+    :rtype: numpy.ndarray
+    """
+    return self.__timestamps if mask is None else self.__timestamps[mask]
+
+  def getColumn(self, name, mask=None):
+    """
+    :param name: name of the attribute of log entries
+                 (Type, Notes, Cage, Corner or Side)
+    """
+    column = self.__columns[name]
+    return column if mask is None else column[mask]
+
+  def typeIs(self, logType):
+    """
+    :return: mask of log entries of given type
+    :rtype: numpy.ndarray
+    """
+    return self.__columns['Type'] == logType
+
+  def notesStartWith(self, prefix):
+    """
+    :return: mask of log entries which notes start with the prefix
+    :rtype: numpy.ndarray
+    """
+    notes = self.__columns['Notes']
+    if len(notes) == 0:
+      return np.zeros(0, dtype=bool)
+
+    uniqueNotes, inverse = np.unique(notes.astype(str), return_inverse=True)
+    return np.char.startswith(uniqueNotes, prefix)[inverse]
+
+  def groupTimestamps(self, mask, *attributes):
+    """
+    Group (sorted) timestamps of selected log entries by their attributes.
+
+    :return: sorted timestamps for every (existing) combination of values
+             of the attributes
+    :rtype: {tuple: numpy.ndarray, ...}
+    """
+    timestamps = self.getTimestamps(mask)
+    keys, codes = encodeKeys(*[self.getColumn(name, mask).tolist()
+                               for name in attributes])
+    order = groupOrder(codes, len(keys))
+    bounds = np.cumsum(np.bincount(codes, minlength=len(keys)))
+    return dict(zip(keys, np.split(timestamps[order], bounds[:-1])))
+
+
 class ExcludeMiceData(object):
   """
   A class for storing information about excluded data segments / modalities
@@ -124,43 +232,64 @@ class LickometerLogAnalyzer(object):
                           %(self.shortThreshold, self.medThreshold), '', ''])
 
   def __call__(self, md):
-    # TODO Make sure we do not get strange starting and ending times
-    # resulting from strange bins
+    return self.analyzeLog(LogView(md))
+
+  def analyzeLog(self, view):
+    """
+    :type view: :py:class:`LogView`
+    :rtype: (:py:class:`ExcludeMiceData`, ...)
+    """
+    timestamps = view.groupTimestamps(view.typeIs('Lickometer'), 'Cage', 'Side')
     results = []
-    log = md.getLog()
-    for cage in md.getInmates():
+    for cage in view.cages:
       for side in range(1, 9):
-        # XXX: idea - get timestamps from md._Data_logDateTime
-        tt = np.array([toTimestampUTC(l.DateTime) for l in log \
-                       if l.Type == 'Lickometer' and l.Cage == cage and l.Side == side])
-        if len(tt) > 0:
-          ttMin = tt.min()
-          span = tt.max() - ttMin
-          nBins = ceil(span / self.medBin)
-          medBins = np.linspace(ttMin, ttMin + nBins * self.medBin, int(nBins) + 1)
-          medHist, _ = np.histogram(tt, bins=medBins)
-          # short_bins = np.arange(tt.min(), tt.max()
-          #              + self.short_bin, self.short_bin)
-          # short_hist = np.histogram(tt, bins=short_bins)[0]
-          if (medHist > self.medThreshold).any():
-            # or np.all(short_hist > self.threshold_short):
-            pass
-            idcs = mmlab.contiguous_regions(medHist > self.medThreshold)
-            # print(idcs)
-            for tstartidx, tstopidx in idcs:
-              tstart = medBins[tstartidx]
-              tstop = medBins[tstopidx]
-              # print('%s\t%s" % (tstart, tstop))
-              results.append(ExcludeMiceData(startTime=datetime.fromtimestamp(tstart, UTC),
-                      endTime=datetime.fromtimestamp(tstop, UTC), logType='Lickometer',
-                      cage=cage,
-                      corner=(side + 1) // 2,
-                      side=side,
-                      notes=str(sum(medHist[tstartidx:tstopidx]))
-                      + ' cases. ' + self.notes))
+        try:
+          tt = timestamps[cage, side]
+
+        except KeyError:
+          continue
+
+        results.extend(self.__detectFailures(tt, cage, side))
 
     return tuple(results)
 
+  def __detectFailures(self, tt, cage, side):
+    # TODO Make sure we do not get strange starting and ending times
+    # resulting from strange bins
+    ttMin = tt[0]
+    span = tt[-1] - ttMin
+    nBins = ceil(span / self.medBin)
+    medBins = np.linspace(ttMin, ttMin + nBins * self.medBin, int(nBins) + 1)
+    medHist, _ = np.histogram(tt, bins=medBins)
+    for tstartidx, tstopidx in contiguousRegions(medHist > self.medThreshold):
+      tstart = medBins[tstartidx]
+      tstop = medBins[tstopidx]
+      yield ExcludeMiceData(startTime=datetime.fromtimestamp(tstart, UTC),
+                            endTime=datetime.fromtimestamp(tstop, UTC),
+                            logType='Lickometer',
+                            cage=cage,
+                            corner=(side + 1) // 2,
+                            side=side,
+                            notes=str(medHist[tstartidx:tstopidx].sum())
+                                  + ' cases. ' + self.notes)
+
+
+def contiguousRegions(mask):
+  """
+  Find contiguous regions of true elements of a mask.
+
+  >>> contiguousRegions([0, 1, 1, 0, 0, 2, 0, 3])
+  [(1, 3), (5, 6), (7, 8)]
+  >>> contiguousRegions([])
+  []
+
+  :return: pairs of start (inclusive) and end (exclusive) indices of regions
+  :rtype: [(int, int), ...]
+  """
+  edges = np.diff(np.concatenate(([False], np.asarray(mask, dtype=bool), [False])).astype(np.int8))
+  return list(zip(np.flatnonzero(edges == 1).tolist(),
+                  np.flatnonzero(edges == -1).tolist()))
+
 
 class OldLogAnalyzer(object):
   """
@@ -193,81 +322,74 @@ class PresenceLogAnalyzer(object):
   that either an antenna is not working properly or a mouse has its transponder
   lost.
   """
-  def __init__(self):
+  def __init__(self, logger=None):
+    """
+    :param logger: a logger of diagnostic messages; defaults to the module
+                   logger
+    :type logger: :py:class:`logging.Logger` or None
+    """
     self.notes = '\n'.join(['Generated by PresenceLogAnalyzer', '', ''])
     self.finBin = 3600. # Final bins: 1 hour
+    self.logger = logging.getLogger(__name__) if logger is None else logger
 
   def __call__(self, md):
+    return self.analyzeLog(LogView(md))
+
+  def analyzeLog(self, view):
+    """
+    :type view: :py:class:`LogView`
+    :rtype: (:py:class:`ExcludeMiceData`, ...)
+    """
+    timestamps = view.groupTimestamps(view.notesStartWith('Presence signal'),
+                                      'Cage', 'Corner')
     results = []
-    log = md.getLog(order='DateTime')
-    for cage in md.getInmates():
+    for cage in view.cages:
       for corner in range(1, 5):
-        # XXX: idea - get timestamps from md._Data_logDateTime
-        tt = np.array([toTimestampUTC(l.DateTime) for l in log \
-                       if l.Cage == cage and l.Corner == corner and l.Notes.startswith('Presence signal')])
-        if len(tt) > 0:
-          # print('%s\t%s\t%s' % (cage, corner, len(events)))
-          ttOrig = tt.copy()
-          tds = np.diff(tt)
-
-          # # Wywalanie jesli sa co najmniej 3 w czasie ponizej minuty
-          # idcs = np.zeros_like(tt)
-          # for idx, there, dthere in zip(range(len(tt)-1), tt[:-1], tds):
-          #     if dthere < 60.:
-          #         # print idx, there, dthere
-          #         idx2 = np.where((tt >= there)&(tt < there + 60.))[0]
-          #         # print idx, idx2
-          #         if len(idx2) >= 3:
-          #             idcs[idx2] = 1
-          # print idcs
-          # tt = np.delete(tt, np.where(idcs))
-
-          # Wywalamy blizsze siebie niz 30 s
-          idcs = np.where(tds < 30.)[0]
-          tt = np.delete(tt, np.unique(np.array([idcs, idcs+1])))
-          # XXX: czy to spowoduje, ze ciag bledow pozostanie niezauwazony???
-
-          if len(tt) > 0:
-            # Wywalamy jesli izolowany
-            tds = np.diff(tt)
-            mask = np.zeros_like(tt)
-            mask[0] += 0.5
-            mask[-1] += 0.5
-            idcs2 = np.where(tds > 1800.)[0]
-            mask[idcs2] += 0.5
-            mask[idcs2 + 1] += 0.5
-            tt = np.delete(tt, np.where(mask > 0.75))
-
-          if len(tt) > 0:
-            # Pomijamy jesli <= 4 bledy w dobie
-            ttMin = tt.min()
-            span = tt.max() - ttMin
-            nBins = ceil(span / (24 * 3600.))
-            longBins = np.linspace(ttMin, ttMin + nBins * 24 * 3600.,
-                                   int(nBins) + 1)
-            hist, _ = np.histogram(tt, bins=longBins)
-            print(tt)
-            print(longBins)
-            print(hist)
-            if (hist > 4).any():
-              # print('%s\t%s\t%s\t%s' % (cage, corner, 'Zostalo ', len(tt)))
-              nBins = ceil(span / self.finBin)
-              bins = np.arange(ttMin, ttMin + nBins * self.finBin,
-                               int(nBins) + 1)
-              hist, _ = np.histogram(tt, bins=bins)
-              idcs = mmlab.contiguous_regions(hist)
-              for tstartidx, tstopidx in idcs:
-                tstart = bins[tstartidx]
-                tstop = bins[tstopidx]
-                results.append(ExcludeMiceData(startTime=datetime.fromtimestamp(tstart, UTC),
-                        endTime=datetime.fromtimestamp(tstop, UTC),
-                        logType='Presence',
-                        cage=cage, corner=corner,
-                        notes=str(sum(hist[tstartidx:tstopidx]))
-                        + ' cases. ' + self.notes))
+        try:
+          tt = timestamps[cage, corner]
+
+        except KeyError:
+          continue
+
+        results.extend(self.__detectFailures(tt, cage, corner))
 
     return tuple(results)
 
+  def __detectFailures(self, tt, cage, corner):
+    # Wywalamy blizsze siebie niz 30 s
+    tooClose = np.diff(tt) < 30.
+    tt = tt[~(np.append(tooClose, False) | np.insert(tooClose, 0, False))]
+    # XXX: czy to spowoduje, ze ciag bledow pozostanie niezauwazony???
+    if len(tt) == 0:
+      return
+
+    # Wywalamy jesli izolowany
+    isolated = np.diff(tt) > 1800.
+    tt = tt[~(np.insert(isolated, 0, True) & np.append(isolated, True))]
+    if len(tt) == 0:
+      return
+
+    # Pomijamy jesli <= 4 bledy w dobie
+    ttMin = tt[0]
+    span = tt[-1] - ttMin
+    nBins = ceil(span / (24 * 3600.))
+    longBins = np.linspace(ttMin, ttMin + nBins * 24 * 3600.,
+                           int(nBins) + 1)
+    hist, _ = np.histogram(tt, bins=longBins)
+    self.logger.debug('cage %s, corner %s: timestamps %s, daily bins %s, daily counts %s',
+                      cage, corner, tt, longBins, hist)
+    if (hist > 4).any():
+      nBins = ceil(span / self.finBin)
+      bins = np.linspace(ttMin, ttMin + nBins * self.finBin, int(nBins) + 1)
+      hist, _ = np.histogram(tt, bins=bins)
+      for tstartidx, tstopidx in contiguousRegions(hist):
+        yield ExcludeMiceData(startTime=datetime.fromtimestamp(bins[tstartidx], UTC),
+                              endTime=datetime.fromtimestamp(bins[tstopidx], UTC),
+                              logType='Presence',
+                              cage=cage, corner=corner,
+                              notes=str(hist[tstartidx:tstopidx].sum())
+                                    + ' cases. ' + self.notes)
+
 
 def overlap(exc, interval):
   """
@@ -281,6 +403,301 @@ def overlap(exc, interval):
          exc.startTime <= start and exc.endTime >= end
 
 
+class ValidationReport(object):
+  """
+  An index of a report generated by :py:class:`DataValidator` objects.
+
+  Excluded intervals are grouped by their log type and location; in every
+  group they are kept sorted by both start and end times (and merged into
+  disjoint ones), so checking an interval for overlap (see
+  :py:func:`overlap`) with any of them costs O(log n).  Groups are looked
+  up by the queried location, so only the matching ones are searched.
+
+  The object is iterable over the indexed :py:class:`ExcludeMiceData`
+  objects, so it may be used wherever the report itself is.
+
+  >>> report = ValidationReport([ExcludeMiceData(datetime(2012, 1, 1, 12, tzinfo=UTC),
+  ...                                            datetime(2012, 1, 1, 13, tzinfo=UTC),
+  ...                                            logType='Presence',
+  ...                                            cage=1, corner=2)])
+  >>> report.overlaps('Presence', (datetime(2012, 1, 1, 12, 30, tzinfo=UTC),
+  ...                              datetime(2012, 1, 1, 14, tzinfo=UTC)),
+  ...                 cage=1)
+  True
+  >>> report.overlapsMany('Presence',
+  ...                     [datetime(2012, 1, 1, 11, tzinfo=UTC),
+  ...                      datetime(2012, 1, 1, 11, tzinfo=UTC)],
+  ...                     [datetime(2012, 1, 1, 12, tzinfo=UTC),
+  ...                      datetime(2012, 1, 1, 14, tzinfo=UTC)],
+  ...                     corner=2).tolist()
+  [False, True]
+  """
+  class _Intervals(object):
+    def __init__(self, starts, ends):
+      byStart = np.argsort(starts, kind='stable')
+      self.starts = starts[byStart]
+      self.maxEnds = np.maximum.accumulate(ends[byStart])
+      self.ends = np.sort(ends)
+      self.irregular = (starts > ends).any()
+      # for proper (start < end) intervals the overlap() condition reduces
+      # to (exc.startTime < end and exc.endTime > start) unless either
+      # interval is of zero length, so those are merged into disjoint ones
+      proper = starts[byStart] < ends[byStart]
+      self.points = self.starts[~proper]
+      self.mergedStarts, self.mergedEnds = self.__merge(self.starts[proper],
+                                                        ends[byStart][proper])
+
+    @staticmethod
+    def __merge(starts, ends):
+      if len(starts) == 0:
+        return starts, ends
+
+      newBlock = np.ones(len(starts), dtype=bool)
+      newBlock[1:] = starts[1:] > np.maximum.accumulate(ends)[:-1]
+      blocks = np.flatnonzero(newBlock)
+      return starts[blocks], np.maximum.reduceat(ends, blocks)
+
+    def overlap(self, starts, ends):
+      if self.irregular:
+        return self.overlapExactly(starts, ends)
+
+      proper = starts < ends
+      if proper.all():
+        return self.__overlapProper(starts, ends)
+
+      result = np.empty(len(starts), dtype=bool)
+      result[proper] = self.__overlapProper(starts[proper], ends[proper])
+      result[~proper] = self.overlapExactly(starts[~proper], ends[~proper])
+      return result
+
+    def __overlapProper(self, starts, ends):
+      last = np.searchsorted(self.mergedStarts, ends, side='left') - 1
+      result = (last >= 0) & (self.mergedEnds[np.maximum(last, 0)] > starts) \
+               if len(self.mergedStarts) > 0 else np.zeros(len(starts), dtype=bool)
+      if len(self.points) > 0:
+        result |= np.searchsorted(self.points, starts, side='left') \
+                  < np.searchsorted(self.points, ends, side='right')
+
+      return result
+
+    def overlapExactly(self, starts, ends):
+      # start <= exc.startTime < end
+      result = np.searchsorted(self.starts, starts, side='left') \
+               < np.searchsorted(self.starts, ends, side='left')
+      # start < exc.endTime <= end
+      result |= np.searchsorted(self.ends, starts, side='right') \
+                < np.searchsorted(self.ends, ends, side='right')
+      # exc.startTime <= start and exc.endTime >= end
+      covering = np.searchsorted(self.starts, starts, side='right')
+      result |= (covering > 0) \
+                & (self.maxEnds[np.maximum(covering - 1, 0)] >= ends)
+      return result
+
+  def __init__(self, report):
+    """
+    :param report: report generated by :py:class:`DataValidator`
+    :type report: collection(:py:class:`ExcludeMiceData`, ...)
+    """
+    self.__report = tuple(report)
+    groups = collections.defaultdict(list)
+    for excluded in self.__report:
+      groups[excluded.logType, self.__locationKey(excluded.location)].append(excluded)
+
+    self.__index = collections.defaultdict(list)
+    for (logType, location), excluded in groups.items():
+      starts = _toTimestamps([x.startTime for x in excluded])
+      ends = _toTimestamps([x.endTime for x in excluded])
+      self.__index[logType].append((dict(location), starts, ends))
+
+    self.__projections = {}
+
+  @staticmethod
+  def __locationKey(location):
+    return tuple(sorted(location.items(), key=lambda item: item[0]))
+
+  def __iter__(self):
+    return iter(self.__report)
+
+  def __len__(self):
+    return len(self.__report)
+
+  def overlaps(self, logType, interval, **location):
+    """
+    :param logType: type of the invalidating issue
+
+    :param interval: boundaries of temporal scope of data
+    :type interval: (:py:class:`datetime.datetime`, :py:class:`datetime.datetime`)
+
+    :param location: location (e.g. cage, corner, side) to which the scope
+                     of data is restricted
+
+    :return: whether any excluded interval of given log type matching
+             the location overlaps with the interval
+    :rtype: bool
+    """
+    start, end = interval
+    return bool(self.overlapsMany(logType, [start], [end], **location)[0])
+
+  def overlapsMany(self, logType, starts, ends, **location):
+    """
+    Vectorized version of :py:meth:`overlaps`.
+
+    :param starts: lower boundaries of temporal scopes of data
+    :type starts: [:py:class:`datetime.datetime`, ...] or numpy.ndarray of timestamps
+
+    :param ends: upper boundaries of temporal scopes of data
+    :type ends: [:py:class:`datetime.datetime`, ...] or numpy.ndarray of timestamps
+
+    :rtype: numpy.ndarray of bool
+    """
+    starts = _toTimestamps(starts)
+    ends = _toTimestamps(ends)
+    result = np.zeros(len(starts), dtype=bool)
+    for keys, projection in self.__getProjections(logType, location):
+      intervals = projection.get(tuple(location[key] for key in keys))
+      if intervals is not None:
+        result |= intervals.overlap(starts, ends)
+
+    return result
+
+  def overlapsEvents(self, logType, starts, ends, **locations):
+    """
+    Check events (e.g. visits or nosepokes) located in different places.
+
+    :param starts: start times of events
+    :type starts: [:py:class:`datetime.datetime`, ...] or numpy.ndarray of timestamps
+
+    :param ends: end times of events
+    :type ends: [:py:class:`datetime.datetime`, ...] or numpy.ndarray of timestamps
+
+    :param locations: locations (e.g. cage, corner, side) of events
+    :type locations: {str: sequence, ...}
+
+    :return: mask of events overlapping with any excluded interval of
+             given log type matching their location
+    :rtype: numpy.ndarray of bool
+    """
+    starts = _toTimestamps(starts)
+    ends = _toTimestamps(ends)
+    locations = {key: np.asarray(values) for key, values in locations.items()}
+    result = np.zeros(len(starts), dtype=bool)
+    for keys, projection in self.__getProjections(logType, locations):
+      slots = _locate([locations[key] for key in keys], list(projection),
+                      len(starts))
+      order = groupOrder(slots + 1, len(projection) + 1)
+      bounds = np.cumsum(np.bincount(slots + 1, minlength=len(projection) + 1))
+      for intervals, first, last in zip(projection.values(), bounds[:-1], bounds[1:]):
+        if first < last:
+          events = order[first:last]
+          result[events] |= intervals.overlap(starts[events], ends[events])
+
+    return result
+
+  def __getProjections(self, logType, locations):
+    """
+    Group excluded intervals by values of those of the queried location
+    keys they are located by.
+
+    :return: pairs of the keys and intervals by values of the keys
+    :rtype: [((str, ...), collections.OrderedDict), ...]
+    """
+    queriedKeys = tuple(sorted(locations))
+    try:
+      return self.__projections[logType, queriedKeys]
+
+    except KeyError:
+      pass
+
+    projections = collections.defaultdict(lambda: collections.defaultdict(list))
+    for excludedLocation, starts, ends in self.__index.get(logType, ()):
+      keys = tuple(key for key in queriedKeys if key in excludedLocation)
+      values = tuple(excludedLocation[key] for key in keys)
+      projections[keys][values].append((starts, ends))
+
+    result = []
+    for keys, projection in projections.items():
+      result.append((keys,
+                     collections.OrderedDict(
+                       (values, self._Intervals(np.concatenate([s for s, _ in intervals]),
+                                                np.concatenate([e for _, e in intervals])))
+                       for values, intervals in projection.items())))
+
+    self.__projections[logType, queriedKeys] = result
+    return result
+
+
+def _locate(columns, groupValues, n):
+  """
+  :return: for every event index of the group of values matching its
+           location (given as columns) or -1
+  :rtype: numpy.ndarray
+  """
+  if not columns:
+    return np.zeros(n, dtype=np.intp)
+
+  eventCodes = np.zeros(n, dtype=np.int64)
+  groupCodes = np.zeros(len(groupValues), dtype=np.int64)
+  valid = np.ones(len(groupValues), dtype=bool)
+  codeSpace = 1
+  for i, column in enumerate(columns):
+    codes, size, codeOf = _factorize(column)
+    eventCodes = eventCodes * size + codes
+    codeSpace *= size
+    for j, values in enumerate(groupValues):
+      code = codeOf(values[i])
+      if code is None:
+        valid[j] = False
+
+      else:
+        groupCodes[j] = groupCodes[j] * size + code
+
+  groups = np.flatnonzero(valid)
+  if codeSpace <= max(n, 1 << 16):
+    table = np.full(codeSpace, -1, dtype=np.intp)
+    table[groupCodes[groups]] = groups
+    return table[eventCodes]
+
+  byCode = np.argsort(groupCodes[groups], kind='stable')
+  sortedCodes = groupCodes[groups][byCode]
+  slots = np.full(n, -1, dtype=np.intp)
+  if len(sortedCodes) > 0:
+    positions = np.minimum(np.searchsorted(sortedCodes, eventCodes),
+                           len(sortedCodes) - 1)
+    found = sortedCodes[positions] == eventCodes
+    slots[found] = groups[byCode][positions[found]]
+
+  return slots
+
+
+def _factorize(column):
+  if column.dtype.kind in 'iu' and len(column) > 0:
+    low = int(column.min())
+    size = int(column.max()) - low + 1
+
+    def codeOf(value):
+      try:
+        if value == int(value) and low <= value < low + size:
+          return int(value) - low
+
+      except (TypeError, ValueError, OverflowError):
+        pass
+
+      return None
+
+    return column - low, size, codeOf
+
+  keys, codes = encodeKeys(column.tolist())
+  codesByKey = {key: code for code, key in enumerate(keys)}
+  return codes, max(len(keys), 1), codesByKey.get
+
+
+def _toTimestamps(times):
+  if isinstance(times, np.ndarray) and times.dtype.kind in 'fiu':
+    return times.astype(float)
+
+  return np.array([toTimestampUTC(t) for t in times], dtype=float)
+
+
 class FailureInspector(object):
   """
   Class of objects for checking whether report generated by :py:class:`DataValidator`
@@ -314,12 +731,36 @@ class FailureInspector(object):
     :return: ``True`` if the scope of data is valid else ``False``
     :rtype: bool
     """
+    if isinstance(report, ValidationReport):
+      return not report.overlaps(self._issue, interval, **kwargs)
+
     for excluded in report:
       if not self._single_test(excluded, interval, **kwargs):
         return False
 
     return True
 
+  def checkIntervals(self, report, starts, ends, **kwargs):
+    """
+    Vectorized version of :py:meth:`__call__`.
+
+    :param report: report generated by :py:class:`DataValidator`
+    :type report: :py:class:`ValidationReport` or collection(:py:class:`ExcludeMiceData`, ...)
+
+    :param starts: lower boundaries of temporal scopes of validated data
+    :type starts: [:py:class:`datetime.datetime`, ...]
+
+    :param ends: upper boundaries of temporal scopes of validated data
+    :type ends: [:py:class:`datetime.datetime`, ...]
+
+    :return: ``True`` for every valid scope of data else ``False``
+    :rtype: numpy.ndarray of bool
+    """
+    if not isinstance(report, ValidationReport):
+      report = ValidationReport(report)
+
+    return ~report.overlapsMany(self._issue, starts, ends, **kwargs)
+
   def _single_test(self, exc, interval, **kwargs):
     """
     Perform a test on a single ExcludeMiceData object
@@ -23,8 +23,20 @@
 #                                                                             #
 ###############################################################################
 
+import hashlib
+import os
+import pickle
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from operator import attrgetter
+
+import numpy as np
+
 from ._Ens import Ens
-from ._Tools import groupBy
+from ._Tools import groupBy, isString
 import sys
 
 # dependence tracking
@@ -34,7 +46,373 @@ __dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().value
                                                       if isinstance(x, types.ModuleType)])
 
 
+def codeFingerprint(f):
+  """
+  A digest of the code of a callable.
+
+  The digest changes with:
+
+    - the body of a function or a method (including its nested functions
+      and constants),
+    - functions and data (numbers, strings, containers, arrays) bound in
+      its closure or referred to as its globals,
+    - the (pickled) state of the object a method is bound to or of
+      a callable object,
+    - arguments of a :py:func:`functools.partial` object.
+
+  Other objects bound in the closure (e.g. instances of classes) are
+  ignored.  Builtins are identified by their qualified names.
+
+  :return: the digest or None if the callable can not be fingerprinted
+           (e.g. it is bound to an object which can not be pickled)
+  :rtype: str or None
+  """
+  try:
+    return _functionFingerprint(f, set())
+
+  except _Unfingerprintable:
+    return None
+
+
+class _Unfingerprintable(Exception):
+  pass
+
+
+_CLOSURE_VALUE_TYPES = (type(None), bool, int, float, complex, str, bytes)
+_CONTAINER_TYPES = (list, tuple, set, frozenset, dict, np.ndarray)
+_FUNCTION_TYPES = (types.FunctionType, types.MethodType,
+                   types.BuiltinFunctionType, partial)
+
+def _functionFingerprint(f, visited):
+  if isinstance(f, partial):
+    return _digest('partial', _functionFingerprint(f.func, visited),
+                   _valueFingerprint(f.args, visited),
+                   _valueFingerprint(f.keywords, visited))
+
+  if isinstance(f, types.MethodType):
+    return _digest('method', _functionFingerprint(f.__func__, visited),
+                   _stateFingerprint(_fingerprintedState(f.__self__)))
+
+  code = getattr(f, '__code__', None)
+  if code is None:
+    return _codelessFingerprint(f, visited)
+
+  visited.add(id(f))
+  digest = hashlib.sha1(_codeObjectFingerprint(code).encode('ascii'))
+  for cell in getattr(f, '__closure__', None) or ():
+    try:
+      value = cell.cell_contents
+
+    except ValueError:
+      continue
+
+    if isinstance(value, _CLOSURE_VALUE_TYPES + _CONTAINER_TYPES + _FUNCTION_TYPES):
+      digest.update(_valueFingerprint(value, visited).encode('ascii'))
+
+  fGlobals = getattr(f, '__globals__', {})
+  for name in sorted(_codeNames(code)):
+    value = fGlobals.get(name)
+    if isinstance(value, types.FunctionType) or \
+       (isinstance(value, _CLOSURE_VALUE_TYPES + _CONTAINER_TYPES) and value is not None):
+      digest.update(name.encode('utf-8'))
+      digest.update(_valueFingerprint(value, visited).encode('ascii'))
+
+  return digest.hexdigest()
+
+
+def _codelessFingerprint(f, visited):
+  name = getattr(f, '__qualname__', getattr(f, '__name__', type(f).__name__))
+  if isinstance(f, type):
+    return _digest(getattr(f, '__module__', None), name)
+
+  if isinstance(f, types.BuiltinFunctionType):
+    boundTo = getattr(f, '__self__', None)
+    if boundTo is None or isinstance(boundTo, types.ModuleType):
+      return _digest(getattr(f, '__module__', None), name)
+
+    return _digest(getattr(f, '__module__', None), name, _stateFingerprint(boundTo))
+
+  # a callable object
+  call = getattr(type(f), '__call__', None)
+  callFingerprint = _functionFingerprint(call, visited) \
+                    if hasattr(call, '__code__') else _digest(type(f).__module__, name)
+  return _digest('object', callFingerprint, _stateFingerprint(f))
+
+
+def _valueFingerprint(value, visited):
+  if isinstance(value, _CLOSURE_VALUE_TYPES):
+    return _digest(value)
+
+  if isinstance(value, np.ndarray) and value.dtype.kind != 'O':
+    return _digest('array', value.dtype.str, value.shape,
+                   hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+
+  if isinstance(value, (list, tuple)):
+    return _digest(type(value).__name__,
+                   [_valueFingerprint(x, visited) for x in value])
+
+  if isinstance(value, (set, frozenset)):
+    return _digest(type(value).__name__,
+                   sorted(_valueFingerprint(x, visited) for x in value))
+
+  if isinstance(value, dict):
+    return _digest('dict', sorted((_valueFingerprint(k, visited),
+                                   _valueFingerprint(v, visited))
+                                  for k, v in value.items()))
+
+  if callable(value) and not isinstance(value, np.ndarray):
+    if id(value) in visited:
+      return _digest('recursive', getattr(value, '__qualname__', None))
+
+    return _functionFingerprint(value, visited)
+
+  return _stateFingerprint(value)
+
+
+def _fingerprintedState(obj):
+  excluded = getattr(obj, '_UNFINGERPRINTED_STATE', None)
+  if excluded is None:
+    return obj
+
+  return sorted((name, value) for name, value in vars(obj).items()
+                if name not in excluded)
+
+
+def _stateFingerprint(obj):
+  try:
+    return hashlib.sha1(pickle.dumps(obj, 2)).hexdigest()
+
+  except (pickle.PicklingError, TypeError, AttributeError):
+    raise _Unfingerprintable
+
+
+def _codeNames(code):
+  names = set(code.co_names)
+  for const in code.co_consts:
+    if isinstance(const, types.CodeType):
+      names |= _codeNames(const)
+
+  return names
+
+
+def _codeObjectFingerprint(code):
+  digest = hashlib.sha1(code.co_code)
+  for const in code.co_consts:
+    if isinstance(const, types.CodeType):
+      digest.update(_codeObjectFingerprint(const).encode('ascii'))
+
+    else:
+      digest.update(repr(const).encode('utf-8'))
+
+  digest.update(repr(code.co_names).encode('utf-8'))
+  return digest.hexdigest()
+
+
+def _digest(*items):
+  return hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
+
+
+def dataFingerprint(objects):
+  """
+  A digest identifying data to be analysed.
+
+  Objects providing a `_fingerprint()` method (e.g. :py:class:`Loader` and
+  :py:class:`Merger`) are identified by its result, other objects by their
+  pickled representation.
+
+  :return: the digest or None if the data can not be fingerprinted
+  :rtype: str or None
+  """
+  getFingerprint = getattr(objects, '_fingerprint', None)
+  if getFingerprint is not None:
+    return getFingerprint()
+
+  try:
+    return hashlib.sha1(pickle.dumps(objects, 2)).hexdigest()
+
+  except (pickle.PicklingError, TypeError, AttributeError):
+    return None
+
+
+class ResultCache(object):
+  """
+  A persistent (on-disk) cache of results of analysers.
+
+  An entry is identified by the fingerprint of the analysed data (see
+  :py:func:`dataFingerprint`), the analyser name and the fingerprint of its
+  code (see :py:func:`codeFingerprint`); it is valid as long as cached
+  results of the analyser's dependencies are valid and unchanged.
+  Least recently used entries are evicted when the total size of the cache
+  exceeds `maxSize`.
+
+  >>> import tempfile
+  >>> cache = ResultCache(tempfile.mkdtemp())
+  >>> analyser = Analyser(min=min, max=max,
+  ...                     span=lambda result, data: result.max - result.min)
+  >>> analyser([1, 2, 4], cache=cache) == analyser([1, 2, 4], cache=cache)
+  True
+  >>> stats = cache.getStats()
+  >>> stats.hits, stats.misses
+  (3, 3)
+  """
+  SUFFIX = '.pickle'
+
+  def __init__(self, path, maxSize=None, fingerprint=dataFingerprint):
+    """
+    :param path: a directory where results are stored
+    :type path: str
+
+    :param maxSize: a limit of total size (in bytes) of stored results
+    :type maxSize: int or None
+
+    :param fingerprint: a function returning a digest of data to be analysed
+                        (or None if the data can not be fingerprinted)
+    """
+    self.__path = path
+    self.__maxSize = maxSize
+    self.__fingerprint = fingerprint
+    self.__lock = threading.Lock()
+    self.__hits = 0
+    self.__misses = 0
+    self.__evictions = 0
+    if not os.path.isdir(path):
+      os.makedirs(path)
+
+  def fingerprint(self, objects):
+    return self.__fingerprint(objects)
+
+  def lookup(self, dataKey, name, codeKey, isValid):
+    """
+    :param isValid: a function validating a mapping of dependency names to
+                    keys of their results the entry has been stored with
+
+    :return: a pair of the mapping and the cached result or None if there is
+             no valid entry
+    """
+    path = self.__entryPath(dataKey, name, codeKey)
+    entry = self.__read(path)
+    if entry is not None and isValid(entry[0]):
+      with self.__lock:
+        self.__hits += 1
+        self.__touch(path)
+
+      return entry
+
+    with self.__lock:
+      self.__misses += 1
+
+    return None
+
+  def store(self, dataKey, name, codeKey, dependencyKeys, value):
+    try:
+      pickled = pickle.dumps((dependencyKeys, value), pickle.HIGHEST_PROTOCOL)
+
+    except (pickle.PicklingError, TypeError, AttributeError):
+      return
+
+    path = self.__entryPath(dataKey, name, codeKey)
+    with self.__lock:
+      temporaryPath = '{}.{}.tmp'.format(path, threading.current_thread().ident)
+      with open(temporaryPath, 'wb') as fh:
+        fh.write(pickled)
+
+      os.replace(temporaryPath, path)
+      self.__evict()
+
+  def getStats(self):
+    """
+    :return: numbers of cache hits, misses and evictions as well as number
+             and total size (in bytes) of stored entries
+    :rtype: Ens
+    """
+    with self.__lock:
+      entries = self.__entries()
+      return Ens(hits=self.__hits,
+                 misses=self.__misses,
+                 evictions=self.__evictions,
+                 entries=len(entries),
+                 size=sum(size for _, size, _ in entries))
+
+  def clear(self):
+    with self.__lock:
+      for path, _, _ in self.__entries():
+        self.__remove(path)
+
+  def __entryPath(self, dataKey, name, codeKey):
+    return os.path.join(self.__path,
+                        _digest(dataKey, name, codeKey) + self.SUFFIX)
+
+  @staticmethod
+  def __read(path):
+    try:
+      with open(path, 'rb') as fh:
+        return pickle.load(fh)
+
+    except Exception:
+      return None
+
+  @staticmethod
+  def __touch(path):
+    try:
+      os.utime(path, None)
+
+    except OSError:
+      pass
+
+  @staticmethod
+  def __remove(path):
+    try:
+      os.remove(path)
+
+    except OSError:
+      pass
+
+  def __entries(self):
+    entries = []
+    for fn in os.listdir(self.__path):
+      if fn.endswith(self.SUFFIX):
+        path = os.path.join(self.__path, fn)
+        try:
+          stat = os.stat(path)
+
+        except OSError:
+          continue
+
+        entries.append((path, stat.st_size, stat.st_mtime))
+
+    return entries
+
+  def __evict(self):
+    if self.__maxSize is None:
+      return
+
+    entries = sorted(self.__entries(), key=lambda entry: entry[2])
+    size = sum(entry[1] for entry in entries)
+    for path, entrySize, _ in entries:
+      if size <= self.__maxSize:
+        break
+
+      self.__remove(path)
+      size -= entrySize
+      self.__evictions += 1
+
+
 class Analyser(object):
+  """
+  A set of named analysers evaluated lazily against (preprocessed) data.
+
+  An analyser is either a callable of one argument (the data) or of two
+  arguments (the result object and the data); in the latter case it may
+  depend on other analysers by accessing them as attributes of the result
+  object.
+
+  Dependencies are discovered as they are accessed, so independent analysers
+  may be evaluated concurrently (see :py:meth:`__call__`).  After every call
+  the `timings` attribute maps analyser names to their own evaluation times
+  (in seconds; time spent on evaluating or awaiting their dependencies
+  excluded) and the `dependencies` attribute maps analyser names to
+  frozensets of names of analysers they depend on.
+  """
   class Result(object):
     class CircularDependencyError(RuntimeError):
       pass
@@ -45,25 +423,87 @@ class Analyser(object):
     class ReadOnlyError(TypeError):
       pass
 
-    def __init__(self, data, analysers):
+    def __init__(self, data, analysers, cache=None, dataKey=None):
       self.__dict__['_data'] = data
+      self.__dict__['_cache'] = cache if dataKey is not None else None
+      self.__dict__['_dataKey'] = dataKey
+      self.__dict__['_keys'] = {}
       self.__dict__['_analysers'] = dict(analysers)
       self.__dict__['_lock'] = set()
       self.__dict__['_values'] = {}
+      self.__dict__['_errors'] = {}
+      self.__dict__['_owners'] = {}
+      self.__dict__['_awaited'] = {}
+      self.__dict__['_timings'] = {}
+      self.__dict__['_dependencies'] = {}
+      self.__dict__['_condition'] = threading.Condition()
+      self.__dict__['_local'] = threading.local()
 
     def __getattr__(self, name):
+      stack = self.__stack()
+      if stack:
+        self.__addDependency(stack[-1][0], name)
+
       try:
         return self._values[name]
 
       except KeyError:
+        pass
+
+      start = time.time()
+      try:
         return self.__createAttribute(name)
 
+      finally:
+        if stack:
+          stack[-1][1] += time.time() - start
+
     def __setattr__(self, key, value):
       raise self.ReadOnlyError
 
+    def __stack(self):
+      try:
+        return self._local.stack
+
+      except AttributeError:
+        stack = self._local.stack = []
+        return stack
+
+    def __addDependency(self, dependent, name):
+      with self._condition:
+        self._dependencies.setdefault(dependent, set()).add(name)
+
     def __createAttribute(self, name):
-      self.__ensureNoPreviousAttemptsToCreate(name)
-      return self.__calculateAndStoreAttribute(name)
+      thread = threading.current_thread()
+      with self._condition:
+        while name in self._owners:
+          self.__ensureNoDeadlock(name, thread)
+          self._awaited[thread] = name
+          try:
+            self._condition.wait()
+
+          finally:
+            del self._awaited[thread]
+
+        if name in self._values:
+          return self._values[name]
+
+        if name in self._errors:
+          raise self._errors[name]
+
+        self.__ensureNoPreviousAttemptsToCreate(name)
+        analyser = self.__getAnalyser(name)
+        self._owners[name] = thread
+
+      return self.__calculateAndStoreAttribute(name, analyser)
+
+    def __ensureNoDeadlock(self, name, thread):
+      owner = self._owners.get(name)
+      while owner is not None:
+        if owner is thread:
+          raise self.CircularDependencyError
+
+        owner = self._owners.get(self._awaited.get(owner))
 
     def __ensureNoPreviousAttemptsToCreate(self, item):
       if item in self._lock:
@@ -71,12 +511,75 @@ class Analyser(object):
 
       self._lock.add(item)
 
-    def __calculateAndStoreAttribute(self, name):
-      analyser = self.__getAnalyser(name)
+    def __calculateAndStoreAttribute(self, name, analyser):
+      stack = self.__stack()
+      stack.append([name, 0.])
+      start = time.time()
+      try:
+        value = self.__cachedOrCalculated(name, analyser)
+
+      except BaseException as e:
+        self.__store(name, self._errors, e)
+        raise
+
+      else:
+        self.__store(name, self._values, value)
+        return value
+
+      finally:
+        _, dependenciesTime = stack.pop()
+        self._timings[name] = time.time() - start - dependenciesTime
+
+    def __cachedOrCalculated(self, name, analyser):
+      if self._cache is None:
+        return self.__callAnalyser(analyser)
+
+      codeKey = codeFingerprint(analyser)
+      if codeKey is None:
+        return self.__callAnalyser(analyser)
+
+      entry = self._cache.lookup(self._dataKey, name, codeKey,
+                                 self.__dependenciesUnchanged)
+      if entry is not None:
+        dependencyKeys, value = entry
+        self.__setKey(name, codeKey, dependencyKeys)
+        return value
+
       value = self.__callAnalyser(analyser)
-      self._values[name] = value
+      try:
+        dependencyKeys = {dependency: self._keys[dependency]
+                          for dependency in self._dependencies.get(name, ())}
+
+      except KeyError:
+        return value
+
+      self.__setKey(name, codeKey, dependencyKeys)
+      self._cache.store(self._dataKey, name, codeKey, dependencyKeys, value)
       return value
 
+    def __dependenciesUnchanged(self, dependencyKeys):
+      for dependency, key in dependencyKeys.items():
+        try:
+          getattr(self, dependency)
+
+        except Exception:
+          return False
+
+        if self._keys.get(dependency) != key:
+          return False
+
+      return True
+
+    def __setKey(self, name, codeKey, dependencyKeys):
+      self._keys[name] = _digest(self._dataKey, name, codeKey,
+                                 sorted(dependencyKeys.items()))
+
+    def __store(self, name, storage, value):
+      with self._condition:
+        storage[name] = value
+        del self._owners[name]
+        self._condition.notify_all()
+
     def __getAnalyser(self, item):
       try:
         return self._analysers[item]
@@ -97,6 +600,16 @@ class Analyser(object):
     def __exceptionNotInScope(self):
       return sys.exc_info()[2].tb_next is not None
 
+  workers = None
+  cache = None
+  timings = None
+  dependencies = None
+  # analysers and the preprocessor are fingerprinted on their own and
+  # the evaluation settings and bookkeeping do not affect results
+  _UNFINGERPRINTED_STATE = frozenset(['_Analyser__analysers', 'preprocess',
+                                      'workers', 'cache', 'timings',
+                                      'dependencies'])
+
   def __init__(self, preprocessor=None, **analysers):
     if preprocessor is not None:
       self.preprocess = preprocessor
@@ -106,11 +619,91 @@ class Analyser(object):
   def preprocess(self, data):
     return data
 
-  def __call__(self, objects):
+  def __call__(self, objects, workers=None, cache=None):
+    """
+    :param objects: data to be analysed
+
+    :param workers: number of threads evaluating analysers concurrently;
+                    if not given the `workers` attribute is used, if that
+                    is None or 1, analysers are evaluated serially
+    :type workers: int or None
+
+    :param cache: a persistent cache of results of analysers; if not given
+                  the `cache` attribute is used
+    :type cache: :py:class:`ResultCache` or None
+
+    :return: results of analysers
+    :rtype: Ens
+    """
+    if cache is None:
+      cache = self.cache
+
+    dataKey = self.__dataKey(objects, cache)
     results = self.Result(self.preprocess(objects),
-                          self.__analysers)
-    return Ens({name: getattr(results, name)
-                for name in self.__analysers})
+                          self.__analysers,
+                          cache=cache,
+                          dataKey=dataKey)
+    if workers is None:
+      workers = self.workers
+
+    try:
+      if workers is None or workers <= 1:
+        return Ens({name: getattr(results, name)
+                    for name in self.__analysers})
+
+      return Ens(self.__evaluateConcurrently(results, workers))
+
+    finally:
+      self.timings = Ens(results._timings)
+      self.dependencies = Ens({name: frozenset(results._dependencies.get(name, ()))
+                               for name in results._timings})
+
+  def __dataKey(self, objects, cache):
+    if cache is None:
+      return None
+
+    fingerprint = cache.fingerprint(objects)
+    if fingerprint is None:
+      return None
+
+    codeKey = codeFingerprint(self.preprocess)
+    if codeKey is None:
+      return None
+
+    return _digest(fingerprint, codeKey)
+
+  def __evaluateConcurrently(self, results, workers):
+    with ThreadPoolExecutor(workers) as executor:
+      futures = [(name, executor.submit(getattr, results, name))
+                 for name in self.__schedule()]
+      return {name: future.result() for name, future in futures}
+
+  def __schedule(self):
+    """
+    Order analysers so that those known (from a previous call) to be
+    dependencies of others are submitted first.
+    """
+    dependencies = {}
+    if self.dependencies is not None:
+      dependencies = {name: self.dependencies[name] for name in self.dependencies}
+
+    order = []
+    visited = set()
+
+    def visit(name):
+      if name in visited or name not in self.__analysers:
+        return
+
+      visited.add(name)
+      for dependency in sorted(dependencies.get(name, ())):
+        visit(dependency)
+
+      order.append(name)
+
+    for name in sorted(self.__analysers):
+      visit(name)
+
+    return order
 
 
 class Analysis(Analyser):
@@ -126,19 +719,41 @@ class Analysis(Analyser):
 
 
 class Aggregator(object):
-  def __init__(self, getKey=lambda x: x, aggregateFunction=lambda x: x, requiredKeys=()):
+  """
+  A class of objects grouping a sequence by a key and aggregating the groups.
+
+  The ``aggregateFunction`` is either a callable applied to the list of
+  objects of every group, or a reduction (one of ``'count'``, ``'sum'``,
+  ``'mean'``, ``'min'``, ``'max'``, ``'first'``, ``'last'`` or
+  a :py:class:`numpy.ufunc`) applied to values (given by ``getValue``)
+  of the group with the vectorized :py:func:`aggregateColumns` engine.
+  """
+  def __init__(self, getKey=lambda x: x, aggregateFunction=lambda x: x, requiredKeys=(),
+               getValue=None):
     self.__getKey = getKey
     self.__requiredKeys = requiredKeys
     self.__aggregateFunction = aggregateFunction
+    self.__getValue = getValue
 
   def __call__(self, sequence):
     aggregateFunction = self.__aggregateFunction
     getKey = self.__getKey
     requiredKeys = self.__requiredKeys
-    return self.aggregate(sequence, getKey, aggregateFunction, requiredKeys)
+    return self.aggregate(sequence, getKey, aggregateFunction, requiredKeys,
+                          getValue=self.__getValue)
 
   @staticmethod
-  def aggregate(sequence, getKey=lambda x: x, aggregateFunction=lambda x: x, requiredKeys=()):
+  def aggregate(sequence, getKey=lambda x: x, aggregateFunction=lambda x: x, requiredKeys=(),
+                getValue=None):
+    if isReduction(aggregateFunction):
+      sequence = list(sequence)
+      getKey = _getter(getKey)
+      values = sequence if getValue is None else [_getter(getValue)(o) for o in sequence]
+      return aggregateColumns([getKey(o) for o in sequence],
+                              values,
+                              reduction=aggregateFunction,
+                              requiredKeys=requiredKeys)
+
     return Ens.map(aggregateFunction,
                    groupBy(sequence,
                            getKey=getKey,
@@ -147,7 +762,8 @@ class Aggregator(object):
   def __get__(self, instance, owner):
     return self.__class__(getKey=self.__getKeyForDescriptor(instance, owner),
                           requiredKeys=self.__requiredKeys,
-                          aggregateFunction=self.__aggregateFunctionForDescriptor(instance, owner))
+                          aggregateFunction=self.__aggregateFunctionForDescriptor(instance, owner),
+                          getValue=self.__getValue)
 
   def __aggregateFunctionForDescriptor(self, instance, owner):
     try:
@@ -170,30 +786,454 @@ class Aggregator(object):
     self.__aggregateFunctionMethod = f
 
 
-def histogram(values, bins):
-  for a, b in zip(bins[:-1], bins[1:]):
-    if a > b:
-      raise ValueError
+REDUCTIONS = ('count', 'sum', 'mean', 'min', 'max', 'first', 'last')
+
+_UFUNC_REDUCTIONS = {'sum': np.add,
+                     'min': np.minimum,
+                     'max': np.maximum,
+                     }
+
+
+def isReduction(aggregateFunction):
+  """
+  :return: whether ``aggregateFunction`` is handled by :py:func:`reduceGroups`
+  :rtype: bool
+  """
+  return isinstance(aggregateFunction, np.ufunc) or \
+         (isString(aggregateFunction) and aggregateFunction in REDUCTIONS)
+
+
+def _getter(get):
+  if hasattr(get, '__call__'):
+    return get
+
+  return attrgetter(get) if isString(get) else attrgetter(*get)
+
+
+def encodeKeys(*columns):
+  """
+  Encode key column(s) as dense integer codes.
+
+  >>> keys, codes = encodeKeys(['b', 'a', 'b'])
+  >>> keys
+  ['a', 'b']
+  >>> codes.tolist()
+  [1, 0, 1]
+
+  >>> keys, codes = encodeKeys([1, 2, 1, 1], ['x', 'x', 'y', 'x'])
+  >>> keys
+  [(1, 'x'), (1, 'y'), (2, 'x')]
+  >>> codes.tolist()
+  [0, 2, 1, 0]
+
+  :param columns: key column(s) of equal length
+  :type columns: sequence or numpy.ndarray
+
+  :return: unique keys (tuples if many columns are given) and code of every row
+  :rtype: ([key, ...], numpy.ndarray)
+  """
+  if len(columns) == 1:
+    return _encodeColumn(columns[0])
+
+  encoded = [_encodeColumn(column) for column in columns]
+  if len(encoded[0][1]) == 0:
+    return [], np.zeros(0, dtype=np.intp)
+
+  combined = np.ravel_multi_index([codes for _, codes in encoded],
+                                  [max(len(keys), 1) for keys, _ in encoded])
+  uniqueCombined, codes = np.unique(combined, return_inverse=True)
+  indices = np.unravel_index(uniqueCombined,
+                             [max(len(keys), 1) for keys, _ in encoded])
+  keys = list(zip(*[[columnKeys[i] for i in columnIndices.tolist()]
+                    for (columnKeys, _), columnIndices in zip(encoded, indices)]))
+  return keys, codes.reshape(-1)
+
+
+def asofIndices(leftTimes, rightTimes, leftKeys=(), rightKeys=(),
+                direction='backward', tolerance=None):
+  """
+  Match every left time with the latest preceding (``'backward'``),
+  the earliest following (``'forward'``) or the nearest (``'nearest'``)
+  right time of the same key.
+
+  Right times are sorted by key and time once; then all left times of a key
+  are matched with a single :py:func:`numpy.searchsorted` call.
+
+  >>> asofIndices([0.5, 1.5, 3.], [3., 1., 2.]).tolist()
+  [-1, 1, 0]
+  >>> asofIndices([0.5, 1.5, 3.], [3., 1., 2.], direction='nearest',
+  ...             tolerance=0.4).tolist()
+  [-1, -1, 0]
+  >>> asofIndices([1.5, 1.5], [1., 1.], [['a', 'b']], [['b', 'a']]).tolist()
+  [1, 0]
+
+  :param leftTimes: times to be matched
+  :type leftTimes: sequence of floats or numpy.ndarray
+
+  :param rightTimes: times to be matched with
+  :type rightTimes: sequence of floats or numpy.ndarray
+
+  :param leftKeys: key column(s) of left times
+  :type leftKeys: (sequence, ...)
+
+  :param rightKeys: key column(s) (as many as ``leftKeys``) of right times
+  :type rightKeys: (sequence, ...)
+
+  :param direction: ``'backward'`` (right time not greater than left one),
+                    ``'forward'`` (right time not less than left one)
+                    or ``'nearest'`` (ties are resolved backward)
+  :type direction: str
+
+  :param tolerance: maximal absolute difference of matched times
+  :type tolerance: float or None
+
+  :return: index of the matched right time for every left time
+           (-1 if there is no match)
+  :rtype: numpy.ndarray
+  """
+  if direction not in ('backward', 'forward', 'nearest'):
+    raise ValueError('Unknown direction: {}'.format(direction))
+
+  if len(leftKeys) != len(rightKeys):
+    raise ValueError('Numbers of left and right key columns differ')
+
+  leftTimes = np.asarray(leftTimes, dtype=float).reshape(-1)
+  rightTimes = np.asarray(rightTimes, dtype=float).reshape(-1)
+  nLeft = len(leftTimes)
+  result = np.full(nLeft, -1, dtype=np.intp)
+  if nLeft == 0 or len(rightTimes) == 0:
+    return result
+
+  if leftKeys:
+    keys, codes = encodeKeys(*[_concatenate([_asColumn(left), _asColumn(right)])
+                               for left, right in zip(leftKeys, rightKeys)])
+    nGroups = len(keys)
+    leftCodes, rightCodes = codes[:nLeft], codes[nLeft:]
+
+  else:
+    nGroups = 1
+    leftCodes = np.zeros(nLeft, dtype=np.intp)
+    rightCodes = np.zeros(len(rightTimes), dtype=np.intp)
+
+  rightOrder = np.lexsort((rightTimes, rightCodes))
+  sortedTimes = rightTimes[rightOrder]
+  groupBounds = np.searchsorted(rightCodes[rightOrder], np.arange(nGroups + 1))
+
+  leftOrder = groupOrder(leftCodes, nGroups)
+  leftBounds = np.searchsorted(leftCodes[leftOrder], np.arange(nGroups + 1))
+  for code in range(nGroups):
+    lo, hi = groupBounds[code], groupBounds[code + 1]
+    rows = leftOrder[leftBounds[code]:leftBounds[code + 1]]
+    if lo == hi or len(rows) == 0:
+      continue
+
+    times = sortedTimes[lo:hi]
+    queries = leftTimes[rows]
+    before = np.searchsorted(times, queries, side='right') - 1
+    after = np.searchsorted(times, queries, side='left')
+    if direction == 'backward':
+      indices = before
+
+    elif direction == 'forward':
+      indices = after
+
+    else:
+      hasAfter = after < len(times)
+      useAfter = hasAfter & ((before < 0) |
+                             (times[np.minimum(after, len(times) - 1)] - queries
+                              < queries - times[np.maximum(before, 0)]))
+      indices = np.where(useAfter, after, before)
+
+    matched = (indices >= 0) & (indices < len(times))
+    if tolerance is not None:
+      matched[matched] = np.abs(times[indices[matched]] - queries[matched]) <= tolerance
+
+    result[rows[matched]] = rightOrder[lo + indices[matched]]
 
-  result = [0] * (len(bins) - 1)
-  for v in values:
-    _insertElement(result, v, bins)
   return result
 
 
-def _insertElement(result, element, bins):
-  bottom = 0
-  top = len(result)
-  if bins[bottom] <= element < bins[top]:
-    while top - bottom > 1:
-      middle = (bottom + top) // 2
-      if element < bins[middle]:
-        top = middle
-      else:
-        bottom = middle
+def _encodeColumn(column):
+  array = column if isinstance(column, np.ndarray) else None
+  if array is None and len(set(map(type, column))) == 1:
+    # mixed types would be coerced to a common one (e.g. str) by NumPy
+    try:
+      array = np.asarray(column)
+
+    except ValueError:
+      pass
+
+  if array is not None and array.ndim == 1 and array.dtype.kind in 'biufmMUS':
+    keys, codes = np.unique(array, return_inverse=True)
+    return keys.tolist(), codes.reshape(-1).astype(np.intp)
+
+  mapping = {}
+  codes = np.fromiter((mapping.setdefault(k, len(mapping)) for k in column),
+                      dtype=np.intp, count=len(column))
+  return list(mapping), codes
+
+
+def reduceGroups(values, codes, nGroups, reduction='count'):
+  """
+  Reduce values within groups with a sort-based (``reduceat``) kernel.
+
+  >>> reduceGroups([1, 2, 3, 4], [1, 0, 1, 1], 2, 'sum').tolist()
+  [2, 8]
+
+  :param values: values to be reduced (ignored if ``reduction`` is ``'count'``)
+  :type values: sequence or numpy.ndarray
+
+  :param codes: group code of every value (in range ``0 .. nGroups - 1``)
+  :type codes: sequence of ints or numpy.ndarray
+
+  :param nGroups: number of groups; every group has to be non-empty
+  :type nGroups: int
+
+  :param reduction: name of the reduction, a :py:class:`numpy.ufunc` or
+                    a callable applied to the array of values of every group
+  :type reduction: str or numpy.ufunc or callable
+
+  :return: reduced value for every group
+  :rtype: numpy.ndarray
+  """
+  codes = np.asarray(codes, dtype=np.intp)
+  counts = np.bincount(codes, minlength=nGroups)
+  if reduction == 'count':
+    return counts
+
+  values = _asColumn(values)
+  if reduction in ('sum', 'mean') and values.dtype.kind == 'f':
+    sums = np.bincount(codes, weights=values, minlength=nGroups)
+    return sums if reduction == 'sum' else sums / counts
+
+  ends = np.cumsum(counts)
+  starts = ends - counts
+  sortedValues = values[groupOrder(codes, nGroups)]
+
+  if nGroups == 0:
+    return sortedValues[:0]
+
+  if reduction == 'first':
+    return sortedValues[starts]
+
+  if reduction == 'last':
+    return sortedValues[ends - 1]
+
+  if reduction == 'mean':
+    return np.add.reduceat(sortedValues, starts) / counts
+
+  ufunc = _UFUNC_REDUCTIONS.get(reduction, reduction) if isString(reduction) else reduction
+  if isinstance(ufunc, np.ufunc):
+    return ufunc.reduceat(sortedValues, starts)
+
+  if isString(ufunc):
+    raise ValueError('Unknown reduction: {}'.format(reduction))
+
+  result = np.empty(nGroups, dtype=object)
+  for i, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+    result[i] = ufunc(sortedValues[start:end])
+
+  return result
+
+
+def groupOrder(codes, nGroups):
+  """
+  :return: stable permutation sorting ``codes`` (radix sort is used when
+           codes fit in 16 bits)
+  :rtype: numpy.ndarray
+  """
+  codes = np.asarray(codes)
+  if nGroups <= 1 << 16:
+    codes = codes.astype(np.uint16)
+
+  return np.argsort(codes, kind='stable')
+
+
+def _asColumn(values):
+  if isinstance(values, np.ndarray):
+    return values
+
+  if not isinstance(values, (list, tuple)):
+    values = list(values)
+
+  array = np.asarray(values)
+  if array.ndim == 1:
+    return array
+
+  column = np.empty(len(values), dtype=object)
+  for i, value in enumerate(values):
+    column[i] = value
+
+  return column
+
+
+def _isColumnTuple(keys):
+  return isinstance(keys, tuple) and len(keys) > 0 and \
+         all(isinstance(column, (list, np.ndarray)) for column in keys)
+
+
+def aggregateColumns(keys, values=None, reduction='count', requiredKeys=()):
+  """
+  Group values by keys and reduce every group.
+
+  >>> result = aggregateColumns(['a', 'b', 'a'], [1., 2., 4.], 'mean')
+  >>> print(result.a, result.b)
+  2.5 2.0
+
+  >>> aggregateColumns(['a', 'b', 'a'], requiredKeys=['c']) == {'a': 2, 'b': 1, 'c': 0}
+  True
+
+  :param keys: key of every value (or a tuple of key columns)
+  :type keys: sequence or numpy.ndarray or (sequence, ...)
+
+  :param values: values to be reduced (may be omitted for ``'count'``)
+  :type values: sequence or numpy.ndarray or None
+
+  :param reduction: see :py:func:`reduceGroups`
+
+  :param requiredKeys: keys always present in the result; empty groups are
+                       reduced to 0 (``'count'`` and ``'sum'``) or ``None``
+  :type requiredKeys: collection
+
+  :return: reduced value for every key
+  :rtype: :py:class:`Ens`
+  """
+  uniqueKeys, codes = encodeKeys(*keys) if _isColumnTuple(keys) else encodeKeys(keys)
+  if values is None:
+    values = codes
+
+  reduced = reduceGroups(values, codes, len(uniqueKeys), reduction)
+  result = {key: None if reduction not in ('count', 'sum') else 0
+            for key in requiredKeys}
+  result.update(zip(uniqueKeys, reduced.tolist()))
+  return Ens(result)
+
+
+def histogram(values, bins, weights=None):
+  """
+  Count values falling into bins.
+
+  A value `v` falls into the i-th bin if `bins[i] <= v < bins[i + 1]`;
+  values out of `[bins[0], bins[-1])` range are dropped.
+
+  >>> histogram([0, 0.5, 1, 1.5, 2], [0, 1, 2])
+  [2, 2]
+  >>> histogram([0, 0.5, 1], [0, 1, 2], weights=[1, 2, 4])
+  [3.0, 4.0]
+
+  :param values: values to be binned
+  :param bins: (non-decreasing) edges of bins
+
+  :param weights: weights of values (if given, the weights are summed
+                  instead of values being counted)
+
+  :rtype: [int, ...] or [float, ...]
+  """
+  return histograms([values], bins,
+                    None if weights is None else [weights])[0]
+
+
+def histograms(valueSequences, bins, weights=None):
+  """
+  Count values of every sequence falling into (the same) bins.
+
+  >>> histograms([[0, 1, 1], [], [1.5, 2]], [0, 1, 2])
+  [[1, 2], [0, 0], [0, 1]]
+
+  :param valueSequences: sequences of values to be binned
+  :param bins: (non-decreasing) edges of bins
+  :param weights: sequences of weights of values
+
+  :rtype: [[int, ...], ...] or [[float, ...], ...]
+  """
+  bins = _asBins(bins)
+  nBins = max(len(bins) - 1, 0)
+  columns = [_asColumn(values) for values in valueSequences]
+  rows = np.repeat(np.arange(len(columns)),
+                   [len(column) for column in columns])
+  nonEmpty = [column for column in columns if len(column) > 0]
+  if nonEmpty:
+    indices, inRange = _binIndices(_concatenate(nonEmpty), bins)
+    codes = rows[inRange] * nBins + indices
+
+  else:
+    inRange = np.zeros(0, dtype=bool)
+    codes = np.zeros(0, dtype=np.intp)
+
+  if weights is not None:
+    weights = np.concatenate([np.asarray(w, dtype=float).reshape(-1)
+                              for w in weights] + [np.zeros(0)])[inRange]
+
+  counts = np.bincount(codes, weights=weights,
+                       minlength=len(columns) * nBins)
+  return counts.reshape(len(columns), nBins).tolist()
+
+
+class HistogramAccumulator(object):
+  """
+  A histogram updated chunk by chunk (see :py:func:`histogram`).
+
+  >>> accumulator = HistogramAccumulator([0, 1, 2])
+  >>> accumulator.update([0, 0.5]).update([1.5, 3]).getCounts()
+  [2, 1]
+  """
+  def __init__(self, bins):
+    """
+    :param bins: (non-decreasing) edges of bins
+    """
+    self.__bins = _asBins(bins)
+    self.__counts = np.zeros(max(len(self.__bins) - 1, 0), dtype=np.intp)
+
+  def update(self, values, weights=None):
+    """
+    Add (optionally weighted) values to the histogram.
+
+    :return: the accumulator
+    """
+    values = _asColumn(values)
+    if len(values) > 0:
+      indices, inRange = _binIndices(values, self.__bins)
+      if weights is not None:
+        weights = np.asarray(weights, dtype=float).reshape(-1)[inRange]
+
+      self.__counts = self.__counts + np.bincount(indices, weights=weights,
+                                                  minlength=len(self.__counts))
+
+    return self
+
+  def getCounts(self):
+    """
+    :rtype: [int, ...] or [float, ...] (if any weights were given)
+    """
+    return self.__counts.tolist()
+
+
+def _asBins(bins):
+  bins = _asColumn(bins)
+  if len(bins) > 1 and np.any(bins[:-1] > bins[1:]):
+    raise ValueError
+
+  return bins
+
+
+def _binIndices(values, bins):
+  indices = _searchSorted(bins, values) - 1
+  inRange = (indices >= 0) & (indices < len(bins) - 1)
+  return indices[inRange], inRange
+
+
+def _searchSorted(bins, values):
+  try:
+    return np.searchsorted(bins, values, side='right')
+
+  except TypeError:
+    return np.searchsorted(bins.astype(object), values.astype(object),
+                           side='right')
+
+
+def _concatenate(columns):
+  try:
+    return np.concatenate(columns)
 
-    result[bottom] += 1
-  # for i, (bottom, top) in enumerate(zip(bins[:-1], bins[1:])):
-  #   if bottom <= element < top:
-  #     result[i] += 1
-  #     break
\ No newline at end of file
+  except TypeError:
+    return np.concatenate([column.astype(object) for column in columns])
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+
+"""
+Co-occurrence of animals in corners, for social analyses.
+
+Visits of every corner are sorted by Start (as int64 microseconds) once.
+Then a sweep line over every corner finds, for all visits at once, the
+range of later visits starting before the visit ends (or within a window
+after it) with :py:func:`numpy.searchsorted`; pairs are expanded from the
+ranges with no Python-level loop, so every query is O(N log N + output).
+"""
+
+import sys
+if sys.version_info >= (3, 0):
+  unicode = str
+
+from datetime import timedelta
+
+import numpy as np
+
+from ._Analysis import encodeKeys
+from ._Ens import Ens
+from ._Tools import toTimestampsUTC
+
+# dependence tracking
+from . import _dependencies, _Analysis, _Ens, _Tools
+import types
+__dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
+                                                      if isinstance(x, types.ModuleType)])
+
+
+def _microseconds(timestamps):
+  timestamps = np.asarray(timestamps, dtype=float).reshape(-1)
+  valid = np.isfinite(timestamps)
+  result = np.zeros(len(timestamps), dtype=np.int64)
+  result[valid] = np.round(timestamps[valid] * 1e6).astype(np.int64)
+  return result, valid
+
+
+def _expandRanges(lo, hi):
+  """
+  >>> [x.tolist() for x in _expandRanges(np.array([0, 5, 7]), np.array([2, 5, 9]))]
+  [[0, 0, 2, 2], [0, 1, 7, 8]]
+
+  :return: index of the range and the element for every element of ranges
+  """
+  counts = np.maximum(hi - lo, 0)
+  ranges = np.repeat(np.arange(len(lo)), counts)
+  offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+  return ranges, lo[ranges] + offsets
+
+
+class VisitCoOccurrence(object):
+  """
+  Co-occurrence of visits of different animals in the same corner.
+
+  >>> coOccurrence = data.getCoOccurrence()
+  >>> overlaps = coOccurrence.getOverlaps()
+  >>> followers = coOccurrence.getFollowers(timedelta(seconds=5))
+  >>> together = coOccurrence.getPairOverlapDurations()
+  """
+  def __init__(self, visits, starts=None, ends=None):
+    """
+    Visits with no End are ignored.
+
+    :param visits: visits to be analysed
+    :type visits: [:py:class:`Visit`, ...] or numpy.ndarray
+
+    :param starts: UTC timestamps of visit starts (computed if not given)
+    :type starts: numpy.ndarray or None
+
+    :param ends: UTC timestamps of visit ends (computed if not given)
+    :type ends: numpy.ndarray or None
+    """
+    objects = np.empty(len(visits), dtype=object)
+    objects[:] = list(visits)
+    starts, validStarts = _microseconds(starts if starts is not None
+                                        else toTimestampsUTC([v.Start for v in objects]))
+    ends, validEnds = _microseconds(ends if ends is not None
+                                    else toTimestampsUTC([v.End for v in objects]))
+    valid = validStarts & validEnds
+    objects, starts, ends = objects[valid], starts[valid], ends[valid]
+
+    self.__animals, animalCodes = encodeKeys([unicode(v.Animal.Name) for v in objects])
+    _, cornerCodes = encodeKeys([int(v.Cage) for v in objects],
+                                [int(v.Corner) for v in objects])
+    order = np.lexsort((starts, cornerCodes))
+    self.__visits = objects[order]
+    self.__starts = starts[order]
+    self.__ends = ends[order]
+    self.__animalCodes = animalCodes[order]
+    cornerCodes = cornerCodes[order]
+    # visits of every corner make a contiguous slice of the arrays
+    self.__bounds = np.flatnonzero(np.r_[True, cornerCodes[1:] != cornerCodes[:-1], True]) \
+                    if len(cornerCodes) else np.zeros(1, dtype=np.intp)
+
+  def getOverlaps(self):
+    """
+    :return: pairs of overlapping visits of different animals in the same
+             corner (the first visit starts not later than the second one)
+             and duration of the overlap (in seconds)
+    :rtype: :py:class:`Ens` {'First': numpy.ndarray, 'Second': numpy.ndarray,
+                             'Overlap': numpy.ndarray}
+    """
+    first, second = self.__getOverlappingPairs()
+    overlap = np.minimum(self.__ends[first], self.__ends[second]) - self.__starts[second]
+    return Ens(First=self.__visits[first],
+               Second=self.__visits[second],
+               Overlap=overlap / 1e6)
+
+  def getFollowers(self, window, since='End'):
+    """
+    :param window: maximal latency of the follower
+    :type window: datetime.timedelta or float (seconds)
+
+    :param since: whether the latency is measured since ``'End'`` (the
+                  follower enters the corner within the window after
+                  the leader has left it) or ``'Start'`` (the follower
+                  enters the corner within the window after the leader)
+    :type since: str
+
+    :return: pairs of visits of different animals in the same corner
+             and latency (in seconds) of the follower
+    :rtype: :py:class:`Ens` {'Leader': numpy.ndarray, 'Follower': numpy.ndarray,
+                             'Latency': numpy.ndarray}
+    """
+    if since not in ('End', 'Start'):
+      raise ValueError('Unknown latency origin: {}'.format(since))
+
+    if isinstance(window, timedelta):
+      window = window.total_seconds()
+
+    window = int(round(window * 1e6))
+    origins = self.__ends if since == 'End' else self.__starts
+    lo = np.maximum(self.__searchCorners(origins, 'left'),
+                    np.arange(len(origins)) + 1)
+    hi = self.__searchCorners(origins + window, 'right')
+    leaders, followers = _expandRanges(lo, hi)
+    leaders, followers = self.__differentAnimals(leaders, followers)
+    return Ens(Leader=self.__visits[leaders],
+               Follower=self.__visits[followers],
+               Latency=(self.__starts[followers] - origins[leaders]) / 1e6)
+
+  def getPairOverlapDurations(self):
+    """
+    :return: total time (in seconds) animals spent together in corners
+             for every pair of animals ever met
+    :rtype: :py:class:`Ens` {(name, name): float}
+    """
+    first, second = self.__getOverlappingPairs()
+    overlap = np.minimum(self.__ends[first], self.__ends[second]) - self.__starts[second]
+    a = self.__animalCodes[first]
+    b = self.__animalCodes[second]
+    pairs, codes = encodeKeys(np.minimum(a, b), np.maximum(a, b))
+    totals = np.bincount(codes, weights=overlap, minlength=len(pairs)) / 1e6
+    return Ens({(self.__animals[x], self.__animals[y]): total
+                for (x, y), total in zip(pairs, totals.tolist())})
+
+  def __getOverlappingPairs(self):
+    hi = self.__searchCorners(self.__ends, 'left')
+    first, second = _expandRanges(np.arange(len(hi)) + 1, hi)
+    return self.__differentAnimals(first, second)
+
+  def __searchCorners(self, times, side):
+    """
+    :return: for every visit - index of the first visit of its corner
+             starting not earlier than (``'left'``) or later than
+             (``'right'``) the time
+    """
+    result = np.empty(len(times), dtype=np.intp)
+    for lo, hi in zip(self.__bounds[:-1].tolist(), self.__bounds[1:].tolist()):
+      result[lo:hi] = lo + np.searchsorted(self.__starts[lo:hi], times[lo:hi], side=side)
+
+    return result
+
+  def __differentAnimals(self, first, second):
+    different = self.__animalCodes[first] != self.__animalCodes[second]
+    return first[different], second[different]
@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+"""
+A columnar binary format of the data.
+
+The format is either a directory or a zip archive containing
+``manifest.json`` and NumPy ``.npy`` arrays (one array per attribute of
+visits, nosepokes, log entries, environment samples and hardware events).
+The manifest holds animals, groups, names of sources of the data, cage
+numbers (the layout of corners and sides is the fixed IntelliCage one),
+timezones and descriptions of the columns.  :py:class:`ColumnarReader` may
+memory-map arrays of a directory for a raw access to columns; decoding
+them into objects (as :py:class:`pymice.ColumnarLoader` does) loads whole
+columns into memory.
+"""
+
+import os
+import json
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytz
+
+from ._Tools import isString
+
+# dependence tracking
+from . import _dependencies, _Tools
+import types
+__dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
+                                                      if isinstance(x, types.ModuleType)])
+
+
+FORMAT = 'pymice-columnar'
+VERSION = 1
+MANIFEST = 'manifest.json'
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=pytz.UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+VISIT_COLUMNS = [('Start', 'time'), ('End', 'time'),
+                 ('Cage', 'int'), ('Corner', 'int'),
+                 ('Animal', 'category'), ('Module', 'category'),
+                 ('CornerCondition', 'int'), ('PlaceError', 'int'),
+                 ('AntennaNumber', 'int'), ('AntennaDuration', 'timedelta'),
+                 ('PresenceNumber', 'int'), ('PresenceDuration', 'timedelta'),
+                 ('VisitSolution', 'int'),
+                 ('_source', 'category'), ('_line', 'int'), ('_id', 'int'),
+                 ('NosepokeNumber', 'int')]
+
+NOSEPOKE_COLUMNS = [('Start', 'time'), ('End', 'time'), ('Side', 'int'),
+                    ('LickNumber', 'int'), ('LickContactTime', 'timedelta'),
+                    ('LickDuration', 'timedelta'),
+                    ('SideCondition', 'int'), ('SideError', 'int'),
+                    ('TimeError', 'int'), ('ConditionError', 'int'),
+                    ('AirState', 'int'), ('DoorState', 'int'),
+                    ('LED1State', 'int'), ('LED2State', 'int'),
+                    ('LED3State', 'int'), ('LickStartTime', 'time'),
+                    ('_source', 'category'), ('_line', 'int')]
+
+LOG_COLUMNS = [('DateTime', 'time'), ('Category', 'category'),
+               ('Type', 'category'),
+               ('Cage', 'int'), ('Corner', 'int'), ('Side', 'int'),
+               ('Notes', 'category'),
+               ('_source', 'category'), ('_line', 'int')]
+
+ENVIRONMENT_COLUMNS = [('DateTime', 'time'), ('Temperature', 'float'),
+                       ('Illumination', 'int'), ('Cage', 'int'),
+                       ('_source', 'category'), ('_line', 'int')]
+
+HARDWARE_COLUMNS = [('DateTime', 'time'), ('Type', 'int'),
+                    ('Cage', 'int'), ('Corner', 'int'), ('Side', 'int'),
+                    ('State', 'int'),
+                    ('_source', 'category'), ('_line', 'int')]
+
+
+class _Timezones(object):
+  """
+  A registry of timezones of datetimes: :py:mod:`pytz` timezones are
+  identified by name, any other by their UTC offset.
+  """
+  def __init__(self, descriptions=()):
+    self.descriptions = list(descriptions)
+    self.__codes = {}
+    self.__tzinfos = [self.__makeTzinfo(**d) for d in self.descriptions]
+    self.__known = []
+
+  @staticmethod
+  def __makeTzinfo(zone=None, offset=None):
+    if zone is not None:
+      return pytz.timezone(zone)
+
+    return timezone(timedelta(seconds=offset))
+
+  def code(self, t):
+    tzinfo = t.tzinfo
+    try:
+      return self.__codes[id(tzinfo)]
+
+    except KeyError:
+      pass
+
+    zone = getattr(tzinfo, 'zone', None)
+    fixed = zone is not None or tzinfo.utcoffset(None) is not None
+    key = ('zone', zone) if zone is not None \
+          else ('offset', t.utcoffset().total_seconds())
+    try:
+      code = self.__codes[key]
+
+    except KeyError:
+      code = self.__codes[key] = len(self.descriptions)
+      self.descriptions.append({key[0]: key[1]})
+
+    if fixed:
+      self.__codes[id(tzinfo)] = code
+      self.__known.append(tzinfo) # keeps id(tzinfo) valid
+
+    return code
+
+  def __getitem__(self, code):
+    return self.__tzinfos[code]
+
+  def encode(self, t):
+    if t is None:
+      return None
+
+    if t.tzinfo is None:
+      return [(t - _EPOCH) // _MICROSECOND, -1]
+
+    return [(t - _EPOCH_UTC) // _MICROSECOND, self.code(t)]
+
+  def decode(self, encoded):
+    if encoded is None:
+      return None
+
+    microseconds, code = encoded
+    return self.localize([_EPOCH + timedelta(microseconds=microseconds)],
+                         [code])[0]
+
+  def localize(self, naive, codes):
+    """
+    :param naive: naive UTC times (or naive local times for negative codes)
+    :param codes: timezone codes of the times
+    """
+    tzinfos = self.__tzinfos
+    return [t if c < 0 else tzinfos[c].fromutc(t.replace(tzinfo=tzinfos[c]))
+            for t, c in zip(naive, codes)]
+
+
+def _jsonValue(value):
+  if value is None or isinstance(value, (bool, int, float)) or isString(value):
+    return value
+
+  return str(value)
+
+
+class ColumnarWriter(object):
+  """
+  A writer of the columnar binary format.
+  """
+  def __init__(self, path, force=False):
+    """
+    :param path: a path to a directory or (if ends with ``'.zip'``) a zip
+                 archive to be created
+    :type path: basestring
+
+    :param force: whether to overwrite existing files
+    :type force: bool
+    """
+    if os.path.exists(path) and not force:
+      raise ValueError("File %s already exists." % path)
+
+    self.__path = path
+    self.__zip = None
+    if path.lower().endswith('.zip'):
+      self.__zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED,
+                                   allowZip64=True)
+
+    elif not os.path.isdir(path):
+      os.makedirs(path)
+
+    self.__timezones = _Timezones()
+    self.__tables = {}
+    self.__sources = set()
+
+  def write(self, data):
+    """
+    Write the data and close the writer.
+
+    :param data: the data to be saved
+    :type data: :py:class:`pymice.Data.Data`
+    """
+    try:
+      visits = data.getVisits(order='Start')
+      self.__writeTable('visits', VISIT_COLUMNS, visits)
+      self.__writeTable('nosepokes', NOSEPOKE_COLUMNS,
+                        [n for v in visits if v.Nosepokes for n in v.Nosepokes])
+      if data._getLog:
+        self.__writeTable('log', LOG_COLUMNS, data.getLog(order='DateTime'))
+
+      if data._getEnv:
+        self.__writeTable('environment', ENVIRONMENT_COLUMNS,
+                          data.getEnvironment(order='DateTime'))
+
+      if data._getHw:
+        self.__writeTable('hardware', HARDWARE_COLUMNS,
+                          data.getHardwareEvents(order='DateTime'))
+
+      self.__writeManifest(data, visits)
+
+    finally:
+      self.close()
+
+  def close(self):
+    if self.__zip is not None:
+      self.__zip.close()
+      self.__zip = None
+
+  def __writeManifest(self, data, visits):
+    animals = [data.getAnimal(name) for name in sorted(data.getAnimal())]
+    groups = [data.getGroup(name) for name in sorted(data.getGroup())]
+    manifest = {
+      'format': FORMAT,
+      'version': VERSION,
+      'flags': {'getNp': data._getNp,
+                'getLog': data._getLog,
+                'getEnv': data._getEnv,
+                'getHw': data._getHw},
+      'icSessionStart': self.__timezones.encode(data.icSessionStart),
+      'icSessionEnd': self.__timezones.encode(data.icSessionEnd),
+      'animals': [{'Name': animal.Name,
+                   'Tag': sorted(animal.Tag),
+                   'Sex': animal.Sex,
+                   'Notes': sorted(animal.Notes)} for animal in animals],
+      'groups': [dict([(key, _jsonValue(group[key])) for key in group.keys()
+                       if key not in ('Name', 'Animals')],
+                      Name=group.Name,
+                      Animals=[str(a) for a in group.Animals])
+                 for group in groups],
+      'sources': sorted(self.__sources),
+      'cages': sorted(set(int(v.Cage) for v in visits)),
+      'timezones': self.__timezones.descriptions,
+      'tables': self.__tables,
+    }
+    self.__writeFile(MANIFEST,
+                     json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+  def __writeTable(self, table, columns, objects):
+    descriptions = []
+    for name, kind in columns:
+      values = [getattr(o, name) for o in objects]
+      if name == '_source':
+        self.__sources.update(str(v) for v in values if v is not None)
+
+      description = {'name': name, 'kind': kind}
+      arrays = getattr(self, '_ColumnarWriter__encode_' + kind)(values, description)
+      for suffix, array in arrays:
+        self.__writeArray('%s/%s%s.npy' % (table, name, suffix), array)
+
+      descriptions.append(description)
+
+    self.__tables[table] = {'length': len(objects), 'columns': descriptions}
+
+  def __writeArray(self, name, array):
+    if self.__zip is not None:
+      with self.__zip.open(name, 'w', force_zip64=True) as fh:
+        np.save(fh, array, allow_pickle=False)
+
+      return
+
+    filename = os.path.join(self.__path, *name.split('/'))
+    directory = os.path.dirname(filename)
+    if not os.path.isdir(directory):
+      os.makedirs(directory)
+
+    np.save(filename, array, allow_pickle=False)
+
+  def __writeFile(self, name, content):
+    if self.__zip is not None:
+      self.__zip.writestr(name, content)
+      return
+
+    with open(os.path.join(self.__path, name), 'wb') as fh:
+      fh.write(content)
+
+  @staticmethod
+  def __nullMask(values, description):
+    null = np.fromiter((v is None for v in values), dtype=bool,
+                       count=len(values))
+    description['nullable'] = bool(null.any())
+    return [('.null', null)] if description['nullable'] else []
+
+  @classmethod
+  def __encodeNumbers(cls, values, description, dtype, convert):
+    arrays = cls.__nullMask(values, description)
+    array = np.fromiter((0 if v is None else convert(v) for v in values),
+                        dtype=dtype, count=len(values))
+    return [('', array)] + arrays
+
+  @classmethod
+  def __encode_int(cls, values, description):
+    return cls.__encodeNumbers(values, description, np.int64, int)
+
+  @classmethod
+  def __encode_float(cls, values, description):
+    return cls.__encodeNumbers(values, description, np.float64, float)
+
+  @classmethod
+  def __encode_timedelta(cls, values, description):
+    return cls.__encodeNumbers(values, description, np.int64,
+                               lambda v: v // _MICROSECOND)
+
+  def __encode_time(self, values, description):
+    arrays = self.__nullMask(values, description)
+    code = self.__timezones.code
+    codes = np.fromiter((-1 if v is None or v.tzinfo is None else code(v)
+                         for v in values),
+                        dtype=np.int16, count=len(values))
+    # POSIX timestamps of float64 precision are exact to a microsecond
+    seconds = np.fromiter((0. if v is None else
+                           v.timestamp() if v.tzinfo is not None else
+                           (v - _EPOCH).total_seconds() for v in values),
+                          dtype=np.float64, count=len(values))
+    microseconds = np.round(seconds * 1e6).astype(np.int64)
+    return [('', microseconds), ('.tz', codes)] + arrays
+
+  @staticmethod
+  def __encode_category(values, description):
+    categories = {}
+    codes = np.fromiter((-1 if v is None else
+                         categories.setdefault(v, len(categories))
+                         for v in values),
+                        dtype=np.int32, count=len(values))
+    description['categories'] = [_jsonValue(v) for v in
+                                 sorted(categories, key=categories.get)]
+    return [('', codes)]
+
+
+class ColumnarReader(object):
+  """
+  A reader of the columnar binary format.
+  """
+  def __init__(self, path, mmap=True):
+    """
+    :param path: a path to a directory or a zip archive
+    :type path: basestring
+
+    :param mmap: whether to memory-map arrays (directories only)
+    :type mmap: bool
+    """
+    self.__path = path
+    self.__zip = None if os.path.isdir(path) else zipfile.ZipFile(path)
+    self.manifestFilename = path if self.__zip is not None \
+                            else os.path.join(path, MANIFEST)
+    self.__mmap = 'r' if mmap and self.__zip is None else None
+    with self.__open(MANIFEST) as fh:
+      self.manifest = json.loads(fh.read().decode('utf-8'))
+
+    if self.manifest.get('format') != FORMAT:
+      raise ValueError('%s is not in %s format' % (path, FORMAT))
+
+    if self.manifest.get('version', 0) > VERSION:
+      raise ValueError('Unsupported %s version: %s' % (FORMAT,
+                                                       self.manifest['version']))
+
+    self.timezones = _Timezones(self.manifest['timezones'])
+
+  def close(self):
+    if self.__zip is not None:
+      self.__zip.close()
+      self.__zip = None
+
+  def __open(self, name):
+    if self.__zip is not None:
+      return self.__zip.open(name)
+
+    return open(os.path.join(self.__path, *name.split('/')), 'rb')
+
+  def hasTable(self, table):
+    return table in self.manifest['tables']
+
+  def getLength(self, table):
+    return self.manifest['tables'][table]['length']
+
+  def getArray(self, table, name, suffix=''):
+    """
+    :return: raw (possibly memory-mapped) array of the column
+    :rtype: numpy.ndarray
+    """
+    filename = '%s/%s%s.npy' % (table, name, suffix)
+    if self.__zip is not None:
+      with self.__open(filename) as fh:
+        return np.load(fh, allow_pickle=False)
+
+    return np.load(os.path.join(self.__path, *filename.split('/')),
+                   mmap_mode=self.__mmap, allow_pickle=False)
+
+  def getColumn(self, table, name):
+    """
+    :return: decoded values of the column
+    :rtype: list
+    """
+    description = self.__getDescription(table, name)
+    kind = description['kind']
+    array = self.getArray(table, name)
+    if kind == 'category':
+      categories = description['categories'] + [None]
+      return [categories[c] for c in array.tolist()]
+
+    if kind == 'time':
+      naive = array.astype('datetime64[us]').tolist()
+      values = self.timezones.localize(naive,
+                                       self.getArray(table, name, '.tz').tolist())
+
+    elif kind == 'timedelta':
+      values = array.astype('timedelta64[us]').tolist()
+
+    else:
+      values = array.tolist()
+
+    if description.get('nullable'):
+      for i in np.flatnonzero(self.getArray(table, name, '.null')).tolist():
+        values[i] = None
+
+    return values
+
+  def __getDescription(self, table, name):
+    for description in self.manifest['tables'][table]['columns']:
+      if description['name'] == name:
+        return description
+
+    raise KeyError(name)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+
+"""
+Run-length encoded states of the cage hardware (doors, air valves, LEDs).
+
+Hardware events are point events - every one of them marks a change of
+state of a device.  The events are sorted by device and time once, repeated
+states are dropped, and the remaining changes make state intervals of every
+device.  All queries are vectorized (see :py:func:`pymice._Analysis.asofIndices`),
+so e.g. states of doors at starts of millions of nosepokes are found with
+no Python-level loop over the nosepokes.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from .ICNodes import AirHardwareEvent, DoorHardwareEvent, LedHardwareEvent
+from ._Analysis import encodeKeys, asofIndices, _asColumn
+from ._Ens import Ens
+from ._Tools import toTimestampUTC, toTimestampsUTC, isString
+
+# dependence tracking
+from . import _dependencies, ICNodes, _Analysis, _Ens, _Tools
+import types
+__dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
+                                                      if isinstance(x, types.ModuleType)])
+
+
+_TYPES = {str(cls.Type): int(cls.Type)
+          for cls in (AirHardwareEvent, DoorHardwareEvent, LedHardwareEvent)}
+
+
+def _isScalar(value):
+  return isinstance(value, datetime) or np.ndim(value) == 0
+
+
+class HardwareTimeline(object):
+  """
+  States of hardware devices - identified by ``(Cage, Corner, Side, Type)``
+  keys - as intervals of constant state.
+
+  The last interval of every device is open-ended.  Times are given either
+  as :py:class:`datetime.datetime` objects or as UTC timestamps (seconds
+  since the epoch); the latter are returned.  Device keys might be given
+  either as scalars or as arrays aligned with the times; ``type`` might be
+  also given by name (``'Air'``, ``'Door'`` or ``'LED'``).
+
+  States of doors at starts of nosepokes and time the doors were open during
+  the nosepokes might be found with:
+
+  >>> timeline = data.getHardwareTimeline()
+  >>> nosepokes = [n for v in data.getVisits() for n in v.Nosepokes]
+  >>> cages = [n.Visit.Cage for n in nosepokes]
+  >>> corners = [n.Visit.Corner for n in nosepokes]
+  >>> sides = [n.Side for n in nosepokes]
+  >>> starts = [n.Start for n in nosepokes]
+  >>> ends = [n.End for n in nosepokes]
+  >>> doors = timeline.getStateAt(starts, cages, corners, sides, 'Door')
+  >>> opened = timeline.getDuration(1, starts, ends, cages, corners, sides,
+  ...                               'Door')
+  """
+  KEY = ('Cage', 'Corner', 'Side', 'Type')
+
+  def __init__(self, events, times=None):
+    """
+    :param events: hardware events
+    :type events: [:py:class:`HardwareEvent`, ...] or numpy.ndarray
+
+    :param times: UTC timestamps of the events (computed if not given)
+    :type times: numpy.ndarray or None
+    """
+    n = len(events)
+    if times is None:
+      times = [toTimestampUTC(e.DateTime) for e in events]
+
+    times = np.asarray(times, dtype=float).reshape(-1)
+    states = np.array([e.State for e in events], dtype=int)
+    keys, codes = encodeKeys(*[[getattr(e, attribute) for e in events]
+                               for attribute in self.KEY])
+    if len(self.KEY) == 1:
+      keys = [(key,) for key in keys]
+
+    order = np.lexsort((times, codes))
+    codes, times, states = codes[order], times[order], states[order]
+    changes = np.ones(n, dtype=bool)
+    changes[1:] = (codes[1:] != codes[:-1]) | (states[1:] != states[:-1])
+
+    self.__keys = keys
+    self.__codes = codes[changes]
+    self.__starts = times[changes]
+    self.__states = states[changes]
+    self.__isLast = np.ones(len(self.__codes), dtype=bool)
+    self.__isLast[:-1] = self.__codes[1:] != self.__codes[:-1]
+    self.__ends = np.full(len(self.__codes), np.inf)
+    self.__ends[:-1] = np.where(self.__isLast[:-1], np.inf, self.__starts[1:])
+    self.__bounds = np.searchsorted(self.__codes, np.arange(len(keys) + 1))
+    self.__keyColumns = [_asColumn([key[i] for key in keys])[self.__codes]
+                         for i in range(len(self.KEY))]
+
+  def __len__(self):
+    """
+    :return: number of state intervals
+    """
+    return len(self.__codes)
+
+  def getKeys(self):
+    """
+    :return: keys of devices
+    :rtype: [(Cage, Corner, Side, Type), ...]
+    """
+    return list(self.__keys)
+
+  def getIntervals(self, cage, corner, side, type):
+    """
+    :return: starts, ends (UTC timestamps) and states of consecutive
+             intervals of constant state of the device
+    :rtype: :py:class:`Ens` {'Start': numpy.ndarray, 'End': numpy.ndarray,
+                             'State': numpy.ndarray}
+
+    :raises KeyError: if there is no such device
+    """
+    key = self.__normalizeKey((cage, corner, side, type))
+    try:
+      code = self.__keys.index(key)
+
+    except ValueError:
+      raise KeyError(key)
+
+    lo, hi = self.__bounds[code], self.__bounds[code + 1]
+    return Ens(Start=self.__starts[lo:hi],
+               End=self.__ends[lo:hi],
+               State=self.__states[lo:hi])
+
+  def getStateAt(self, times, cage, corner, side, type, default=-1):
+    """
+    :param times: time(s) of interest
+    :type times: datetime.datetime or float or sequence or numpy.ndarray
+
+    :param default: state reported before the first event of a device
+                    (or for an unknown device)
+    :type default: int
+
+    :return: state(s) of the device(s) at the time(s)
+    :rtype: int or numpy.ndarray
+    """
+    timestamps = toTimestampsUTC(times)
+    indices = self.__findIntervals(timestamps, (cage, corner, side, type))
+    found = indices >= 0
+    states = np.full(len(indices), default, dtype=int)
+    states[found] = self.__states[indices[found]]
+    return int(states[0]) if _isScalar(times) else states
+
+  def getDuration(self, state, start, end, cage, corner, side, type):
+    """
+    :param state: state of interest
+    :type state: int
+
+    :param start: start(s) of window(s) of interest
+    :type start: datetime.datetime or float or sequence or numpy.ndarray
+
+    :param end: end(s) of window(s) of interest (not earlier than starts)
+    :type end: datetime.datetime or float or sequence or numpy.ndarray
+
+    :return: total time (in seconds) the device(s) spent in the state
+             within the window(s)
+    :rtype: float or numpy.ndarray
+    """
+    starts = toTimestampsUTC(start)
+    ends = toTimestampsUTC(end)
+    n = max(len(starts), len(ends))
+    starts = np.broadcast_to(starts, n)
+    ends = np.broadcast_to(ends, n)
+
+    inState = self.__states == state
+    lengths = np.where(inState & ~self.__isLast, self.__ends - self.__starts, 0.)
+    cumulative = np.cumsum(lengths) - lengths
+    cumulative -= cumulative[self.__bounds[self.__codes]]
+
+    key = (cage, corner, side, type)
+    durations = self.__timeInState(ends, key, inState, cumulative) \
+                - self.__timeInState(starts, key, inState, cumulative)
+    return float(durations[0]) if _isScalar(start) and _isScalar(end) else durations
+
+  def __timeInState(self, times, key, inState, cumulative):
+    indices = self.__findIntervals(times, key)
+    found = indices >= 0
+    indices = indices[found]
+    result = np.zeros(len(times))
+    result[found] = cumulative[indices] + np.where(
+      inState[indices],
+      np.minimum(times[found], self.__ends[indices]) - self.__starts[indices],
+      0.)
+    return result
+
+  def __findIntervals(self, times, key):
+    n = len(times)
+    columns = []
+    for value in self.__normalizeKey(key):
+      if _isScalar(value) or value is None:
+        column = np.empty(n, dtype=object) if value is None else np.full(n, value)
+
+      else:
+        column = _asColumn(value)
+
+      columns.append(column)
+
+    return asofIndices(times, self.__starts, columns, self.__keyColumns)
+
+  @staticmethod
+  def __normalizeKey(key):
+    cage, corner, side, type = key
+    if isString(type):
+      type = _TYPES[type]
+
+    elif not _isScalar(type) and _asColumn(type).dtype.kind in 'OUS':
+      type = [_TYPES[t] if isString(t) else t for t in type]
+
+    return cage, corner, side, type
@@ -27,12 +27,14 @@
 # rewritten: 0.6% (412 MB max); 73s
 
 import sys
+import hashlib
 if sys.version_info >= (3, 0):
   unicode = str
 
 import os
 import csv
 import warnings
+import threading
 import logging
 
 try:
@@ -63,11 +65,13 @@ from .ICNodes import (Animal, Visit, Nosepoke, LogEntry,
                       UnknownHardwareEvent, Session)
 
 from ._Tools import (timeToList, ArchiveZipFile, DirectoryZipFile, warn, groupBy,
-                     isString, mapAsList, MissingIdentityDict, AdditiveDict)
+                     isString, mapAsList, MissingIdentityDict, AdditiveDict,
+                     GarbageCollectorSuspension)
 from ._Analysis import Aggregator
+from ._Columnar import ColumnarReader
 
 # dependence tracking
-from . import _dependencies, Data as _Data, ICNodes, _Tools, _Analysis
+from . import _dependencies, Data as _Data, ICNodes, _Tools, _Analysis, _Columnar
 import dateutil
 import types
 __dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
@@ -98,7 +102,8 @@ except Exception as e:
 logger = logging.getLogger(__name__)
 
 
-convertFloat = methodcaller('replace', ',', '.')
+def convertFloat(x):
+  return x.replace(',', '.') if x is not None else None
 
 
 _LOG_ENV_HW = ["Log", "Env", "Hw"]
@@ -166,7 +171,7 @@ class Loader(Data):
   __optionalTables = ["Np"] + _LOG_ENV_HW
 
   def __init__(self, fname, getNp=True, getLog=False, getEnv=False, getHw=False,
-               verbose=False, **kwargs):
+               verbose=False, suspendGc=True, freezeGc=False, **kwargs):
     """
     :param fname: a path to the data file.
     :type fname: basestring
@@ -185,6 +190,16 @@ class Loader(Data):
 
     :param verbose: whether to output verbose messages
     :type verbose: bool
+
+    :param suspendGc: whether to suspend the cyclic garbage collector while
+                      loading the data
+    :type suspendGc: bool
+
+    :param freezeGc: whether to move all objects tracked by the garbage
+                     collector - not only the loaded ones - to its permanent
+                     generation (Python 3.7+); as it affects the whole
+                     process, it is off by default
+    :type freezeGc: bool
     """
     for key, value in kwargs.items():
       warn.warn("Unknown argument %s given for Loader constructor." % key, stacklevel=2)
@@ -195,9 +210,11 @@ class Loader(Data):
 
     self._fnames = (fname,)
 
-    self._loadData(fname)
+    with GarbageCollectorSuspension(suspend=suspendGc, freeze=freezeGc):
+      self._loadData(fname)
+
+      self._setIcSessionAttributes()
 
-    self._setIcSessionAttributes()
     self.freeze()
 
 
@@ -301,7 +318,10 @@ class Loader(Data):
     return getattr(self, "_get" + name)
 
   def __makeDatetimeFieldsTimezoneAware(self, tables, loader, zf):
-    tzinfo = self.__get_timezone(loader, zf)
+    self._localizeDatetimeFields(tables, loader,
+                                 self._getTimezone(loader, zf))
+
+  def _localizeDatetimeFields(self, tables, loader, tzinfo):
     for t in self.__extractDatetimeFields(tables, loader):
       if t is not None:
         t.append(tzinfo)
@@ -314,7 +334,7 @@ class Loader(Data):
 
     return chain(*datetimes)
 
-  def __get_timezone(self, loader, zf):
+  def _getTimezone(self, loader, zf):
     sessions = loader.extractSessions(zf)
     if sessions is None:
       return pytz.utc  # UTC assumed
@@ -377,31 +397,32 @@ class Loader(Data):
       return None
 
     labels = data.pop(0)
+    return self._makeColumns(labels, data, source, convert)
 
-    n = len(data)
-    if n == 0:
+  def _makeColumns(self, labels, rows, source=None, convert=None, firstLine=1):
+    if len(rows) == 0:
       return {l: [] for l in labels}
 
-    emptyStringToNone(data)
-    return self.__DictOfColumns(labels, data, source, convert)
+    emptyStringToNone(rows)
+    return self.__DictOfColumns(labels, rows, source, convert, firstLine)
 
   class __DictOfColumns(dict):
-    def __init__(self, labels, rows, source, conversions):
+    def __init__(self, labels, rows, source, conversions, firstLine=1):
       dict.__init__(self, zip(labels, zip(*rows)))
       self.__rowCount = len(rows)
 
       if source is not None:
-        self.__appendDebugInformation(source)
+        self.__appendDebugInformation(source, firstLine)
 
       if conversions is not None:
         self.__convertCollumns(conversions)
 
-    def __appendDebugInformation(self, source):
+    def __appendDebugInformation(self, source, firstLine):
       assert '_source' not in self
       self['_source'] = [source] * self.__rowCount
 
       assert '_line' not in self
-      self['_line'] = range(1, self.__rowCount + 1)
+      self['_line'] = range(firstLine, firstLine + self.__rowCount)
 
     def __convertCollumns(self, conversions):
       for label, f in conversions.items():
@@ -409,8 +430,8 @@ class Loader(Data):
           self[label] = mapAsList(f, self[label])
 
 
-  def _setIcSessionAttributes(self):
-    for log in self.getLog():
+  def _setIcSessionAttributes(self, log=None):
+    for log in (self.getLog() if log is None else log):
       if log.Category != 'Info' or log.Type != 'Application':
         continue
 
@@ -423,6 +444,22 @@ class Loader(Data):
       else:
         print('unknown Info/Application message: {0.Notes}'.format(log))
 
+  def _fingerprint(self):
+    digest = hashlib.sha1(repr((self._getNp, self._getLog,
+                                self._getEnv, self._getHw)).encode('utf-8'))
+    for fname in self._fnames:
+      try:
+        stat = os.stat(fname)
+
+      except (OSError, TypeError):
+        return None
+
+      digest.update(repr((os.path.abspath(fname),
+                          stat.st_size,
+                          stat.st_mtime)).encode('utf-8'))
+
+    return digest.hexdigest()
+
   def __repr__ (self):
     """
     Nice string representation for prtinting this class.
@@ -510,6 +547,16 @@ class Merger(Data):
     :keyword ignoreMiceDifferences: whether to ignore encountered differences
                                     in animal description (e.g. sex)
     :type ignoreMiceDifferences: bool
+
+    :keyword suspendGc: whether to suspend the cyclic garbage collector while
+                        merging the data (defaults to True)
+    :type suspendGc: bool
+
+    :keyword freezeGc: whether to move all objects tracked by the garbage
+                       collector - not only the merged ones - to its
+                       permanent generation (Python 3.7+); as it affects
+                       the whole process, defaults to False
+    :type freezeGc: bool
     """
     getNp = kwargs.pop('getNp', True)
     getLog = kwargs.pop('getLog', False)
@@ -517,6 +564,8 @@ class Merger(Data):
     getHw = kwargs.pop('getHw', False)
 
     self._ignoreMiceDifferences = kwargs.pop('ignoreMiceDifferences', False)
+    suspendGc = kwargs.pop('suspendGc', True)
+    freezeGc = kwargs.pop('freezeGc', False)
 
     for key, value in kwargs.items():
       warn.warn("Unknown argument %s given for Merger constructor" % key,
@@ -526,16 +575,19 @@ class Merger(Data):
     self._setCageManager(ICCageManager())
 
     self._dataSources = map(str, dataSources)
+    self.__sourceFingerprints = [getattr(dataSource, '_fingerprint', lambda: None)()
+                                 for dataSource in dataSources]
 
     self.__topTime = datetime(MINYEAR, 1, 1, tzinfo=pytz.timezone('Etc/GMT-14'))
 
-    for dataSource in self._sortDataSources(dataSources):
-      try:
-        self._appendDataSource(dataSource)
+    with GarbageCollectorSuspension(suspend=suspendGc, freeze=freezeGc):
+      for dataSource in self._sortDataSources(dataSources):
+        try:
+          self._appendDataSource(dataSource)
 
-      except:
-        print("ERROR processing {}".format(dataSource))
-        raise
+        except:
+          print("ERROR processing {}".format(dataSource))
+          raise
 
     self.freeze()
 
@@ -569,6 +621,18 @@ class Merger(Data):
     return sorted(sourcesByStartPresence.get(True, []), key=methodcaller('getStart')) \
            + sourcesByStartPresence.get(False, [])
 
+  def _fingerprint(self):
+    if None in self.__sourceFingerprints:
+      return None
+
+    digest = hashlib.sha1(repr((self._getNp, self._getLog,
+                                self._getEnv, self._getHw,
+                                self._ignoreMiceDifferences)).encode('utf-8'))
+    for fingerprint in sorted(self.__sourceFingerprints):
+      digest.update(fingerprint.encode('utf-8'))
+
+    return digest.hexdigest()
+
   def __repr__(self):
     mystring = 'IntelliCage data loaded from: %s' %\
                 str(self._dataSources)
@@ -663,6 +727,469 @@ class Merger(Data):
     self._buildCache()
 
 
+class ColumnarLoader(Data):
+  """
+  A loader of data saved with :py:meth:`Data.saveColumnar`.
+  """
+  def __init__(self, path, getNp=True, getLog=False, getEnv=False, getHw=False,
+               mmap=True, suspendGc=True, freezeGc=False, **kwargs):
+    """
+    :param path: a path to the saved data (a directory or a zip archive)
+    :type path: basestring
+
+    :param getNp: whether to load nosepoke data.
+    :type getNp: bool
+
+    :param getLog: whether to load log.
+    :type getLog: bool
+
+    :param getEnv: whether to load environmental data.
+    :type getEnv: bool
+
+    :param getHw: whether to load hardware data.
+    :type getHw: bool
+
+    :param mmap: whether to memory-map arrays of a directory while decoding
+                 them (the decoded objects are kept in memory regardless)
+    :type mmap: bool
+
+    :param suspendGc: whether to suspend the cyclic garbage collector while
+                      loading the data
+    :type suspendGc: bool
+
+    :param freezeGc: whether to move all objects tracked by the garbage
+                     collector - not only the loaded ones - to its permanent
+                     generation (Python 3.7+); as it affects the whole
+                     process, it is off by default
+    :type freezeGc: bool
+    """
+    for key, value in kwargs.items():
+      warn.warn("Unknown argument %s given for ColumnarLoader constructor." % key, stacklevel=2)
+
+    Data.__init__(self, getNp=getNp, getLog=getLog, getEnv=getEnv, getHw=getHw)
+    self._setCageManager(ICCageManager())
+    self._fnames = (path,)
+
+    reader = ColumnarReader(path, mmap=mmap)
+    try:
+      with GarbageCollectorSuspension(suspend=suspendGc, freeze=freezeGc):
+        self.__load(reader)
+        self._buildCache()
+
+    finally:
+      reader.close()
+
+    self.__manifestFilename = reader.manifestFilename
+    self.freeze()
+
+  def __load(self, reader):
+    manifest = reader.manifest
+    for animal in manifest['animals']:
+      self._registerAnimal(Animal(animal['Name'],
+                                  frozenset(animal['Tag']),
+                                  animal['Sex'],
+                                  frozenset(animal['Notes'])))
+
+    for group in manifest['groups']:
+      self._registerGroup(**group)
+
+    for cage in manifest['cages']:
+      self._cageManager[cage]
+
+    self.icSessionStart = reader.timezones.decode(manifest['icSessionStart'])
+    self.icSessionEnd = reader.timezones.decode(manifest['icSessionEnd'])
+
+    self._insertNewVisits(self.__makeVisits(reader))
+    for name, table, columns, factory in [
+        ('Log', 'log', _Columnar.LOG_COLUMNS, self.__makeLog),
+        ('Env', 'environment', _Columnar.ENVIRONMENT_COLUMNS, self.__makeEnv),
+        ('Hw', 'hardware', _Columnar.HARDWARE_COLUMNS, self.__makeHw)]:
+      if self._requested(name) and reader.hasTable(table):
+        names = [column for column, _ in columns]
+        getattr(self, '_insertNew' + name)(
+          mapAsList(factory, *self.__getColumns(reader, table, names)))
+
+  def _requested(self, name):
+    return getattr(self, "_get" + name)
+
+  @staticmethod
+  def __getColumns(reader, table, names):
+    return [reader.getColumn(table, name) for name in names]
+
+  def __makeVisits(self, reader):
+    names = [name for name, _ in _Columnar.VISIT_COLUMNS]
+    columns = dict(zip(names, self.__getColumns(reader, 'visits', names)))
+    nosepokes = self.__getNosepokeRows(reader, columns['NosepokeNumber'])
+    visits = []
+    for row in izip(*[columns[name] for name in names[:-1]] + [nosepokes]):
+      (Start, End, Cage, Corner, AnimalName, Module,
+       CornerCondition, PlaceError, AntennaNumber, AntennaDuration,
+       PresenceNumber, PresenceDuration, VisitSolution,
+       _source, _line, _id, nosepokeRows) = row
+      cage = self._cageManager[Cage]
+      corner = cage[Corner]
+      Nosepokes = None
+      if nosepokeRows is not None:
+        Nosepokes = tuple(self.__makeNosepoke(corner, *nosepokeRow)
+                          for nosepokeRow in nosepokeRows)
+
+      visits.append(Visit(Start, corner, self.getAnimal(AnimalName), End,
+                          Module, cage, CornerCondition, PlaceError,
+                          AntennaNumber, AntennaDuration,
+                          PresenceNumber, PresenceDuration,
+                          VisitSolution, _source, _line, _id,
+                          Nosepokes))
+
+    return visits
+
+  def __getNosepokeRows(self, reader, nosepokeNumbers):
+    if not self._getNp or not reader.getLength('nosepokes'):
+      return [None if n is None or not self._getNp else () for n in nosepokeNumbers]
+
+    names = [name for name, _ in _Columnar.NOSEPOKE_COLUMNS]
+    rows = list(izip(*self.__getColumns(reader, 'nosepokes', names)))
+    result = []
+    position = 0
+    for n in nosepokeNumbers:
+      if n is None:
+        result.append(None)
+
+      else:
+        result.append(rows[position:position + n])
+        position += n
+
+    return result
+
+  @staticmethod
+  def __makeNosepoke(corner, Start, End, Side,
+                     LickNumber, LickContactTime, LickDuration,
+                     SideCondition, SideError, TimeError, ConditionError,
+                     AirState, DoorState, LED1State, LED2State, LED3State,
+                     LickStartTime, _source, _line):
+    return Nosepoke(Start, End, corner[Side] if Side is not None else None,
+                    LickNumber, LickContactTime, LickDuration,
+                    SideCondition, SideError, TimeError, ConditionError,
+                    AirState, DoorState, LED1State, LED2State, LED3State,
+                    LickStartTime, _source, _line)
+
+  def __getCageCornerSide(self, Cage, Corner, Side):
+    if Cage is None:
+      return Cage, Corner, Side
+
+    cage = self._cageManager[Cage]
+    if Corner is None:
+      return cage, Corner, Side
+
+    corner = cage[Corner]
+    return cage, corner, corner[Side] if Side is not None else None
+
+  def __makeLog(self, DateTime, Category, Type, Cage, Corner, Side, Notes,
+                _source, _line):
+    cage, corner, side = self.__getCageCornerSide(Cage, Corner, Side)
+    return LogEntry(DateTime, Category, Type, cage, corner, side, Notes,
+                    _source, _line)
+
+  def __makeEnv(self, DateTime, Temperature, Illumination, Cage,
+                _source, _line):
+    return EnvironmentalConditions(DateTime, Temperature, Illumination,
+                                   self._cageManager[Cage] if Cage is not None else None,
+                                   _source, _line)
+
+  __hwClass = {0: AirHardwareEvent,
+               1: DoorHardwareEvent,
+               2: LedHardwareEvent}
+
+  def __makeHw(self, DateTime, Type, Cage, Corner, Side, State,
+               _source, _line):
+    cage, corner, side = self.__getCageCornerSide(Cage, Corner, Side)
+    try:
+      return self.__hwClass[Type](DateTime, cage, corner, side, State,
+                                  _source, _line)
+
+    except KeyError:
+      return UnknownHardwareEvent(DateTime, Type, cage, corner, side, State,
+                                  _source, _line)
+
+  def _fingerprint(self):
+    digest = hashlib.sha1(repr((self._getNp, self._getLog,
+                                self._getEnv, self._getHw)).encode('utf-8'))
+    try:
+      stat = os.stat(self.__manifestFilename)
+
+    except OSError:
+      return None
+
+    digest.update(repr((os.path.abspath(self.__manifestFilename),
+                        stat.st_size,
+                        stat.st_mtime)).encode('utf-8'))
+    return digest.hexdigest()
+
+  def __repr__(self):
+    return 'IntelliCage data loaded from: %s' % str(self._fnames)
+
+
+class LiveLoader(Loader):
+  """
+  A loader following a growing, uncompressed IntelliCage export directory.
+
+  Byte offsets of the table files are remembered, so every
+  :py:meth:`update` parses only rows appended since the previous one and
+  appends them to the data.  Nosepokes exported before their visit wait
+  for it (for at most ``orphanUpdates`` updates; then they are dropped
+  with a warning); nosepokes exported after their visit are appended to
+  it.  Registered callbacks are notified about new objects.
+
+  >>> live = LiveLoader('C:/IntelliCage/Session', getLog=True) # doctest: +SKIP
+  >>> live.addCallback(lambda data, new: print(len(new['visits']))) # doctest: +SKIP
+  >>> live.follow(interval=60) # doctest: +SKIP
+  """
+  _TABLES = ['Np', 'Visits'] + _LOG_ENV_HW
+
+  def __init__(self, path, getNp=True, getLog=False, getEnv=False, getHw=False,
+               orphanUpdates=10, **kwargs):
+    """
+    :param path: a path to the export directory
+    :type path: basestring
+
+    :param getNp: whether to load nosepoke data.
+    :type getNp: bool
+
+    :param getLog: whether to load log.
+    :type getLog: bool
+
+    :param getEnv: whether to load environmental data.
+    :type getEnv: bool
+
+    :param getHw: whether to load hardware data.
+    :type getHw: bool
+
+    :param orphanUpdates: number of updates nosepokes wait for their visit
+                          before being dropped
+    :type orphanUpdates: int
+    """
+    for key, value in kwargs.items():
+      warn.warn("Unknown argument %s given for LiveLoader constructor." % key, stacklevel=2)
+
+    Data.__init__(self, getNp=getNp, getLog=getLog, getEnv=getEnv, getHw=getHw)
+    self._setCageManager(ICCageManager())
+    self._fnames = (path,)
+    self.__path = path
+    self.__zf = DirectoryZipFile(path)
+    self.__callbacks = []
+    self.__tables = {}
+    self.__loaderClass = None
+    self.__loader = None
+    self.__animalsStat = None
+    self.__tzinfo = None
+    self.__pendingNosepokes = {}
+    self.__orphanUpdates = orphanUpdates
+    self.__updateCount = 0
+    self.__visitsByID = {}
+    self.__visitCount = 0
+    self.__stopped = threading.Event()
+    self._buildCache()
+    self.freeze()
+    self.update()
+
+  def addCallback(self, callback):
+    """
+    :param callback: a function called with the data and new objects by
+                     kind (see :py:meth:`update`) whenever new objects are
+                     appended
+    """
+    self.__callbacks.append(callback)
+
+  def removeCallback(self, callback):
+    self.__callbacks.remove(callback)
+
+  def update(self):
+    """
+    Parse rows appended to the table files since the last update, append
+    them to the data and notify the callbacks.
+
+    :return: new objects by kind ('visits', 'nosepokes' - of visits loaded
+             by previous updates, 'log', 'environment' and 'hardware')
+    :rtype: {str: [object, ...], ...}
+    """
+    new = {'visits': [], 'nosepokes': [], 'log': [], 'environment': [],
+           'hardware': []}
+    self.__updateCount += 1
+    loader = self.__getLoader()
+    if loader is None:
+      return new
+
+    tables = {}
+    for name in self._TABLES:
+      if name == 'Visits' or self._requested(name):
+        table = self.__readNewRows(name, loader)
+        if table is not None:
+          tables[name] = table
+
+    if not tables:
+      self.__dropOrphanedNosepokes()
+      return new
+
+    if self.__tzinfo is None:
+      self.__tzinfo = self._getTimezone(loader, self.__zf)
+
+    self._localizeDatetimeFields(tables, loader, self.__tzinfo)
+    lateNosepokes = self.__getLateNosepokeRows(tables, loader)
+    new['visits'] = self.__wrapVisits(tables, loader)
+    if new['visits']:
+      self._insertNewVisits(new['visits'])
+      self._updateCache(new['visits'])
+
+    self.__dropOrphanedNosepokes()
+    if lateNosepokes:
+      new['nosepokes'] = self.__appendLateNosepokes(lateNosepokes, loader)
+
+    for name, kind in [('Log', 'log'), ('Env', 'environment'), ('Hw', 'hardware')]:
+      if name in tables:
+        new[kind] = getattr(loader, 'wrap' + name)(tables[name])
+        getattr(self, '_insertNew' + name)(new[kind])
+
+    self._setIcSessionAttributes(new['log'])
+    if any(new.values()):
+      for callback in list(self.__callbacks):
+        callback(self, new)
+
+    return new
+
+  def follow(self, interval=60.):
+    """
+    Update the data every `interval` seconds until :py:meth:`stop` is
+    called (e.g. from a callback or another thread).
+
+    :param interval: time between updates (in seconds)
+    :type interval: float
+    """
+    try:
+      while not self.__stopped.is_set():
+        self.update()
+        self.__stopped.wait(interval)
+
+    finally:
+      self.__stopped.clear()
+
+  def stop(self):
+    """
+    Stop following the directory.
+    """
+    self.__stopped.set()
+
+  def __getLoader(self):
+    try:
+      stat = os.stat(os.path.join(self.__path, 'Animals.txt'))
+
+    except OSError:
+      return None
+
+    stat = (stat.st_size, stat.st_mtime)
+    if stat != self.__animalsStat:
+      if self.__loaderClass is None:
+        self.__loaderClass = self._getZipLoaderClass(self.__zf)
+
+      self._loadAnimals(self.__zf, self.__loaderClass)
+      self.__loader = self.__loaderClass(self.__path,
+                                         self._cageManager,
+                                         self._makeTagToAnimalDict())
+      self.__animalsStat = stat
+
+    return self.__loader
+
+  def __readNewRows(self, name, loader):
+    stem = loader.KEY_TO_STEM[name]
+    filename = self.__findTable(stem)
+    if filename is None:
+      return None
+
+    offset, labels, lineCount = self.__tables.get(name, (0, None, 0))
+    if os.path.getsize(filename) < offset:
+      warn.warn("File %s truncated; appended rows ignored." % filename)
+      return None
+
+    with open(filename, 'rb') as fh:
+      fh.seek(offset)
+      chunk = fh.read()
+
+    end = chunk.rfind(b'\n') + 1
+    if end == 0:
+      return None
+
+    rows = list(csv.reader(io.StringIO(chunk[:end].decode('utf-8')),
+                           delimiter='\t'))
+    if labels is None:
+      labels = rows.pop(0)
+      labels[0] = labels[0].lstrip(u'\ufeff')
+
+    self.__tables[name] = (offset + end, labels, lineCount + len(rows))
+    if not rows:
+      return None
+
+    return self._makeColumns(labels, rows, source=self.__path,
+                             convert=self._convertZip.get(stem),
+                             firstLine=lineCount + 1)
+
+  def __findTable(self, stem):
+    for filename in [os.path.join(self.__path, stem + '.txt'),
+                     os.path.join(self.__path, 'IntelliCage', stem + '.txt')]:
+      if os.path.isfile(filename):
+        return filename
+
+  def __getLateNosepokeRows(self, tables, loader):
+    late = {}
+    if 'Np' in tables:
+      for vid, row in loader.iterNosepokeRows(tables['Np']):
+        if vid in self.__visitsByID:
+          late.setdefault(vid, []).append(row)
+
+        else:
+          self.__pendingNosepokes.setdefault(vid, (self.__updateCount, []))[1].append(row)
+
+    return late
+
+  def __dropOrphanedNosepokes(self):
+    orphaned = [vid for vid, (update, _) in self.__pendingNosepokes.items()
+                if self.__updateCount - update >= self.__orphanUpdates]
+    if orphaned:
+      rows = sum(len(self.__pendingNosepokes.pop(vid)[1]) for vid in orphaned)
+      warn.warn("%d nosepokes of %d unknown visits dropped after %d updates." \
+                % (rows, len(orphaned), self.__orphanUpdates))
+
+  def __appendLateNosepokes(self, late, loader):
+    indices = []
+    nosepokes = []
+    for vid, rows in late.items():
+      index, visit = self.__visitsByID[vid]
+      indices.append(index)
+      nosepokes.append([loader._makeNosepoke(visit.Corner, row)
+                        for row in sorted(rows)])
+
+    self._appendNosepokes(indices, nosepokes)
+    return [n for vNosepokes in nosepokes for n in vNosepokes]
+
+  def __wrapVisits(self, tables, loader):
+    visits = tables.get('Visits')
+    if visits is None:
+      return []
+
+    vIDs = visits[loader.VISIT_ID_FIELD]
+    vNosepokes = [self.__pendingNosepokes.pop(vid, (None, []))[1] for vid in vIDs] \
+                 if self._getNp else None
+    wrapped = loader.wrapVisits(visits, vNosepokes=vNosepokes)
+    for index, (vid, visit) in enumerate(zip(vIDs, wrapped), self.__visitCount):
+      self.__visitsByID[vid] = (index, visit)
+
+    self.__visitCount += len(wrapped)
+    return wrapped
+
+  def _fingerprint(self):
+    return None
+
+  def __repr__(self):
+    return 'IntelliCage data followed from: %s' % str(self._fnames)
+
+
 class ICSide(int):
   #__slots__ = ('__Corner',)
   def __setattr__(self, key, value):
@@ -853,18 +1380,24 @@ class _ZipLoaderBase(object):
                     LickStartTime if LickStartTime is not None else None,
                     self._source, _line)
 
-  def wrapVisits(self, visitsCollumns, nosepokesCollumns=None):
+  def wrapVisits(self, visitsCollumns, nosepokesCollumns=None,
+                 vNosepokes=None):
+    """
+    :param vNosepokes: nosepoke rows (see :py:meth:`iterNosepokeRows`)
+                       of every visit; overrides nosepokesCollumns
+    """
     vIDs = visitsCollumns[self.VISIT_ID_FIELD]
-    if nosepokesCollumns is not None:
-      vNosepokes = self._assignNosepokesToVisits(nosepokesCollumns,
-                                                 vIDs)
+    if vNosepokes is None:
+      if nosepokesCollumns is not None:
+        vNosepokes = self._assignNosepokesToVisits(nosepokesCollumns,
+                                                   vIDs)
 
-    else:
-      vNosepokes = repeat(None)
+      else:
+        vNosepokes = repeat(None)
 
     vColValues = [visitsCollumns.get(x, repeat(None)) \
                   for x in self.VISIT_FIELDS]
-    vLines = count(1)
+    vLines = visitsCollumns.get('_line', count(1))
     vColValues.append(vLines)
     vColValues.append(map(int, vIDs))
     vColValues.append(vNosepokes)
@@ -874,17 +1407,23 @@ class _ZipLoaderBase(object):
     vNosepokes = [[] for _ in vIDs]
     vidToNosepokes = dict(izip(vIDs, vNosepokes))
 
+    for vId, row in self.iterNosepokeRows(nosepokesCollumns):
+      vidToNosepokes[vId].append(row)
+
+    return vNosepokes
+
+  def iterNosepokeRows(self, nosepokesCollumns):
+    """
+    :return: pairs of VisitID and a row of nosepoke fields (as expected by
+             :py:meth:`wrapVisits` for nosepoke rows of a visit)
+    """
     nColValues = [nosepokesCollumns.get(x, repeat(None)) \
                   for x in self.NOSEPOKE_FIELDS]
     nIDs = nosepokesCollumns['VisitID']
     nRows = len(nIDs)
-    nLines = range(1, 1 + nRows)
+    nLines = nosepokesCollumns.get('_line', range(1, 1 + nRows))
     nColValues.append(nLines)
-
-    for vId, row in izip(nIDs, izip(*nColValues)):
-      vidToNosepokes[vId].append(row)
-
-    return vNosepokes
+    return izip(nIDs, izip(*nColValues))
 
   @classmethod
   def _columnsToObjects(cls, columns, columnNames, objectFactory):
@@ -916,7 +1455,7 @@ class _ZipLoaderBase(object):
 
   @staticmethod
   def _getColumnValues(columnNames, columns):
-    return [columns.get(c) for c in columnNames] + [count(1)]
+    return [columns.get(c) for c in columnNames] + [columns.get('_line', count(1))]
 
   def _makeHw(self, DateTime, Type, Cage, Corner, Side, State, _line):
     cage, corner, side = self._getHwCageCornerSide(Cage, Corner, Side)
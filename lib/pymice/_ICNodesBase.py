@@ -42,6 +42,9 @@ __dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().value
                                                       if isinstance(x, types.ModuleType)])
 
 
+_SPECIAL_SLOTS = ('__weakref__',)
+
+
 def makePrivateSlots(attributes, name):
   prefix = '_%s__' % name
   return tuple(prefix + s for s in attributes)
@@ -49,11 +52,13 @@ def makePrivateSlots(attributes, name):
 
 class BaseNodeMetaclass(type):
   def __new__(mcl, name, bases, attrs):
-    attributes = attrs['__slots__']
+    attributes = [a for a in attrs['__slots__'] if a not in _SPECIAL_SLOTS]
     slots = makePrivateSlots(attributes, name)
-    attrs['__slots__'] = slots
-    attrs.update(zip(attributes,
-                     (property(attrgetter(s)) for s in slots)))
+    attrs['__slots__'] = slots + tuple(a for a in attrs['__slots__']
+                                       if a in _SPECIAL_SLOTS)
+    for attribute, slot in zip(attributes, slots):
+      if attribute not in attrs:
+        attrs[attribute] = property(attrgetter(slot))
 
     return type.__new__(mcl, name, bases, attrs)
 
@@ -64,6 +69,9 @@ def BaseNode_del_(self):
       continue
 
     for attr in cls.__slots__:
+      if attr in _SPECIAL_SLOTS:
+        continue
+
       try:
         delattr(self, attr)
 
@@ -71,6 +79,10 @@ def BaseNode_del_(self):
         pass
 
 
+NOSEPOKE_SUMMARY = ('NosepokeNumber', 'NosepokeDuration',
+                    'LickNumber', 'LickDuration', 'LickContactTime')
+
+
 class VisitMetaclass(BaseNodeMetaclass):
   __npSummaryProperties = [(('NosepokeDuration', 'Duration'), timedelta(0)),
                            ('LickNumber', 0),
@@ -89,12 +101,17 @@ class VisitMetaclass(BaseNodeMetaclass):
   @classmethod
   def __makeNosepokeSummaryPropertyPair(cls, arg, start):
     propName, attrName = (arg, arg) if isString(arg) else arg
-    return propName, cls.__makeNosepokeAggregativeProperty(attrName, start)
+    return propName, cls.__makeNosepokeAggregativeProperty(NOSEPOKE_SUMMARY.index(propName),
+                                                           attrName, start)
 
   @staticmethod
-  def __makeNosepokeAggregativeProperty(attr, start):
+  def __makeNosepokeAggregativeProperty(index, attr, start):
     npAttrGetter = attrgetter(attr)
     def propertyGetter(self):
+      summary = self._Visit___summary
+      if summary is not None:
+        return summary[index]
+
       nosepokes = self._Visit__Nosepokes
       if nosepokes is not None:
         return sum(imap(npAttrGetter, nosepokes), start)
@@ -0,0 +1,522 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+"""
+A streaming writer of IntelliCage Plus (v. 3.1) archives.
+
+Tables are formatted in chunks of rows and written straight into zip
+members, so the memory used does not depend on the size of the data.
+"""
+
+import sys
+if sys.version_info >= (3, 0):
+  unicode = str
+
+import os
+import io
+import csv
+import zipfile
+import tempfile
+import threading
+from itertools import islice
+from datetime import timedelta, timezone
+
+try:
+  import queue
+
+except ImportError:
+  import Queue as queue
+
+from ._Tools import warn
+
+# dependence tracking
+from . import _dependencies, _Tools
+import types
+__dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
+                                                      if isinstance(x, types.ModuleType)])
+
+
+VERSION = 'IntelliCage_Plus_3_1'
+
+ANIMALS_HEADER = ['AnimalName', 'AnimalTag', 'Sex', 'GroupName', 'AnimalNotes']
+
+VISITS_HEADER = ['VisitID', 'AnimalTag', 'Start', 'End', 'ModuleName',
+                 'Cage', 'Corner', 'CornerCondition', 'PlaceError',
+                 'AntennaNumber', 'AntennaDuration',
+                 'PresenceNumber', 'PresenceDuration', 'VisitSolution']
+
+NOSEPOKES_HEADER = ['VisitID', 'Start', 'End', 'Side', 'SideCondition',
+                    'SideError', 'TimeError', 'ConditionError',
+                    'LickNumber', 'LickContactTime', 'LickDuration',
+                    'AirState', 'DoorState',
+                    'LED1State', 'LED2State', 'LED3State', 'LickStartTime']
+
+LOG_HEADER = ['DateTime', 'LogCategory', 'LogType', 'Cage', 'Corner', 'Side',
+              'LogNotes']
+
+ENVIRONMENT_HEADER = ['DateTime', 'Temperature', 'Illumination', 'Cage']
+
+HARDWARE_HEADER = ['DateTime', 'HardwareType', 'Cage', 'Corner', 'Side',
+                   'State']
+
+_DATA_DESCRIPTOR = u'''<?xml version="1.0" encoding="utf-8"?>
+<DataDescriptor xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+  <ProductName>IntelliCage Plus</ProductName>
+  <CompanyName>NewBehavior</CompanyName>
+  <Version>{}</Version>
+</DataDescriptor>'''
+
+_SESSIONS = u'''<?xml version="1.0" encoding="utf-8"?>
+<ArrayOfSession xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+  <Session Id="0">
+    <TimeZoneOffset>{offset}</TimeZoneOffset>
+    <Interval>
+      <Start>{start}</Start>
+      <End>{end}</End>
+    </Interval>
+    <StartLocalTimeString>{startLocal}</StartLocalTimeString>
+    <EndLocalTimeString>{endLocal}</EndLocalTimeString>
+  </Session>
+</ArrayOfSession>'''
+
+_UNKNOWN_END = '0001-01-01T00:00:00'
+
+_MICROSECOND = timedelta(microseconds=1)
+
+_SPOOL_CHUNK = 1 << 20
+
+
+def _formatTime(t, tz):
+  if t is None:
+    return ''
+
+  if tz is not None and t.tzinfo is not None:
+    t = t.astimezone(tz)
+
+  return '%04d-%02d-%02d %02d:%02d:%02d.%06d' % (t.year, t.month, t.day,
+                                                 t.hour, t.minute, t.second,
+                                                 t.microsecond)
+
+def _formatInt(x):
+  return '' if x is None else '%d' % x
+
+def _formatFloat(x):
+  return '' if x is None else repr(float(x)).replace('.', ',')
+
+def _formatDuration(x):
+  if x is None:
+    return ''
+
+  seconds, microseconds = divmod(x // _MICROSECOND, 1000000)
+  return '%d,%06d' % (seconds, microseconds) if seconds >= 0 else \
+         _formatFloat(x.total_seconds())
+
+def _formatText(x):
+  return '' if x is None else unicode(x)
+
+def _formatOffset(offset):
+  sign = '-' if offset < timedelta(0) else ''
+  minutes, seconds = divmod(int(abs(offset).total_seconds()), 60)
+  hours, minutes = divmod(minutes, 60)
+  return '%s%02d:%02d:%02d' % (sign, hours, minutes, seconds)
+
+
+class _SerialSink(object):
+  """
+  Writes (and compresses) members of the archive in the calling thread.
+  """
+  def __init__(self, zf):
+    self.__zf = zf
+    self.__fh = None
+
+  def open(self, name):
+    self.__fh = self.__zf.open(name, 'w', force_zip64=True)
+
+  def write(self, chunk):
+    self.__fh.write(chunk)
+
+  def close(self):
+    self.__fh.close()
+    self.__fh = None
+
+  def finish(self):
+    pass
+
+
+class _ThreadedSink(object):
+  """
+  Writes (and compresses) members of the archive in a background thread,
+  so the next chunk of rows is formatted while the previous one is being
+  compressed.  Zip members have to be written one after another, thus
+  the parallelism is a pipeline of a formatting and a compressing thread.
+  """
+  def __init__(self, zf, queueSize=8):
+    self.__sink = _SerialSink(zf)
+    self.__queue = queue.Queue(queueSize)
+    self.__error = None
+    self.__thread = threading.Thread(target=self.__run)
+    self.__thread.daemon = True
+    self.__thread.start()
+
+  def __run(self):
+    while True:
+      method, args = self.__queue.get()
+      if method is None:
+        return
+
+      if self.__error is None:
+        try:
+          getattr(self.__sink, method)(*args)
+
+        except Exception as e:
+          self.__error = e
+
+  def __put(self, method, *args):
+    if self.__error is not None:
+      self.finish()
+
+    self.__queue.put((method, args))
+
+  def open(self, name):
+    self.__put('open', name)
+
+  def write(self, chunk):
+    self.__put('write', chunk)
+
+  def close(self):
+    self.__put('close')
+
+  def finish(self):
+    if self.__thread.is_alive():
+      self.__queue.put((None, None))
+      self.__thread.join()
+
+    if self.__error is not None:
+      error, self.__error = self.__error, None
+      raise error
+
+
+class _RowSpool(object):
+  """
+  Rows of a table buffered in a (temporary) file.
+  """
+  def __init__(self, fh):
+    self.__fh = fh
+    self.__buf = io.StringIO()
+    self.__writer = csv.writer(self.__buf, delimiter='\t')
+
+  def writerows(self, rows):
+    self.__writer.writerows(rows)
+    if self.__buf.tell() >= _SPOOL_CHUNK:
+      self.flush()
+
+  def flush(self):
+    self.__fh.write(self.__buf.getvalue().encode('utf-8'))
+    self.__buf.seek(0)
+    self.__buf.truncate()
+
+  def read(self):
+    self.flush()
+    self.__fh.seek(0)
+    return iter(lambda: self.__fh.read(_SPOOL_CHUNK), b'')
+
+
+class IntelliCageWriter(object):
+  """
+  A writer of IntelliCage Plus archives readable by
+  :py:class:`pymice.Loader`.
+
+  All times are written as local times of a single timezone (given in
+  ``Sessions.xml``); visits are renumbered in order of their start.
+  """
+  def __init__(self, path, force=False, tz=None, parallel=False,
+               chunkSize=4096, compression=zipfile.ZIP_DEFLATED):
+    """
+    :param path: a path to the zip archive to be created
+    :type path: basestring
+
+    :param force: whether to overwrite an existing file
+    :type force: bool
+
+    :param tz: timezone of the times written; if not given, the timezone
+               of the earliest visit is used
+    :type tz: datetime.tzinfo or None
+
+    :param parallel: whether to compress the archive members in
+                     a background thread
+    :type parallel: bool
+
+    :param chunkSize: number of rows formatted at once
+    :type chunkSize: int
+
+    :param compression: compression method of the archive members
+    """
+    if os.path.exists(path) and not force:
+      raise ValueError("File %s already exists." % path)
+
+    self.__path = path
+    self.__tz = tz
+    self.__parallel = parallel
+    self.__chunkSize = chunkSize
+    self.__compression = compression
+
+  def write(self, data):
+    """
+    Write the data.  Only requested kinds of data (see
+    :py:class:`pymice.Loader`) are written.
+
+    :param data: the data to be saved
+    :type data: :py:class:`pymice.Data.Data`
+    """
+    groups = dict((name, [unicode(a) for a in data.getGroup(name).Animals])
+                  for name in data.getGroup())
+    self.writeStreams([data.getAnimal(name) for name in data.getAnimal()],
+                      groups, data.getStart(), data.getEnd(),
+                      data.getVisits(order='Start'),
+                      nosepokes=data._getNp,
+                      log=(lambda: data.getLog(order='DateTime')) if data._getLog else None,
+                      environment=(lambda: data.getEnvironment(order='DateTime')) if data._getEnv else None,
+                      hardware=(lambda: data.getHardwareEvents(order='DateTime')) if data._getHw else None)
+
+  def writeStreams(self, animals, groups, start, end, visits, nosepokes=True,
+                   log=None, environment=None, hardware=None):
+    """
+    Write the data given as streams of objects.  Every stream is iterated
+    only once, so it might be a generator.
+
+    :param animals: animals
+    :type animals: [:py:class:`pymice.ICNodes.Animal`, ...]
+
+    :param groups: names of animals by group name
+    :type groups: {str: [str, ...], ...}
+
+    :param start: the session start
+    :type start: datetime.datetime or None
+
+    :param end: the session end
+    :type end: datetime.datetime or None
+
+    :param visits: visits ordered by Start
+    :type visits: iterable of :py:class:`pymice.ICNodes.Visit`
+
+    :param nosepokes: whether to write nosepokes of the visits
+    :type nosepokes: bool
+
+    :param log: a callable returning log entries ordered by DateTime
+                (if log is to be written)
+
+    :param environment: a callable returning environment samples ordered
+                        by DateTime (if environment is to be written)
+
+    :param hardware: a callable returning hardware events ordered by
+                     DateTime (if hardware events are to be written)
+    """
+    tz = self.__getTimezone(start)
+    animals = sorted(animals, key=lambda animal: unicode(animal))
+
+    with zipfile.ZipFile(self.__path, 'w', self.__compression,
+                         allowZip64=True) as zf:
+      sink = _ThreadedSink(zf) if self.__parallel else _SerialSink(zf)
+      try:
+        self.__writeText(sink, 'DataDescriptor.xml',
+                         _DATA_DESCRIPTOR.format(VERSION))
+        if start is not None:
+          self.__writeSessions(sink, start, end, tz)
+
+        tags = self.__getTags(animals)
+        self.__writeTable(sink, 'Animals.txt', ANIMALS_HEADER,
+                          self.__animalRows(animals, groups, tags))
+        self.__writeVisitsAndNosepokes(sink, visits, tags, tz, nosepokes)
+        for name, header, stream, makeRows in [
+            ('Log', LOG_HEADER, log, self.__logRows),
+            ('Environment', ENVIRONMENT_HEADER, environment,
+             self.__environmentRows),
+            ('HardwareEvents', HARDWARE_HEADER, hardware,
+             self.__hardwareRows)]:
+          if stream is not None:
+            self.__writeTable(sink, 'IntelliCage/%s.txt' % name, header,
+                              makeRows(stream(), tz))
+
+      finally:
+        sink.finish()
+
+  def __getTimezone(self, start):
+    if self.__tz is not None:
+      return self.__tz
+
+    if start is None or start.tzinfo is None:
+      return None
+
+    return timezone(start.utcoffset())
+
+  @staticmethod
+  def __writeText(sink, name, text):
+    sink.open(name)
+    sink.write(text.encode('utf-8'))
+    sink.close()
+
+  def __writeSessions(self, sink, start, end, tz):
+    start = start.astimezone(tz) if tz is not None else start
+    if end is not None:
+      end = end.astimezone(tz) if tz is not None else end
+
+    offset = tz.utcoffset(None) if tz is not None else timedelta(0)
+    self.__writeText(sink, 'Sessions.xml',
+                     _SESSIONS.format(offset=_formatOffset(offset),
+                                      start=start.isoformat(),
+                                      end=end.isoformat() if end is not None else _UNKNOWN_END,
+                                      startLocal=_formatTime(start, None)[:-3],
+                                      endLocal=_formatTime(end, None)[:-3]))
+
+  def __writeTable(self, sink, name, header, rows):
+    sink.open(name)
+    for chunk in self.__formatChunks(header, rows):
+      sink.write(chunk)
+
+    sink.close()
+
+  def __formatChunks(self, header, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter='\t')
+    if header is not None:
+      writer.writerow(header)
+
+    while True:
+      chunk = list(islice(rows, self.__chunkSize))
+      writer.writerows(chunk)
+      yield buf.getvalue().encode('utf-8')
+      buf.seek(0)
+      buf.truncate()
+      if len(chunk) < self.__chunkSize:
+        return
+
+  def __writeVisitsAndNosepokes(self, sink, visits, tags, tz, nosepokes):
+    """
+    Nosepokes are spooled to a temporary file while visits are written,
+    so the visits are iterated only once.
+    """
+    with tempfile.TemporaryFile() as fh:
+      spool = _RowSpool(fh) if nosepokes else None
+      self.__writeTable(sink, 'IntelliCage/Visits.txt', VISITS_HEADER,
+                        self.__visitRows(visits, tags, tz, spool))
+      if spool is not None:
+        sink.open('IntelliCage/Nosepokes.txt')
+        for chunk in self.__formatChunks(NOSEPOKES_HEADER, iter(())):
+          sink.write(chunk)
+
+        for chunk in spool.read():
+          sink.write(chunk)
+
+        sink.close()
+
+  @staticmethod
+  def __getTags(animals):
+    tags = {}
+    for animal in animals:
+      name = unicode(animal)
+      animalTags = sorted(animal.Tag)
+      if len(animalTags) > 1:
+        warn.warn("Animal %s has multiple tags; only tag %s saved." % (name, animalTags[0]))
+
+      tags[name] = animalTags[0] if animalTags else ''
+
+    return tags
+
+  @staticmethod
+  def __animalRows(animals, groups, tags):
+    animalGroups = {}
+    for group in sorted(groups):
+      for name in groups[group]:
+        animalGroups.setdefault(unicode(name), []).append(group)
+
+    for animal in animals:
+      name = unicode(animal)
+      names = animalGroups.get(name, [])
+      notes = sorted(animal.Notes)
+      for i in range(max(1, len(names), len(notes))):
+        yield [name, tags[name], _formatText(animal.Sex),
+               names[i] if i < len(names) else '',
+               notes[i] if i < len(notes) else '']
+
+  @staticmethod
+  def __visitRows(visits, tags, tz, spool=None):
+    for vid, visit in enumerate(visits, 1):
+      vid = '%d' % vid
+      yield [vid, tags[unicode(visit.Animal)],
+             _formatTime(visit.Start, tz), _formatTime(visit.End, tz),
+             _formatText(visit.Module),
+             _formatInt(visit.Cage), _formatInt(visit.Corner),
+             _formatInt(visit.CornerCondition), _formatInt(visit.PlaceError),
+             _formatInt(visit.AntennaNumber),
+             _formatDuration(visit.AntennaDuration),
+             _formatInt(visit.PresenceNumber),
+             _formatDuration(visit.PresenceDuration),
+             _formatInt(visit.VisitSolution)]
+      if spool is not None and visit.Nosepokes:
+        spool.writerows(IntelliCageWriter.__nosepokeRows(vid, visit.Nosepokes,
+                                                         tz))
+
+  @staticmethod
+  def __nosepokeRows(vid, nosepokes, tz):
+    for nosepoke in nosepokes:
+      yield [vid,
+             _formatTime(nosepoke.Start, tz), _formatTime(nosepoke.End, tz),
+             _formatInt(nosepoke.Side),
+             _formatInt(nosepoke.SideCondition),
+             _formatInt(nosepoke.SideError),
+             _formatInt(nosepoke.TimeError),
+             _formatInt(nosepoke.ConditionError),
+             _formatInt(nosepoke.LickNumber),
+             _formatDuration(nosepoke.LickContactTime),
+             _formatDuration(nosepoke.LickDuration),
+             _formatInt(nosepoke.AirState),
+             _formatInt(nosepoke.DoorState),
+             _formatInt(nosepoke.LED1State),
+             _formatInt(nosepoke.LED2State),
+             _formatInt(nosepoke.LED3State),
+             _formatTime(nosepoke.LickStartTime, tz)]
+
+  @staticmethod
+  def __logRows(log, tz):
+    for entry in log:
+      yield [_formatTime(entry.DateTime, tz),
+             _formatText(entry.Category), _formatText(entry.Type),
+             _formatInt(entry.Cage), _formatInt(entry.Corner),
+             _formatInt(entry.Side), _formatText(entry.Notes)]
+
+  @staticmethod
+  def __environmentRows(environment, tz):
+    for sample in environment:
+      yield [_formatTime(sample.DateTime, tz),
+             _formatFloat(sample.Temperature),
+             _formatInt(sample.Illumination),
+             _formatInt(sample.Cage)]
+
+  @staticmethod
+  def __hardwareRows(hardware, tz):
+    for event in hardware:
+      yield [_formatTime(event.DateTime, tz), _formatInt(event.Type),
+             _formatInt(event.Cage), _formatInt(event.Corner),
+             _formatInt(event.Side), _formatInt(event.State)]
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+
+"""
+Merging of many IntelliCage archives into a single one.
+
+Archives are parsed (possibly by a pool of worker processes) into
+temporary columnar stores.  Every kind of data is then k-way merged by
+time from the stores, which are loaded only when the merge reaches their
+data and released as soon as their data are exhausted.  Objects present
+in more than one archive (e.g. in overlapping exports) are written once.
+Animals, groups and session bounds are merged by :py:class:`pymice.Merger`,
+which also builds the merged data if it has to be loaded into memory.
+"""
+
+import sys
+if sys.version_info >= (3, 0):
+  unicode = str
+
+import os
+import shutil
+import tempfile
+from heapq import heappush, heappop
+from itertools import count
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor
+
+from .ICNodes import Animal
+from ._ICData import Loader, Merger, ColumnarLoader
+from ._Columnar import ColumnarReader, ColumnarWriter
+from ._ICWriter import IntelliCageWriter
+
+# dependence tracking
+from . import (_dependencies, Data as _Data, ICNodes, _ICData, _Columnar,
+               _ICWriter)
+import types
+__dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
+                                                      if isinstance(x, types.ModuleType)])
+
+
+def _optionalInt(x):
+  return None if x is None else int(x)
+
+# (loader flag, getter, time attribute, identity of an object)
+_KINDS = {
+  'visits': ('getNp', 'getVisits', 'Start',
+             lambda v: (v.Start, v.End, unicode(v.Animal), int(v.Cage),
+                        int(v.Corner))),
+  'log': ('getLog', 'getLog', 'DateTime',
+          lambda l: (l.DateTime, l.Category, l.Type, _optionalInt(l.Cage),
+                     _optionalInt(l.Corner), _optionalInt(l.Side), l.Notes)),
+  'environment': ('getEnv', 'getEnvironment', 'DateTime',
+                  lambda e: (e.DateTime, e.Temperature, e.Illumination,
+                             _optionalInt(e.Cage))),
+  'hardware': ('getHw', 'getHardwareEvents', 'DateTime',
+               lambda h: (h.DateTime, int(h.Type), _optionalInt(h.Cage),
+                          _optionalInt(h.Corner), _optionalInt(h.Side),
+                          h.State)),
+}
+
+
+def _parseSource(path, store, flags):
+  """
+  Convert an archive to a columnar store.
+
+  :return: the store, start and end of the data and times of the earliest
+           object of every kind
+  """
+  data = Loader(path, verbose=False, **flags)
+  data.saveColumnar(store)
+  earliest = {}
+  for kind, (flag, getter, attribute, _) in _KINDS.items():
+    if kind == 'visits' or flags.get(flag):
+      times = [getattr(o, attribute) for o in getattr(data, getter)()]
+      earliest[kind] = min(times) if times else None
+
+  return store, data.getStart(), data.getEnd(), earliest
+
+
+def mergeSorted(sources, key):
+  """
+  K-way merge of sorted streams opened lazily.
+
+  >>> list(mergeSorted([(3, lambda: [3, 5]), (1, lambda: [1, 4, 6]),
+  ...                   (None, lambda: [])], key=lambda x: x))
+  [1, 3, 4, 5, 6]
+
+  :param sources: pairs of a key of the first element of a stream and
+                  a callable returning the (sorted) stream; a stream
+                  without elements might have None as the key
+  :type sources: [(object, callable), ...]
+
+  :param key: a function returning the key of an element
+  """
+  pending = sorted([s for s in sources if s[0] is not None],
+                   key=lambda s: s[0], reverse=True)
+  heap = []
+  order = count()
+
+  def push(iterator):
+    for element in iterator:
+      heappush(heap, (key(element), next(order), element, iterator))
+      return
+
+  while pending or heap:
+    if pending and (not heap or pending[-1][0] <= heap[0][0]):
+      push(iter(pending.pop()[1]()))
+      continue
+
+    _, _, element, iterator = heappop(heap)
+    yield element
+    push(iterator)
+
+
+class _StoreSource(object):
+  """
+  Animals, groups and session bounds of a parsed archive presented to
+  :py:class:`pymice.Merger` as a data source without any objects.
+  """
+  def __init__(self, store, start, end):
+    reader = ColumnarReader(store)
+    try:
+      manifest = reader.manifest
+
+    finally:
+      reader.close()
+
+    self.__store = store
+    self.__animals = dict((a['Name'], Animal(a['Name'], frozenset(a['Tag']),
+                                             a['Sex'], frozenset(a['Notes'])))
+                          for a in manifest['animals'])
+    self.__groups = dict((g['Name'], g) for g in manifest['groups'])
+    self.icSessionStart = start
+    self.icSessionEnd = end
+
+  def __str__(self):
+    return self.__store
+
+  def getStart(self):
+    return self.icSessionStart
+
+  def getEnd(self):
+    return self.icSessionEnd
+
+  def getAnimal(self, name=None):
+    return self.__animals[name] if name is not None else frozenset(self.__animals)
+
+  def getGroup(self, name=None):
+    return self.__groups[name] if name is not None else frozenset(self.__groups)
+
+  def getVisits(self):
+    return []
+
+  def getLog(self):
+    return None
+
+  getEnvironment = getHardwareEvents = getLog
+
+
+class _MergedSource(_StoreSource):
+  """
+  Merged streams of an :py:class:`ArchiveMerger` presented to
+  :py:class:`pymice.Merger` as a single data source.
+  """
+  def __init__(self, merger, registry):
+    self.__merger = merger
+    self.__registry = registry
+    self.icSessionStart = registry.icSessionStart
+    self.icSessionEnd = registry.icSessionEnd
+
+  def __str__(self):
+    return 'merged archives'
+
+  def getAnimal(self, name=None):
+    return self.__registry.getAnimal(name)
+
+  def getGroup(self, name=None):
+    return self.__registry.getGroup(name)
+
+  def getVisits(self):
+    return list(self.__merger.iterate('visits'))
+
+  def getLog(self):
+    return list(self.__merger.iterate('log'))
+
+  def getEnvironment(self):
+    return list(self.__merger.iterate('environment'))
+
+  def getHardwareEvents(self):
+    return list(self.__merger.iterate('hardware'))
+
+
+class ArchiveMerger(object):
+  """
+  A merger of many IntelliCage archives.
+
+  Every archive is parsed (in a worker process) into a temporary columnar
+  store and the stores are merged object by object, so the merged data is
+  never held in memory at once.  Memory usage still grows with the size
+  of the largest archive, as both parsing an archive and loading objects
+  of a kind from its store build complete PyMICE objects of that archive.
+
+  >>> with ArchiveMerger(['2012-12-18.zip', '2012-12-19.zip'],
+  ...                    jobs=2, getLog=True) as merger: # doctest: +SKIP
+  ...   merger.saveIntelliCage('merged.zip')
+  """
+  def __init__(self, paths, jobs=1, getNp=True, getLog=False, getEnv=False,
+               getHw=False, ignoreMiceDifferences=False):
+    """
+    :param paths: paths to archives (or uncompressed session directories)
+    :type paths: [basestring, ...]
+
+    :param jobs: number of worker processes parsing the archives
+    :type jobs: int
+
+    :param getNp: whether to merge nosepoke data.
+    :type getNp: bool
+
+    :param getLog: whether to merge log.
+    :type getLog: bool
+
+    :param getEnv: whether to merge environmental data.
+    :type getEnv: bool
+
+    :param getHw: whether to merge hardware data.
+    :type getHw: bool
+
+    :param ignoreMiceDifferences: whether to ignore encountered differences
+                                  in animal description (e.g. sex)
+    :type ignoreMiceDifferences: bool
+    """
+    self.__flags = {'getNp': getNp, 'getLog': getLog,
+                    'getEnv': getEnv, 'getHw': getHw}
+    self.__ignoreMiceDifferences = ignoreMiceDifferences
+    self.duplicates = dict((kind, 0) for kind in _KINDS)
+    self.__directory = tempfile.mkdtemp()
+    try:
+      self.__sources = self.__parse(paths, jobs)
+      self.__registry = self.__makeMerger([_StoreSource(store, start, end)
+                                           for store, start, end, _ in self.__sources])
+
+    except:
+      self.close()
+      raise
+
+    registry = self.__registry
+    self.animals = dict((name, registry.getAnimal(name))
+                        for name in registry.getAnimal())
+    self.groups = dict((name, set(unicode(a) for a in registry.getGroup(name).Animals))
+                       for name in registry.getGroup())
+    self.start = registry.icSessionStart
+    self.end = registry.icSessionEnd
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, excType, excValue, traceback):
+    self.close()
+
+  def close(self):
+    """
+    Remove the temporary stores.
+    """
+    if self.__directory is not None:
+      shutil.rmtree(self.__directory)
+      self.__directory = None
+
+  def __parse(self, paths, jobs):
+    stores = [os.path.join(self.__directory, '%d' % i)
+              for i in range(len(paths))]
+    if jobs > 1 and len(paths) > 1:
+      with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_parseSource, path, store, self.__flags)
+                   for path, store in zip(paths, stores)]
+        return [future.result() for future in futures]
+
+    return [_parseSource(path, store, self.__flags)
+            for path, store in zip(paths, stores)]
+
+  def __makeMerger(self, sources):
+    return Merger(*sources,
+                  ignoreMiceDifferences=self.__ignoreMiceDifferences,
+                  **self.__flags)
+
+  def iterate(self, kind):
+    """
+    :param kind: 'visits', 'log', 'environment' or 'hardware'
+    :type kind: str
+
+    :return: merged objects of the kind, ordered by time, without
+             duplicates
+    """
+    flag, getter, attribute, identity = _KINDS[kind]
+    getTime = attrgetter(attribute)
+    sources = [(earliest.get(kind), self.__makeLoad(store, kind))
+               for store, _, _, earliest in self.__sources]
+
+    currentTime = None
+    seen = set()
+    for element in mergeSorted(sources, getTime):
+      time = getTime(element)
+      if time != currentTime:
+        currentTime = time
+        seen = set()
+
+      key = identity(element)
+      if key in seen:
+        self.duplicates[kind] += 1
+        continue
+
+      seen.add(key)
+      yield element
+
+  def __makeLoad(self, store, kind):
+    flag, getter, attribute, _ = _KINDS[kind]
+    flags = dict((f, False) for f in self.__flags)
+    flags[flag] = self.__flags[flag]
+    return lambda: getattr(ColumnarLoader(store, **flags), getter)(order=attribute)
+
+  def __requested(self, kind):
+    return kind == 'visits' or self.__flags[_KINDS[kind][0]]
+
+  def __makeIterate(self, kind):
+    return (lambda: self.iterate(kind)) if self.__requested(kind) else None
+
+  def saveIntelliCage(self, path, force=False, tz=None, parallel=False):
+    """
+    Stream the merged data into an IntelliCage Plus archive
+    (see :py:meth:`pymice.Data.Data.saveIntelliCage`).
+    """
+    IntelliCageWriter(path, force=force, tz=tz, parallel=parallel)\
+      .writeStreams(self.animals.values(),
+                    self.groups, self.start, self.end,
+                    self.iterate('visits'),
+                    nosepokes=self.__flags['getNp'],
+                    log=self.__makeIterate('log'),
+                    environment=self.__makeIterate('environment'),
+                    hardware=self.__makeIterate('hardware'))
+
+  def getData(self):
+    """
+    :return: the merged data (loaded into memory)
+    :rtype: :py:class:`pymice.Data.Data`
+    """
+    return self.__makeMerger([_MergedSource(self, self.__registry)])
+
+  def saveColumnar(self, path, force=False):
+    """
+    Save the merged data in the columnar binary format
+    (see :py:meth:`pymice.Data.Data.saveColumnar`).  Unlike
+    :py:meth:`saveIntelliCage`, the merged data are loaded into memory.
+    """
+    ColumnarWriter(path, force=force).write(self.getData())
@@ -34,11 +34,15 @@ try:
 except ImportError:
   from configparser import RawConfigParser, NoSectionError, NoOptionError
 
+import heapq
+
+import numpy as np
 import pytz
 import matplotlib.ticker
 import matplotlib.dates as mpd
 
-from ._Tools import convertTime, warn, isString, deprecatedAlias
+from ._Tools import convertTime, warn, isString, deprecatedAlias, toTimestamp,\
+                    toTimestampUTC
 
 # dependence tracking
 from . import _dependencies, _Tools
@@ -493,6 +497,11 @@ class Timeline(RawConfigParser, matplotlib.ticker.Formatter):
   ``YYYY-MM-DD HH:MM`` or ``YYYY-MM-DD HH:MM:SS``. Optional information about
   timezone of ``start`` and ``end`` properties might be provided by ``tzinfo``
   property (name of timezone defined in :py:mod:`pytz` module).
+
+  Phase boundaries are parsed once and cached together with a sorted index
+  of phases, so phase-at-time lookups (:py:meth:`getPhase`,
+  :py:meth:`getPhases` and the formatter itself) take logarithmic time.
+  The cache is invalidated whenever the timeline is modified.
   """
   def __init__(self, path, fname=None, tzinfo=None):
     """
@@ -511,6 +520,7 @@ class Timeline(RawConfigParser, matplotlib.ticker.Formatter):
     :type tzinfo: :py:class:`datetime.tzinfo`
     """
     self.tzinfo = tzinfo
+    self.__invalidate()
 
     RawConfigParser.__init__(self)
     if fname is None:
@@ -530,6 +540,30 @@ class Timeline(RawConfigParser, matplotlib.ticker.Formatter):
 
     self.read(self.path)
 
+  def __invalidate(self):
+    self.__bounds = {}
+    self.__index = None
+
+  def _read(self, *args, **kwargs):
+    self.__invalidate()
+    return RawConfigParser._read(self, *args, **kwargs)
+
+  def add_section(self, *args, **kwargs):
+    self.__invalidate()
+    return RawConfigParser.add_section(self, *args, **kwargs)
+
+  def remove_section(self, *args, **kwargs):
+    self.__invalidate()
+    return RawConfigParser.remove_section(self, *args, **kwargs)
+
+  def set(self, *args, **kwargs):
+    self.__invalidate()
+    return RawConfigParser.set(self, *args, **kwargs)
+
+  def remove_option(self, *args, **kwargs):
+    self.__invalidate()
+    return RawConfigParser.remove_option(self, *args, **kwargs)
+
   def getTimeBounds(self, phases):
     """
     :param phases: name(s) of phase(s)
@@ -542,21 +576,11 @@ class Timeline(RawConfigParser, matplotlib.ticker.Formatter):
 
     if isString(phases):
       try:
-        tzinfo = pytz.timezone(self.get(phases, 'tzinfo'))
-
-      except (NoOptionError, pytz.UnknownTimeZoneError):
-        tzinfo = self.tzinfo
-
-      times = []
-      for option in ('start', 'end'):
-        t = convertTime(self.get(phases, option), tzinfo)
-
-        times.append(t)
+        return self.__bounds[phases]
 
-      if times[0] > times[1]:
-        warn.warn("Phase %s starts after it ends (%s > %s)" % (phases, times[0], times[1]))
-
-      return tuple(times)
+      except KeyError:
+        bounds = self.__bounds[phases] = self.__parseTimeBounds(phases)
+        return bounds
         
     else:
       starts = []
@@ -568,14 +592,126 @@ class Timeline(RawConfigParser, matplotlib.ticker.Formatter):
 
       return min(starts), max(ends)
 
-  def __call__(self, x, pos=0):
-    x = mpd.num2date(x)
-    for sec in self.sections():
-      t1, t2 = self.getTimeBounds(sec)
-      if t1 <= x and x < t2:
-        return sec
+  def __parseTimeBounds(self, phase):
+    try:
+      tzinfo = pytz.timezone(self.get(phase, 'tzinfo'))
+
+    except (NoOptionError, pytz.UnknownTimeZoneError):
+      tzinfo = self.tzinfo
+
+    times = []
+    for option in ('start', 'end'):
+      t = convertTime(self.get(phase, option), tzinfo)
+
+      times.append(t)
+
+    if times[0] > times[1]:
+      warn.warn("Phase %s starts after it ends (%s > %s)" % (phase, times[0], times[1]))
+
+    return tuple(times)
+
+  def getPhase(self, time, default=None):
+    """
+    :param time: a moment of time
+    :type time: :py:class:`datetime.datetime` or float (POSIX timestamp)
+
+    :param default: value returned if no phase covers the ``time``
 
-    return 'Unknown'
+    :return: name of the first (in the file order) phase covering the ``time``
+             (phase start inclusive, phase end exclusive)
+    :rtype: basestring
+    """
+    boundaries, phases = self.__getIndex()
+    i = np.searchsorted(boundaries, self.__toTimestamp(time), side='right')
+    phase = phases[i]
+    return default if phase is None else phase
+
+  def getPhases(self, times, default=None):
+    """
+    Vectorized version of :py:meth:`getPhase`.
+
+    :param times: moments of time
+    :type times: sequence of :py:class:`datetime.datetime` or float (POSIX
+                 timestamps) or :py:class:`numpy.ndarray` of
+                 :py:class:`numpy.datetime64` (UTC)
+
+    :param default: value assigned if no phase covers the time
+
+    :return: names of phases covering ``times``
+    :rtype: :py:class:`numpy.ndarray` of objects
+    """
+    boundaries, phases = self.__getIndex()
+    indices = np.searchsorted(boundaries, self.__toTimestamps(times),
+                              side='right')
+    result = phases[indices]
+    if default is not None:
+      result[np.equal(result, None)] = default
+
+    return result
+
+  def __getIndex(self):
+    if self.__index is None:
+      self.__index = self.__makeIndex()
+
+    return self.__index
+
+  def __makeIndex(self):
+    """
+    Split time into elementary intervals between consecutive phase
+    boundaries, each labelled with the first (in the file order) phase
+    covering it.  ``phases[i]`` labels ``[boundaries[i - 1], boundaries[i])``;
+    ``phases[0]`` and ``phases[-1]`` are ``None``.
+    """
+    intervals = []
+    for order, phase in enumerate(self.sections()):
+      start, end = map(self.__toTimestamp, self.getTimeBounds(phase))
+      if start < end:
+        intervals.append((start, end, order, phase))
+
+    boundaries = np.unique([t for interval in intervals
+                              for t in interval[:2]]).astype(float)
+    phases = np.empty(len(boundaries) + 1, dtype=object)
+    intervals.sort()
+    active = []
+    n = 0
+    for i, t in enumerate(boundaries[:-1]):
+      while n < len(intervals) and intervals[n][0] <= t:
+        start, end, order, phase = intervals[n]
+        heapq.heappush(active, (order, end, phase))
+        n += 1
+
+      while active and active[0][1] <= t:
+        heapq.heappop(active)
+
+      if active:
+        phases[i + 1] = active[0][2]
+
+    return boundaries, phases
+
+  @staticmethod
+  def __toTimestamp(time):
+    if isinstance(time, datetime):
+      if time.tzinfo is None:
+        return toTimestamp(time)
+
+      return toTimestampUTC(time)
+
+    return float(time)
+
+  @classmethod
+  def __toTimestamps(cls, times):
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+      return times.astype('datetime64[us]').astype(float) / 1e6
+
+    if times.dtype == object:
+      return np.array([cls.__toTimestamp(t) for t in times.ravel()],
+                      dtype=float).reshape(times.shape)
+
+    return times.astype(float)
+
+  def __call__(self, x, pos=0):
+    return self.getPhase(mpd.num2date(x), 'Unknown')
 
   getTime = deprecatedAlias(getTimeBounds)
 
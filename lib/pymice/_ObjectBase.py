@@ -190,6 +190,25 @@ class ObjectBase(object):
 
       return self.__combineMasks(selector)
 
+    def getValues(self):
+      return self.__values
+
+    def extend(self, values):
+      """
+      >>> mm = ObjectBase.MaskManager([1, 2])
+      >>> mm.getMask([2]).tolist()
+      [False, True]
+
+      >>> mm.extend([2, 3])
+      >>> mm.getMask([2]).tolist()
+      [False, True, True, False]
+      """
+      values = np.array(values)
+      self.__values = np.concatenate([self.__values, values]) \
+                      if len(self.__values) else values
+      for value, mask in self.__cachedMasks.items():
+        self.__cachedMasks[value] = np.concatenate([mask, values == value])
+
     def __combineMasks(self, acceptedValues):
       if not acceptedValues:
         return np.zeros_like(self.__values, dtype=bool)
@@ -227,13 +246,67 @@ class ObjectBase(object):
     return len(self.__objects)
 
   def put(self, objects):
-    self.__objects = np.append(self.__objects,
-                               objects if isinstance(objects, Sequence) else list(objects))
-    self.__cachedMaskManagers.clear()
+    objects = objects if isinstance(objects, Sequence) else list(objects)
+    # values are converted before the storage is modified, so a failing
+    # attribute access or conversion leaves the base unchanged
+    values = [(attributeName,
+               self.__convertAttributeValues(attributeName,
+                                             list(map(attrgetter(attributeName), objects))))
+              for attributeName in self.__cachedMaskManagers]
+    self.__objects = np.append(self.__objects, objects)
+    self.__extendMaskManagers(values)
+
+  def __extendMaskManagers(self, values):
+    for attributeName, attributeValues in values:
+      try:
+        self.__cachedMaskManagers[attributeName].extend(attributeValues)
+
+      except (ValueError, TypeError): # values not concatenable with cached ones
+        del self.__cachedMaskManagers[attributeName]
 
   def get(self, filters=None):
     return list(self.__getFilteredObjects(filters))
 
+  def getIndices(self, filters=None):
+    """
+    >>> ob = ObjectBase()
+    >>> ob.put([ClassA(1, 4), ClassA(2, 2), ClassA(1, 3)])
+    >>> ob.getIndices({'a': [1]}).tolist()
+    [0, 2]
+
+    :return: indices of (filtered) objects in the underlying storage
+    :rtype: numpy.ndarray
+    """
+    if filters:
+      return np.flatnonzero(self.__getProductOfMasks(filters))
+
+    return np.arange(len(self.__objects))
+
+  def getArray(self):
+    """
+    >>> ob = ObjectBase()
+    >>> ob.put([ClassA(1, 4), ClassA(2, 2)])
+    >>> ob.getArray()[1:]
+    array([ClassA(a=2, b=2)], dtype=object)
+
+    :return: the underlying storage of objects (not to be modified)
+    :rtype: numpy.ndarray
+    """
+    return self.__objects
+
+  def getConvertedAttributes(self, attributeName):
+    """
+    >>> ob = ObjectBase({'a': lambda x: 10 * x})
+    >>> ob.put([ClassA(1, 4), ClassA(2, 2)])
+    >>> ob.getConvertedAttributes('a').tolist()
+    [10, 20]
+
+    :return: attribute values (converted if a converter for the attribute
+             is given) cached for filtering; not to be modified
+    :rtype: numpy.ndarray
+    """
+    return self.__getMaskManager(attributeName).getValues()
+
   def __getFilteredObjects(self, filters):
     if filters:
       return self.__objects[self.__getProductOfMasks(filters)]
@@ -260,7 +333,10 @@ class ObjectBase(object):
       return maskManager
 
   def __getConvertedAttributeValues(self, attributeName):
-    attributeValues = self.getAttributes(attributeName)
+    return self.__convertAttributeValues(attributeName,
+                                         self.getAttributes(attributeName))
+
+  def __convertAttributeValues(self, attributeName, attributeValues):
     if attributeName in self.__converters:
       # XXX: Python3 fix - makes NumPy array working
       return list(map(self.__converters[attributeName], attributeValues))
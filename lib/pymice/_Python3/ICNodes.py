@@ -44,7 +44,9 @@ class Visit(BaseNode, DurationAware, metaclass=VisitMetaclass):
                'PresenceNumber', 'PresenceDuration',
                'VisitSolution',
                '_source', '_line', '_id',
-               'Nosepokes')
+               'Nosepokes',
+               '_summary',
+               '__weakref__')
 
 
   def __init__(self, Start, Corner, Animal, End, Module, Cage,
@@ -70,6 +72,7 @@ class Visit(BaseNode, DurationAware, metaclass=VisitMetaclass):
     self.___line = _line
     self.___id = _id
     self.__Nosepokes = Nosepokes
+    self.___summary = None
     if Nosepokes is not None:
       for nosepoke in Nosepokes:
         nosepoke._bindToVisit(self)
@@ -98,9 +101,31 @@ class Visit(BaseNode, DurationAware, metaclass=VisitMetaclass):
   # derivatives
   @property
   def NosepokeNumber(self):
+    if self.___summary is not None:
+      return self.___summary[0]
+
     if self.__Nosepokes is not None:
       return len(self.__Nosepokes)
 
+  def _setNosepokeSummary(self, summary):
+    """
+    :param summary: precomputed values of nosepoke aggregates
+                    (see :py:data:`pymice._ICNodesBase.NOSEPOKE_SUMMARY`)
+    :type summary: tuple
+    """
+    self.___summary = summary
+
+  def _appendNosepokes(self, nosepokes):
+    """
+    :param nosepokes: nosepokes of the visit loaded after the visit itself
+    :type nosepokes: [Nosepoke, ...]
+    """
+    for nosepoke in nosepokes:
+      nosepoke._bindToVisit(self)
+
+    self.__Nosepokes = tuple(sorted(tuple(self.__Nosepokes or ()) + tuple(nosepokes),
+                                    key=lambda n: n.Start))
+
   def __repr__(self):
     return '< Visit of "%s" to corner #%d of cage #%d (at %s) >' % \
            (self.__Animal, self.__Corner, self.__Cage,
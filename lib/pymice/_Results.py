@@ -26,6 +26,8 @@
 import sys
 import os 
 import csv
+import numbers
+from collections import deque
 
 from ._Tools import warn
 
@@ -36,15 +38,45 @@ __dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().value
                                                       if isinstance(x, types.ModuleType)])
 
 
+if sys.version_info < (3, 0):
+  def _formatCell(value):
+    return unicode(value).encode('utf-8')
+
+else:
+  def _formatCell(value):
+    return str(value)
+
+
 class ResultsCSV(object):
-  def __init__(self, filename, fields=(), force=False, inOrder=False):
+  """
+  A writer of results tables.
+
+  By default rows are kept in memory until the file is closed, so fields
+  might be added at any time.  In the streaming mode (``streaming=True``)
+  the fields have to be declared before the first row is added; rows are
+  written (in buffered batches of ``bufferSize`` rows) as soon as all
+  the preceding rows and themselves are complete (all fields are set),
+  and can not be accessed nor modified afterwards.
+
+  To keep memory usage of the streaming mode independent of the number of
+  rows, IDs of written rows are not stored unless they are given explicitly
+  (and are not integers already generated as IDs); duplicates of such IDs
+  are still detected.
+  """
+  def __init__(self, filename, fields=(), force=False, inOrder=False,
+               streaming=False, bufferSize=1024):
     self.__fields = set(fields)
     self.__fieldsOrder = list(fields)
     self.__rows = {}
-    self.__rowOrder = []
+    self.__rowOrder = deque()
     self.__inOrder = inOrder
     self.__currentID = None
     self.__nextID = 0
+    self.__streaming = streaming
+    self.__bufferSize = bufferSize
+    self.__buffer = []
+    self.__writtenIDs = set() # only IDs given explicitly
+    self.__header = None
     if os.path.exists(filename) and not force:
       raise ValueError("File %s already exists." % filename)
 
@@ -54,6 +86,8 @@ class ResultsCSV(object):
     else:
       self.__fh = open(filename, 'w', newline='')
 
+    self.__writer = csv.writer(self.__fh)
+
   def __enter__(self):
     return self
 
@@ -70,51 +104,173 @@ class ResultsCSV(object):
     if self.__fh is None:
       return
 
-    fields = self.__fieldsOrder if inOrder else sorted(self.__fields)
-    writer = csv.writer(self.__fh)
+    if self.__header is None:
+      self.__writeHeader(inOrder)
 
-    if sys.version_info < (3, 0):
-      writer.writerow([f.encode('utf-8') for f in fields])
+    while self.__rowOrder:
+      self.__buffer.append(self.__formatRow(self.__popRow()))
 
-    else:
-      writer.writerow(fields)
+    self.__flushBuffer()
+    self.__fh.close()
+    self.__fh = None
 
-    for row in [self.__rows[id] for id in self.__rowOrder]:
-      if sys.version_info < (3, 0):
-        line = [unicode(row.get(f, '')).encode('utf-8') for f in fields]
+  def __writeHeader(self, inOrder):
+    self.__header = list(self.__fieldsOrder) if inOrder else sorted(self.__fields)
+    self.__writer.writerow([_formatCell(f) for f in self.__header]
+                           if sys.version_info < (3, 0) else self.__header)
 
-      else:
-        line = [str(row.get(f, '')) for f in fields]
+  def __popRow(self):
+    id = self.__rowOrder.popleft()
+    if self.__streaming:
+      self.__markWritten(id)
 
-      writer.writerow(line)
+    return self.__rows.pop(id)
 
-    self.__fh.close()
-    self.__fh = None
+  def __formatRow(self, row):
+    if isinstance(row, list):
+      return row
 
-  def addRow(self, id=None):
+    return [_formatCell(row.get(f, '')) for f in self.__header]
+
+  def __flushBuffer(self):
+    self.__writer.writerows(self.__buffer)
+    del self.__buffer[:]
+
+  def __flushCompleteRows(self):
+    fieldsNumber = len(self.__fields)
+    while self.__rowOrder:
+      row = self.__rows[self.__rowOrder[0]]
+      if not isinstance(row, list) and len(row) < fieldsNumber:
+        break
+
+      self.__buffer.append(self.__formatRow(self.__popRow()))
+
+    if len(self.__buffer) >= self.__bufferSize:
+      self.__flushBuffer()
+
+  def __startStreaming(self):
+    if self.__header is None:
+      self.__writeHeader(self.__inOrder)
+
+  def __isGeneratedID(self, id):
+    # every integer below __nextID has been either generated or skipped
+    # as already known
+    return isinstance(id, numbers.Integral) and 0 <= id < self.__nextID
+
+  def __markWritten(self, id):
+    if not self.__isGeneratedID(id):
+      self.__writtenIDs.add(id)
+
+  def __isWrittenID(self, id):
+    return id not in self.__rows and \
+           (id in self.__writtenIDs or self.__isGeneratedID(id))
+
+  def __isKnownID(self, id):
+    return id in self.__rows or self.__isWrittenID(id)
+
+  def __makeID(self, id):
     if id is None:
       while True:
         id = self.__nextID
+        known = self.__isKnownID(id)
         self.__nextID += 1
-        if id not in self.__rows:
-          break
+        if not known:
+          return id
 
-    elif id in self.__rows:
+    if self.__isKnownID(id):
       raise ValueError('Row of ID %s already exists.' % id)
 
+    return id
+
+  def addRow(self, id=None):
+    id = self.__makeID(id)
+    if self.__streaming:
+      self.__startStreaming()
+
     self.__current = {}
     self.__rows[id] = self.__current
     self.__rowOrder.append(id)
     self.__currentID = id
     return id
 
+  def addRows(self, columns, ids=None):
+    """
+    Add many rows at once.
+
+    In the streaming mode rows added that way are complete (fields missing
+    in ``columns`` are left empty) and are never converted to dictionaries.
+
+    :param columns: values of fields
+    :type columns: {str: sequence or numpy.ndarray, ...}
+
+    :param ids: IDs of the rows (generated if not given)
+    :type ids: sequence or None
+
+    :return: IDs of the rows added
+    :rtype: [ID, ...]
+    """
+    fields = list(columns)
+    values = [columns[f] for f in fields]
+    values = [v.tolist() if hasattr(v, 'tolist') else list(v) for v in values]
+    n = len(values[0]) if values else len(ids) if ids is not None else 0
+    if any(len(v) != n for v in values) or ids is not None and len(ids) != n:
+      raise ValueError('Columns (and IDs) must be of equal length.')
+
+    ids = [self.__makeID(None if ids is None else ids[i]) for i in range(n)]
+    if len(set(ids)) != n:
+      raise ValueError('Row IDs must be unique.')
+
+    if not self.__streaming:
+      self.declareFields(*fields)
+      for id, row in zip(ids, zip(*values) if values else [()] * n):
+        self.__rows[id] = dict(zip(fields, row))
+        self.__rowOrder.append(id)
+
+      return ids
+
+    self.__startStreaming()
+    self.__raiseIfUndeclared(fields)
+    position = dict((f, i) for i, f in enumerate(fields))
+    blank = [''] * n
+    lines = zip(*[[_formatCell(x) for x in values[position[f]]]
+                  if f in position else blank
+                  for f in self.__header]) if self.__header else [[]] * n
+    if self.__rowOrder:
+      for id, line in zip(ids, lines):
+        self.__rows[id] = list(line)
+        self.__rowOrder.append(id)
+
+    else:
+      for id in ids:
+        self.__markWritten(id)
+
+      self.__buffer.extend(lines)
+
+    self.__flushCompleteRows()
+    return ids
+
   def setRow(self, id):
-    self.__current = self.__rows[id]
+    self.__current = self.__getRow(id)
     self.__currentID = id
     return id
 
   def getRow(self):
     return self.__currentID
+
+  def __getRow(self, id):
+    try:
+      row = self.__rows[id]
+
+    except KeyError:
+      if self.__isWrittenID(id):
+        raise KeyError('Row of ID %s already written.' % id)
+
+      raise KeyError('Unknown ID: %s.' % id)
+
+    if isinstance(row, list):
+      raise KeyError('Row of ID %s is complete.' % id)
+
+    return row
       
   def addField(self, field, value='', id=None):
     if id is None:
@@ -124,10 +280,10 @@ class ResultsCSV(object):
 
     self._declareField(field)
 
-    try:
-      row = self.__rows[id]
+    if self.__isKnownID(id):
+      row = self.__getRow(id)
 
-    except KeyError:
+    else:
       warn.warn('Row of ID %s not found, creating a new row.' % id)
       row = self.__rows[self.addRow(id)]
 
@@ -135,6 +291,8 @@ class ResultsCSV(object):
       warn.warn('Field %s already set for row of ID %s, overwriting.' % (field, id))
       
     row[field] = value
+    if self.__streaming:
+      self.__flushCompleteRows()
     
   def declareFields(self, *fields):
     for field in fields:
@@ -142,9 +300,17 @@ class ResultsCSV(object):
         
   def _declareField(self, field):
     if field not in self.__fields:
+      if self.__header is not None:
+        raise ValueError('Field %s not declared before streaming started.' % field)
+
       self.__fields.add(field)
       self.__fieldsOrder.append(field)
 
+  def __raiseIfUndeclared(self, fields):
+    for field in fields:
+      if field not in self.__fields:
+        raise ValueError('Field %s not declared before streaming started.' % field)
+
   def getField(self, field, id=None):
     if id is None:
       id = self.__currentID
@@ -154,11 +320,7 @@ class ResultsCSV(object):
     if field not in self.__fields:
       raise KeyError('Unknown field: %s.' % field)
 
-    try:
-      row = self.__rows[id]
-
-    except KeyError:
-      raise KeyError('Unknown ID: %s.' % id)
+    row = self.__getRow(id)
 
     try:
       return row[field]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+
+"""
+Analytics of per-animal sequences of visits.
+
+Visits are sorted by (phase, animal) group and Start once; every analysis
+is then a vectorized operation on consecutive elements of the sorted index
+array (``diff``/``bincount`` over encoded corner codes), done for all
+animals (and phases) at once.
+"""
+
+import sys
+if sys.version_info >= (3, 0):
+  unicode = str
+
+import numpy as np
+
+from ._Analysis import encodeKeys, _getter
+from ._Ens import Ens
+from ._Tools import toTimestampUTC, toTimestampsUTC, isString
+
+# dependence tracking
+from . import _dependencies, _Analysis, _Ens, _Tools
+import types
+__dependencies__ = _dependencies.moduleDependencies(*[x for x in globals().values()
+                                                      if isinstance(x, types.ModuleType)])
+
+
+class VisitSequences(object):
+  """
+  Sequences of visits of every animal (in every phase of a timeline).
+
+  Results are given for every group of visits - an animal (name) or,
+  if a timeline is given, a ``(phase, animal)`` pair.  Groups with no
+  visits are omitted.  Times are given in seconds.
+
+  >>> sequences = data.getVisitSequences()
+  >>> sequences.getCorners()
+  [(1, 1), (1, 4)]
+  >>> sequences.getTransitionMatrices()['Minnie'].tolist()
+  [[0, 0], [0, 0]]
+  """
+  def __init__(self, visits, timeline=None, phases=None, starts=None, ends=None):
+    """
+    :param visits: visits to be analysed
+    :type visits: [:py:class:`Visit`, ...] or numpy.ndarray
+
+    :param timeline: the timeline of the experiment; if given visits are
+                     assigned to phases (by their Start; phase start
+                     inclusive, phase end exclusive)
+    :type timeline: :py:class:`pymice.Timeline` or None
+
+    :param phases: phase(s) of interest; defaults to all phases
+    :type phases: basestring or [basestring, ...] or None
+
+    :param starts: UTC timestamps of visit starts (computed if not given)
+    :type starts: numpy.ndarray or None
+
+    :param ends: UTC timestamps of visit ends (computed if not given)
+    :type ends: numpy.ndarray or None
+    """
+    self.__visits = np.empty(len(visits), dtype=object)
+    self.__visits[:] = list(visits)
+    self.__starts = np.asarray(starts, dtype=float).reshape(-1) if starts is not None \
+                    else toTimestampsUTC([v.Start for v in self.__visits])
+    self.__ends = np.asarray(ends, dtype=float).reshape(-1) if ends is not None \
+                  else toTimestampsUTC([v.End for v in self.__visits])
+
+    animals, animalCodes = encodeKeys([unicode(v.Animal.Name) for v in self.__visits])
+    self.__corners, self.__cornerCodes = encodeKeys([int(v.Cage) for v in self.__visits],
+                                                    [int(v.Corner) for v in self.__visits])
+    if timeline is None:
+      phaseNames = [None]
+      rows = np.arange(len(self.__visits))
+      phaseCodes = np.zeros(len(rows), dtype=np.intp)
+
+    else:
+      if phases is None:
+        phaseNames = timeline.sections()
+
+      elif isString(phases):
+        phaseNames = [phases]
+
+      else:
+        phaseNames = list(phases)
+
+      phaseRows = []
+      for phase in phaseNames:
+        start, end = map(toTimestampUTC, timeline.getTimeBounds(phase))
+        phaseRows.append(np.flatnonzero((self.__starts >= start) & (self.__starts < end)))
+
+      rows = np.concatenate(phaseRows + [np.zeros(0, dtype=np.intp)])
+      phaseCodes = np.repeat(np.arange(len(phaseNames)), [len(r) for r in phaseRows])
+
+    groups = phaseCodes * max(len(animals), 1) + animalCodes[rows]
+    order = np.lexsort((self.__starts[rows], groups))
+    self.__rows = rows[order]
+    self.__groups = groups[order]
+    self.__nGroups = len(phaseNames) * max(len(animals), 1)
+    self.__groupKeys = [animal if timeline is None else (phase, animal)
+                        for phase in phaseNames for animal in animals]
+    # pairs of consecutive visits of the same group
+    self.__pairs = np.flatnonzero(self.__groups[1:] == self.__groups[:-1])
+
+  def getCorners(self):
+    """
+    :return: labels of rows and columns of transition matrices
+    :rtype: [(cage, corner), ...]
+    """
+    return list(self.__corners)
+
+  def getVisits(self):
+    """
+    :return: visits of every group ordered by Start
+    :rtype: :py:class:`Ens` {key: numpy.ndarray}
+    """
+    return self.__split(self.__visits[self.__rows], self.__groups)
+
+  def getTransitionMatrices(self):
+    """
+    :return: counts of transitions between consecutive visits (row - corner
+             of the visit, column - corner of the next one; see
+             :py:meth:`getCorners`)
+    :rtype: :py:class:`Ens` {key: numpy.ndarray}
+    """
+    nCorners = len(self.__corners)
+    corners = self.__cornerCodes[self.__rows]
+    codes = (self.__groups[self.__pairs] * nCorners + corners[self.__pairs]) * nCorners \
+            + corners[self.__pairs + 1]
+    counts = np.bincount(codes, minlength=self.__nGroups * nCorners * nCorners)
+    counts = counts.reshape(self.__nGroups, nCorners, nCorners)
+    return Ens({self.__groupKeys[group]: counts[group]
+                for group in np.unique(self.__groups).tolist()})
+
+  def getIntervals(self, since='End'):
+    """
+    :param since: whether intervals are measured since ``'End'`` or
+                  ``'Start'`` of the visit preceding the next one
+    :type since: str
+
+    :return: intervals between consecutive visits (NaN if End is missing)
+    :rtype: :py:class:`Ens` {key: numpy.ndarray}
+    """
+    intervals, groups = self.__getIntervals(since)
+    return self.__split(intervals, groups, allGroups=True)
+
+  def getIntervalHistograms(self, bins, since='End'):
+    """
+    :param bins: (increasing) edges of bins (in seconds); an interval `x`
+                 falls into the i-th bin if `bins[i] <= x < bins[i + 1]`
+    :type bins: sequence of floats
+
+    :param since: see :py:meth:`getIntervals`
+
+    :return: counts of intervals in bins
+    :rtype: :py:class:`Ens` {key: numpy.ndarray}
+    """
+    bins = np.asarray(bins, dtype=float)
+    nBins = max(len(bins) - 1, 0)
+    intervals, groups = self.__getIntervals(since)
+    indices = np.searchsorted(bins, intervals, side='right') - 1
+    inRange = (indices >= 0) & (indices < nBins)
+    counts = np.bincount(groups[inRange] * nBins + indices[inRange],
+                         minlength=self.__nGroups * nBins)
+    counts = counts.reshape(self.__nGroups, nBins)
+    return Ens({self.__groupKeys[group]: counts[group]
+                for group in np.unique(self.__groups).tolist()})
+
+  def getRevisitLatencies(self):
+    """
+    :return: latencies (since End) of returns to the same corner
+    :rtype: :py:class:`Ens` {key: numpy.ndarray}
+    """
+    corners = self.__cornerCodes[self.__rows]
+    order = np.lexsort((np.arange(len(corners)), corners, self.__groups))
+    rows = self.__rows[order]
+    groups = self.__groups[order]
+    corners = corners[order]
+    pairs = np.flatnonzero((groups[1:] == groups[:-1]) & (corners[1:] == corners[:-1]))
+    latencies = self.__starts[rows[pairs + 1]] - self.__ends[rows[pairs]]
+    groups = groups[pairs]
+    order = np.lexsort((self.__starts[rows[pairs + 1]], groups))
+    return self.__split(latencies[order], groups[order], allGroups=True)
+
+  def getRunLengths(self, key='Corner'):
+    """
+    :param key: attribute of visits or function of a visit; a run is
+                a maximal series of consecutive visits of equal key value
+    :type key: str or callable
+
+    :return: values and lengths of consecutive runs
+    :rtype: :py:class:`Ens` {key: :py:class:`Ens` {'Value': numpy.ndarray,
+                                                  'Length': numpy.ndarray}}
+    """
+    getKey = _getter(key)
+    visits = self.__visits[self.__rows]
+    values, codes = encodeKeys([getKey(v) for v in visits])
+    n = len(codes)
+    isStart = np.ones(n, dtype=bool)
+    isStart[1:] = (self.__groups[1:] != self.__groups[:-1]) | (codes[1:] != codes[:-1])
+    runStarts = np.flatnonzero(isStart)
+    lengths = np.diff(np.append(runStarts, n))
+    runValues = np.empty(len(runStarts), dtype=object)
+    runValues[:] = [values[c] for c in codes[runStarts].tolist()]
+    groups = self.__groups[runStarts]
+    bounds = self.__getBounds(groups)
+    return Ens({self.__groupKeys[group]: Ens(Value=runValues[bounds[group]:bounds[group + 1]],
+                                             Length=lengths[bounds[group]:bounds[group + 1]])
+                for group in np.unique(groups).tolist()})
+
+  def __getIntervals(self, since):
+    if since not in ('End', 'Start'):
+      raise ValueError('Unknown interval origin: {}'.format(since))
+
+    origins = self.__ends if since == 'End' else self.__starts
+    intervals = self.__starts[self.__rows[self.__pairs + 1]] \
+                - origins[self.__rows[self.__pairs]]
+    return intervals, self.__groups[self.__pairs]
+
+  def __split(self, values, groups, allGroups=False):
+    present = np.unique(self.__groups if allGroups else groups)
+    bounds = self.__getBounds(groups)
+    return Ens({self.__groupKeys[group]: values[bounds[group]:bounds[group + 1]]
+                for group in present.tolist()})
+
+  def __getBounds(self, groups):
+    return np.searchsorted(groups, np.arange(self.__nGroups + 1))
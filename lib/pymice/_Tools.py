@@ -23,6 +23,7 @@
 #                                                                             #
 ###############################################################################
 
+import gc
 import os
 import sys
 import time
@@ -31,6 +32,7 @@ from datetime import datetime
 from math import modf
 from operator import attrgetter
 
+import numpy as np
 import pytz
 import zipfile
 
@@ -135,6 +137,29 @@ EPOCH_UTC = datetime(1970, 1, 1, tzinfo=pytz.UTC)
 def toTimestampUTC(x):
   return (x - EPOCH_UTC).total_seconds()
 
+def toTimestampsUTC(times):
+  """
+  >>> toTimestampsUTC([datetime(1970, 1, 1, 0, 1, tzinfo=pytz.UTC), None, 2.5]).tolist()
+  [60.0, nan, 2.5]
+
+  :param times: time(s) as datetime(s) (None if missing) or timestamp(s)
+  :type times: datetime.datetime or float or sequence or numpy.ndarray
+
+  :return: UTC timestamps of the time(s) (NaN if missing)
+  :rtype: numpy.ndarray of float
+  """
+  if isinstance(times, np.ndarray) and times.dtype.kind in 'iuf':
+    return times.astype(float).reshape(-1)
+
+  if isinstance(times, datetime) or \
+     not isinstance(times, (list, tuple)) and np.ndim(times) == 0:
+    times = [times]
+
+  return np.array([np.nan if t is None else
+                   t if isinstance(t, (int, float, np.number)) else
+                   toTimestampUTC(t)
+                   for t in times], dtype=float)
+
 def toTimestamp(x):
   return (x - EPOCH).total_seconds()
 
@@ -312,6 +337,41 @@ def mergeIntervalsValues(objects, getData, overlap=False, mergeWindow=None):
   return result
 
 
+class GarbageCollectorSuspension(object):
+  """
+  A context manager suspending the cyclic garbage collector during bulk
+  construction of (mostly acyclic) objects.
+
+  On exit the collector is restored to its previous state.  Only if
+  ``freeze`` is true, all objects tracked by the collector are moved to
+  the permanent generation (see :py:func:`gc.freeze`; Python 3.7+) so they
+  are not scanned by any further collection.  Note that this affects all
+  objects of the process, not only those constructed within the context.
+
+  >>> with GarbageCollectorSuspension():
+  ...   gc.isenabled()
+  False
+  """
+  def __init__(self, suspend=True, freeze=False):
+    self.__suspend = suspend
+    self.__freeze = freeze
+    self.__wasEnabled = None
+
+  def __enter__(self):
+    self.__wasEnabled = gc.isenabled()
+    if self.__suspend:
+      gc.disable()
+
+    return self
+
+  def __exit__(self, type, value, traceback):
+    if self.__freeze and type is None and hasattr(gc, 'freeze'):
+      gc.freeze()
+
+    if self.__wasEnabled:
+      gc.enable()
+
+
 class AdditiveDict(dict):
   def copy(self):
     return self.__class__(self)
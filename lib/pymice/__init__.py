@@ -31,17 +31,22 @@ import sys
 from ._Version import __version__, __RRID__, __ID__, __NeuroLexID__
 
 from .LogAnalyser import (LickometerLogAnalyzer, PresenceLogAnalyzer,
-                          FailureInspector, DataValidator, TestMiceData)
+                          FailureInspector, DataValidator, TestMiceData,
+                          ValidationReport)
 from ._GetTutorialData import getTutorialData
-from ._ICData import Loader, Merger
+from ._ICData import Loader, Merger, ColumnarLoader, LiveLoader
 from ._Metadata import Phase, ExperimentTimeline, Timeline
+from ._HardwareTimeline import HardwareTimeline
+from ._Sequences import VisitSequences
+from ._CoOccurrence import VisitCoOccurrence
 from ._Results import ResultsCSV
 from ._Tools import hTime, convertTime, warn
 
 from ._Bibliography import Citation
 
 from . import (_dependencies, _Version, LogAnalyser, _GetTutorialData, _ICData,
-               _Metadata, _Results, _Tools, _Bibliography)
+               _Metadata, _HardwareTimeline, _Sequences, _CoOccurrence,
+               _Results, _Tools, _Bibliography)
 
 # dependence tracking
 import types
@@ -50,7 +55,8 @@ __dependencies__ = {m: (v, d)
                     if (v is not None or d) and m not in ('pymice._Bibliography',
                                                           'pymice._Version',
                                                           're',
-                                                          'csv')}
+                                                          'csv',
+                                                          'json')}
 
 __all__ = []
 
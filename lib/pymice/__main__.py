@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2012-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+
+"""
+Command line tools of PyMICE.
+
+Usage: python -m pymice merge [options] <archive> [<archive> ...]
+"""
+
+import argparse
+
+from ._Merge import ArchiveMerger
+
+
+def merge(args):
+  with ArchiveMerger(args.archives, jobs=args.jobs,
+                     getNp=not args.noNosepokes, getLog=args.log,
+                     getEnv=args.environment, getHw=args.hardware,
+                     ignoreMiceDifferences=args.ignoreMiceDifferences) as merger:
+    if args.format == 'columnar':
+      merger.saveColumnar(args.output, force=args.force)
+
+    else:
+      merger.saveIntelliCage(args.output, force=args.force,
+                             parallel=args.parallel)
+
+    duplicates = sum(merger.duplicates.values())
+    if duplicates:
+      print('{} duplicated objects skipped ({})'.format(
+            duplicates,
+            ', '.join('{}: {}'.format(kind, n)
+                      for kind, n in sorted(merger.duplicates.items())
+                      if n)))
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(prog='python -m pymice')
+  commands = parser.add_subparsers(dest='command')
+  commands.required = True
+
+  mergeParser = commands.add_parser('merge',
+                                    help='merge many archives into one')
+  mergeParser.add_argument('archives', nargs='+', metavar='archive',
+                           help='IntelliCage archives (or session directories)')
+  mergeParser.add_argument('-o', '--output', required=True,
+                           help='path to the merged archive')
+  mergeParser.add_argument('-f', '--format', choices=['intellicage', 'columnar'],
+                           default='intellicage',
+                           help='format of the merged archive')
+  mergeParser.add_argument('-j', '--jobs', type=int, default=1,
+                           help='number of archives parsed in parallel')
+  mergeParser.add_argument('--force', action='store_true',
+                           help='overwrite an existing output')
+  mergeParser.add_argument('--parallel', action='store_true',
+                           help='compress the output in a background thread')
+  mergeParser.add_argument('--no-nosepokes', dest='noNosepokes',
+                           action='store_true', help='skip nosepokes')
+  mergeParser.add_argument('--log', action='store_true', help='merge log')
+  mergeParser.add_argument('--environment', action='store_true',
+                           help='merge environmental data')
+  mergeParser.add_argument('--hardware', action='store_true',
+                           help='merge hardware events')
+  mergeParser.add_argument('--ignore-mice-differences',
+                           dest='ignoreMiceDifferences', action='store_true',
+                           help='ignore differences in animal descriptions')
+  mergeParser.set_defaults(run=merge)
+
+  args = parser.parse_args(argv)
+  args.run(args)
+
+
+if __name__ == '__main__':
+  main()
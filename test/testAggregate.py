@@ -24,8 +24,11 @@
 ###############################################################################
 
 from unittest import TestCase
+from datetime import timedelta
 
-from pymice._Analysis import Aggregator
+import numpy as np
+
+from pymice._Analysis import Aggregator, aggregateColumns, encodeKeys, reduceGroups
 from pymice._Ens import Ens
 
 
@@ -131,4 +134,96 @@ class GivenAggregatorExtendedWithDecoratorAggregateFunction(GivenEmptyAggregator
 class GivenAggregatorWithRequiredKeysAsClassAttribute(TestAggregatorBase):
   aggregator = Aggregator(requiredKeys=['a', 'b'])
   EMPTY_SEQUENCE_RESULT = Ens(a=[], b=[])
-  NUMBER_SEQUENCE_RESULT = Ens({1: [1], 2: [2, 2], 'a': [], 'b': []})
\ No newline at end of file
+  NUMBER_SEQUENCE_RESULT = Ens({1: [1], 2: [2, 2], 'a': [], 'b': []})
+
+
+class GivenAggregateWithCountReduction(GivenAggregateWithNoArguments):
+  AGGREGATOR_PARAMETERS = {'aggregateFunction': 'count'}
+  NUMBER_SEQUENCE_RESULT = Ens({1: 1, 2: 2})
+
+
+class GivenAggregateWithSumReduction(GivenAggregateWithNoArguments):
+  AGGREGATOR_PARAMETERS = {'aggregateFunction': 'sum'}
+  NUMBER_SEQUENCE_RESULT = Ens({1: 1, 2: 4})
+
+
+class GivenAggregateWithUfuncReductionOfValues(GivenAggregateWithNoArguments):
+  AGGREGATOR_PARAMETERS = {'getKey': lambda x: x % 2,
+                           'getValue': lambda x: 10 * x,
+                           'aggregateFunction': np.multiply}
+  NUMBER_SEQUENCE_RESULT = Ens({0: 400, 1: 10})
+
+
+class GivenAggregateWithReductionAndRequiredKeys(TestGivenAggregator):
+  AGGREGATOR_PARAMETERS = {'aggregateFunction': 'max',
+                           'requiredKeys': ['a']}
+  EMPTY_SEQUENCE_RESULT = Ens(a=None)
+  NUMBER_SEQUENCE_RESULT = Ens({1: 1, 2: 2, 'a': None})
+
+
+class TestAggregateColumns(TestCase):
+  KEYS = ['b', 'a', 'b', 'c', 'b']
+  VALUES = [1., 5., 3., 4., 2.]
+
+  def testReductions(self):
+    for reduction, expected in [('count', {'a': 1, 'b': 3, 'c': 1}),
+                                ('sum', {'a': 5., 'b': 6., 'c': 4.}),
+                                ('mean', {'a': 5., 'b': 2., 'c': 4.}),
+                                ('min', {'a': 5., 'b': 1., 'c': 4.}),
+                                ('max', {'a': 5., 'b': 3., 'c': 4.}),
+                                ('first', {'a': 5., 'b': 1., 'c': 4.}),
+                                ('last', {'a': 5., 'b': 2., 'c': 4.}),
+                                (np.maximum, {'a': 5., 'b': 3., 'c': 4.}),
+                                (len, {'a': 1, 'b': 3, 'c': 1})]:
+      result = aggregateColumns(self.KEYS, self.VALUES, reduction)
+      self.assertIsInstance(result, Ens)
+      self.assertEqual(expected, result, reduction)
+
+  def testTimedeltaValues(self):
+    result = aggregateColumns([1, 1, 2],
+                              [timedelta(seconds=1), timedelta(seconds=2),
+                               timedelta(seconds=4)],
+                              'mean')
+    self.assertEqual({1: timedelta(seconds=1.5), 2: timedelta(seconds=4)},
+                     result)
+
+  def testTupleOfKeyColumns(self):
+    result = aggregateColumns(([1, 1, 2, 1], ['x', 'y', 'x', 'x']),
+                              [1, 2, 3, 4], 'sum')
+    self.assertEqual({(1, 'x'): 5, (1, 'y'): 2, (2, 'x'): 3}, result)
+
+  def testUnhashableByNumpyKeys(self):
+    result = aggregateColumns([(1, 2), None, (1, 2)], reduction='count')
+    self.assertEqual({(1, 2): 2, None: 1}, result)
+
+  def testMixedTypeKeysNotCoerced(self):
+    result = aggregateColumns([1, '1', 2], reduction='count')
+    self.assertEqual({1: 1, '1': 1, 2: 1}, result)
+
+  def testUnknownReductionRaisesValueError(self):
+    with self.assertRaises(ValueError):
+      aggregateColumns(self.KEYS, self.VALUES, 'median')
+
+
+class TestEncodeKeys(TestCase):
+  def testCodesIndexKeys(self):
+    column = ['b', 'a', 'b', 'c']
+    keys, codes = encodeKeys(column)
+    self.assertEqual(column, [keys[c] for c in codes])
+
+  def testMixedTypeColumn(self):
+    column = [1, '1', 1.5, '1']
+    keys, codes = encodeKeys(column)
+    self.assertEqual(column, [keys[c] for c in codes])
+    self.assertEqual([int, str, float, str], [type(keys[c]) for c in codes])
+
+  def testEmptyColumns(self):
+    keys, codes = encodeKeys([], [])
+    self.assertEqual([], keys)
+    self.assertEqual(0, len(codes))
+
+
+class TestReduceGroups(TestCase):
+  def testReducesInGroupOrder(self):
+    self.assertEqual([[7, 9], [1]],
+                     reduceGroups([7, 1, 9], [0, 1, 0], 2, list).tolist())
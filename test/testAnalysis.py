@@ -30,9 +30,19 @@ try:
 except (ImportError, SystemError):
   from _TestTools import BaseTest
 
+import shutil
+import tempfile
+import threading
 from collections import Counter
+from functools import partial
 
-from pymice._Analysis import Analyser, Analysis, histogram
+from datetime import timedelta
+
+import numpy as np
+
+from pymice._Analysis import (Analyser, Analysis, ResultCache, histogram,
+                              histograms, HistogramAccumulator, asofIndices,
+                              codeFingerprint)
 from pymice._Ens import Ens
 
 class TestGivenAnalyser(TestCase):
@@ -205,6 +215,263 @@ class TestAnalysisWithPreprocessor(TestAnalysis):
     self.checkCalledOnce('preprocess')
 
 
+class TestConcurrentAnalyser(TestGivenAnalyser):
+  def setUp(self):
+    super(TestConcurrentAnalyser, self).setUp()
+    self.analyser.workers = 3
+
+
+class TestConcurrentAnalysis(TestAnalysis):
+  def setUp(self):
+    super(TestConcurrentAnalysis, self).setUp()
+    self.analyser.workers = 3
+
+
+class TestAnalyserScheduling(TestCase):
+  def testIndependentAnalysersRunConcurrently(self):
+    barrier = threading.Barrier(2, timeout=5)
+    analyser = Analyser(a=lambda x: barrier.wait() is not None,
+                        b=lambda x: barrier.wait() is not None)
+    self.assertEqual({'a': True, 'b': True},
+                     analyser([], workers=2))
+
+  def testDependencyAwaitedAcrossThreads(self):
+    started = threading.Event()
+    def slow(data):
+      started.set()
+      return 42
+
+    def dependent(result, data):
+      started.wait(5)
+      return result.slow + 1
+
+    analyser = Analyser(slow=slow, dependent=dependent, other=lambda x: 0)
+    for _ in range(20):
+      self.assertEqual({'slow': 42, 'dependent': 43, 'other': 0},
+                       analyser([], workers=3))
+
+  def testCircularDependencyErrorAcrossThreads(self):
+    barrier = threading.Barrier(2, timeout=5)
+    def a(result, data):
+      barrier.wait()
+      return result.b
+
+    def b(result, data):
+      barrier.wait()
+      return result.a
+
+    analyser = Analyser(a=a, b=b)
+    with self.assertRaises(Analyser.Result.CircularDependencyError):
+      analyser([], workers=2)
+
+  def testCircularDependencyError(self):
+    analyser = Analyser(res=lambda x, y: x.res)
+    with self.assertRaises(Analyser.Result.CircularDependencyError):
+      analyser([], workers=2)
+
+  def testUnknownDependencyErrorContainsDependencyName(self):
+    analyser = Analyser(res=lambda x, y: x.unknown, other=lambda x: 0)
+    try:
+      analyser([], workers=2)
+
+    except Analyser.Result.UnknownDependencyError as e:
+      self.assertEqual('unknown', e.args[0])
+
+    else:
+      self.fail('No exception raised')
+
+  def testTimingsAndDependenciesCollected(self):
+    analyser = Analyser(min=min, max=max,
+                        span=lambda r, x: r.max - r.min)
+    for workers in [None, 2]:
+      analyser([1, 2], workers=workers)
+      self.assertEqual({'min', 'max', 'span'}, set(analyser.timings))
+      for name in analyser.timings:
+        self.assertGreaterEqual(analyser.timings[name], 0, name)
+
+      self.assertEqual({'min': frozenset(), 'max': frozenset(),
+                        'span': frozenset({'min', 'max'})},
+                       analyser.dependencies)
+
+
+class TestResultCache(TestCase):
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.cache = ResultCache(self.path)
+    self.callCounter = Counter()
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  def makeAnalyser(self, **analysers):
+    def counted(name, f):
+      def analyser(result, data):
+        self.callCounter[name] += 1
+        return f(result, data)
+
+      return analyser
+
+    return Analyser(**{name: counted(name, f) for name, f in analysers.items()})
+
+  def makeSpanAnalyser(self, spanOffset=0):
+    return self.makeAnalyser(min=lambda r, x: min(x),
+                             max=lambda r, x: max(x),
+                             span=lambda r, x: r.max - r.min + spanOffset,
+                             size=lambda r, x: len(x))
+
+  def testCachedResultsNotRecalculated(self):
+    self.assertEqual({'min': 1, 'max': 4, 'span': 3, 'size': 3},
+                     self.makeSpanAnalyser()([1, 2, 4], cache=self.cache))
+    self.callCounter.clear()
+    self.assertEqual({'min': 1, 'max': 4, 'span': 3, 'size': 3},
+                     self.makeSpanAnalyser()([1, 2, 4], cache=self.cache))
+    self.assertEqual({}, self.callCounter)
+    stats = self.cache.getStats()
+    self.assertEqual((4, 4, 4), (stats.hits, stats.misses, stats.entries))
+
+  def testDifferentDataRecalculated(self):
+    self.makeSpanAnalyser()([1, 2, 4], cache=self.cache)
+    self.callCounter.clear()
+    self.assertEqual({'min': 1, 'max': 5, 'span': 4, 'size': 3},
+                     self.makeSpanAnalyser()([1, 2, 5], cache=self.cache))
+    self.assertEqual({'min': 1, 'max': 1, 'span': 1, 'size': 1},
+                     self.callCounter)
+
+  def testOnlyChangedAnalysersRecalculated(self):
+    self.makeSpanAnalyser()([1, 2, 4], cache=self.cache)
+    self.callCounter.clear()
+    analyser = self.makeAnalyser(min=lambda r, x: min(x) - 1,
+                                 max=lambda r, x: max(x),
+                                 span=lambda r, x: r.max - r.min,
+                                 size=lambda r, x: len(x))
+    self.assertEqual({'min': 0, 'max': 4, 'span': 4, 'size': 3},
+                     analyser([1, 2, 4], cache=self.cache))
+    self.assertEqual({'min': 1, 'span': 1}, self.callCounter)
+
+  def testCacheUsedByConcurrentEvaluation(self):
+    analyser = self.makeSpanAnalyser()
+    analyser.cache = self.cache
+    self.assertEqual(analyser([1, 2, 4]), analyser([1, 2, 4], workers=3))
+    self.assertEqual(4, self.cache.getStats().hits)
+
+  def testUnfingerprintableDataNotCached(self):
+    data = [lambda: None]
+    self.makeAnalyser(size=lambda r, x: len(x))(data, cache=self.cache)
+    self.makeAnalyser(size=lambda r, x: len(x))(data, cache=self.cache)
+    self.assertEqual(2, self.callCounter['size'])
+    self.assertEqual(0, self.cache.getStats().entries)
+
+  def testLeastRecentlyUsedEntriesEvicted(self):
+    self.makeAnalyser(size=lambda r, x: len(x))([1], cache=self.cache)
+    entrySize = self.cache.getStats().size
+    cache = ResultCache(self.path, maxSize=2 * entrySize)
+    for data in [[2], [3], [2], [4]]:
+      self.makeAnalyser(size=lambda r, x: len(x))(data, cache=cache)
+
+    stats = cache.getStats()
+    self.assertEqual((2, 2), (stats.entries, stats.evictions))
+    self.callCounter.clear()
+    self.makeAnalyser(size=lambda r, x: len(x))([2], cache=cache)
+    self.assertEqual({}, self.callCounter)
+
+  def testClear(self):
+    self.makeSpanAnalyser()([1, 2, 4], cache=self.cache)
+    self.cache.clear()
+    self.assertEqual(0, self.cache.getStats().entries)
+
+
+  def testUnfingerprintablePreprocessorNotCached(self):
+    preprocessor = _Offset(0)
+    preprocessor.lock = threading.Lock()
+    for _ in range(2):
+      analyser = self.makeAnalyser(size=lambda r, x: len(x))
+      analyser.preprocess = preprocessor.shift
+      analyser([1], cache=self.cache)
+
+    self.assertEqual(2, self.callCounter['size'])
+    self.assertEqual(0, self.cache.getStats().entries)
+
+  def testAnalysisInstanceCalledTwiceUsesCache(self):
+    _ScaledAnalysis.calls.clear()
+    analysis = _ScaledAnalysis(2)
+    analysis.cache = self.cache
+    self.assertEqual(6, analysis([1, 2]).total)
+    self.assertEqual(6, analysis([1, 2]).total)
+    self.assertEqual(1, _ScaledAnalysis.calls['total'])
+    self.assertEqual(1, self.cache.getStats().hits)
+    self.assertEqual(6, _ScaledAnalysis(3)([1, 1], cache=self.cache).total)
+    self.assertEqual(2, _ScaledAnalysis.calls['total'])
+
+  def testPreprocessorStateChangesRecalculated(self):
+    for offset in [1, 2]:
+      analyser = Analyser(_Offset(offset).shift, total=lambda r, x: sum(x))
+      self.assertEqual(3 + 2 * offset, analyser([1, 2], cache=self.cache).total)
+
+
+class _ScaledAnalysis(Analysis):
+  calls = Counter()
+
+  def __init__(self, scale):
+    self.scale = scale
+    super(_ScaledAnalysis, self).__init__()
+
+  @Analysis.report
+  def total(self, data):
+    self.calls['total'] += 1
+    return self.scale * sum(data)
+
+
+_SCALE = [1]
+
+def _scaled(x):
+  return [_SCALE[0] * y for y in x]
+
+
+class _Offset(object):
+  def __init__(self, offset):
+    self.offset = offset
+
+  def shift(self, data):
+    return [x + self.offset for x in data]
+
+
+class TestCodeFingerprint(TestCase):
+  def testPartialArgumentsFingerprinted(self):
+    self.assertNotEqual(codeFingerprint(partial(_scaled, x=[1])),
+                        codeFingerprint(partial(_scaled, x=[2])))
+    self.assertEqual(codeFingerprint(partial(_scaled, x=[1])),
+                     codeFingerprint(partial(_scaled, x=[1])))
+
+  def testBoundMethodStateFingerprinted(self):
+    self.assertNotEqual(codeFingerprint(_Offset(1).shift),
+                        codeFingerprint(_Offset(2).shift))
+    self.assertEqual(codeFingerprint(_Offset(1).shift),
+                     codeFingerprint(_Offset(1).shift))
+
+  def testClosureContainersFingerprinted(self):
+    def makeLookup(table):
+      return lambda x: table[x]
+
+    self.assertNotEqual(codeFingerprint(makeLookup([1, 2])),
+                        codeFingerprint(makeLookup([1, 3])))
+    self.assertNotEqual(codeFingerprint(makeLookup(np.array([1, 2]))),
+                        codeFingerprint(makeLookup(np.array([1, 3]))))
+
+  def testReferencedGlobalsFingerprinted(self):
+    before = codeFingerprint(_scaled)
+    _SCALE[0] = 2
+    try:
+      self.assertNotEqual(before, codeFingerprint(_scaled))
+
+    finally:
+      _SCALE[0] = 1
+
+    self.assertEqual(before, codeFingerprint(_scaled))
+
+  def testUnpicklableBoundStateNotFingerprinted(self):
+    self.assertIsNone(codeFingerprint(_Offset(threading.Lock()).shift))
+
+
 class TestHistogram(TestCase):
   def testEmptyOneBinHistogram(self):
     self.checkHistogram([0],
@@ -251,3 +518,121 @@ class TestHistogram(TestCase):
     self.assertEqual(result,
                      histogram(values, bins=bins))
 
+  def testTimedeltaElements(self):
+    self.checkHistogram([1, 1],
+                        [timedelta(seconds=0.5), timedelta(seconds=1),
+                         timedelta(seconds=3)],
+                        [timedelta(0), timedelta(seconds=1),
+                         timedelta(seconds=2)])
+
+  def testRepeatedBinEdges(self):
+    self.checkHistogram([1, 0, 2],
+                        [0.5, 1, 1.5], [0, 1, 1, 2])
+
+  def testGeneratorElements(self):
+    self.checkHistogram([1, 1],
+                        (x for x in [0.5, 1.5]), [0, 1, 2])
+
+  def testNanElementsDropped(self):
+    self.checkHistogram([1],
+                        [float('nan'), 0.5], [0, 1])
+
+  def testAgreesWithReferenceImplementation(self):
+    random = np.random.RandomState(0)
+    bins = np.sort(random.randint(0, 20, size=8)).tolist()
+    values = random.uniform(-5, 25, size=1000).round(1).tolist()
+    expected = [sum(1 for v in values if a <= v < b) if a < b else 0
+                for a, b in zip(bins[:-1], bins[1:])]
+    self.checkHistogram(expected, values, bins)
+
+  def testWeightedHistogram(self):
+    self.assertEqual([3., 0., 8.],
+                     histogram([0.5, 0.7, 2.5, 3, 2], [0, 1, 2, 3],
+                               weights=[1, 2, 3, 4, 5]))
+
+
+class TestHistograms(TestCase):
+  def testMultipleSequences(self):
+    self.assertEqual([[1, 2], [0, 0], [0, 1]],
+                     histograms([[0, 1, 1], [], np.array([1.5, 2])], [0, 1, 2]))
+
+  def testWeights(self):
+    self.assertEqual([[1., 0.], [0., 6.]],
+                     histograms([[0, 5], [1, 1]], [0, 1, 2],
+                                weights=[[1, 2], [3, 3]]))
+
+  def testNonNumericElements(self):
+    self.assertEqual([[1, 0], [0, 1]],
+                     histograms([['auto'], ['bus']], ['a', 'b', 'c']))
+
+  def testUnorderedBinsRaiseValueError(self):
+    with self.assertRaises(ValueError):
+      histograms([[]], bins=[1, 3, 2])
+
+
+class TestHistogramAccumulator(TestCase):
+  def testUpdatedInChunks(self):
+    accumulator = HistogramAccumulator([0, 1, 2])
+    for chunk in [[0.5, 1.5], [], [1, 2, -1]]:
+      accumulator.update(chunk)
+
+    self.assertEqual([1, 2], accumulator.getCounts())
+
+  def testWeightedUpdates(self):
+    accumulator = HistogramAccumulator([0, 1, 2])
+    accumulator.update([0.5, 1.5], weights=[0.25, 1])
+    accumulator.update([0.5], weights=[2])
+    self.assertEqual([2.25, 1.], accumulator.getCounts())
+
+  def testUnorderedBinsRaiseValueError(self):
+    with self.assertRaises(ValueError):
+      HistogramAccumulator([1, 3, 2])
+
+
+class TestAsofIndices(TestCase):
+  def checkIndices(self, expected, *args, **kwargs):
+    self.assertEqual(expected, asofIndices(*args, **kwargs).tolist())
+
+  def testBackwardIncludesEqualTimes(self):
+    self.checkIndices([-1, 0, 2, 1], [0., 1., 2.5, 5.], [1., 3., 2.])
+
+  def testForwardIncludesEqualTimes(self):
+    self.checkIndices([0, 0, 1, -1], [0., 1., 2.5, 5.], [1., 3., 2.],
+                      direction='forward')
+
+  def testNearestResolvesTiesBackward(self):
+    self.checkIndices([0, 0, 2, 2], [0., 1.5, 2.6, 9.], [1., 2., 3.],
+                      direction='nearest')
+
+  def testTolerance(self):
+    self.checkIndices([0, -1], [1.2, 3.], [1., 2.5], tolerance=0.3)
+    self.checkIndices([1, -1], [2.3, 3.], [1., 2.5], tolerance=0.3,
+                      direction='nearest')
+
+  def testMatchedWithinKeysOnly(self):
+    self.checkIndices([1, -1, 2],
+                      [5., 5., 5.], [1., 2., 3.],
+                      [[1, 3, 2]], [[2, 1, 2]])
+
+  def testManyKeyColumns(self):
+    self.checkIndices([1, 0],
+                      [5., 5.], [1., 2.],
+                      [[1, 1], ['a', 'b']], [[1, 1], ['b', 'a']])
+
+  def testArrayKeysMatchListKeys(self):
+    self.checkIndices([1, -1, 2],
+                      [5., 5., 5.], [1., 2., 3.],
+                      [np.array([1, 3, 2])], [[2, 1, 2]])
+
+  def testMixedIntAndNoneKeys(self):
+    self.checkIndices([0, 1, -1],
+                      [5., 5., 5.], [1., 2.],
+                      [[1, None, 2]], [np.array([1, None], dtype=object)])
+
+  def testEmpty(self):
+    self.checkIndices([-1], [1.], [])
+    self.checkIndices([], [], [1.])
+
+  def testUnknownDirectionRaisesValueError(self):
+    with self.assertRaises(ValueError):
+      asofIndices([1.], [1.], direction='sideways')
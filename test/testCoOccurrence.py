@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2015-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+import random
+from unittest import TestCase
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from pytz import utc
+
+from pymice._CoOccurrence import VisitCoOccurrence
+
+
+Animal = namedtuple('Animal', ['Name'])
+Visit = namedtuple('Visit', ['Animal', 'Cage', 'Corner', 'Start', 'End'])
+
+def toDatetime(seconds):
+  return datetime.fromtimestamp(seconds, utc)
+
+def visit(animal, corner, start, end, cage=1):
+  return Visit(Animal(animal), cage, corner, toDatetime(start),
+               None if end is None else toDatetime(end))
+
+
+class TestGivenVisitCoOccurrence(TestCase):
+  def setUp(self):
+    self.coOccurrence = VisitCoOccurrence([visit('Mickey', 1, 0, 10),
+                                           visit('Minnie', 1, 5, 20),
+                                           visit('Jerry', 1, 8, 9),
+                                           visit('Mickey', 1, 22, 30),
+                                           visit('Minnie', 2, 0, 100),
+                                           visit('Jerry', 1, 10, None),
+                                           visit('Tom', 1, 0, 10, cage=2)])
+
+  def getPairs(self, result, first, second):
+    return sorted((a.Animal.Name, a.Start.timestamp(), b.Animal.Name, b.Start.timestamp())
+                  for a, b in zip(result[first], result[second]))
+
+  def testOverlaps(self):
+    overlaps = self.coOccurrence.getOverlaps()
+    self.assertEqual([('Mickey', 0., 'Jerry', 8.), ('Mickey', 0., 'Minnie', 5.),
+                      ('Minnie', 5., 'Jerry', 8.)],
+                     self.getPairs(overlaps, 'First', 'Second'))
+    self.assertEqual([1., 1., 5.],
+                     sorted(overlaps.Overlap.tolist()))
+
+  def testFollowersSinceEnd(self):
+    followers = self.coOccurrence.getFollowers(timedelta(seconds=2))
+    self.assertEqual([('Minnie', 5., 'Mickey', 22.)],
+                     self.getPairs(followers, 'Leader', 'Follower'))
+    self.assertEqual([2.], followers.Latency.tolist())
+
+  def testFollowersSinceStart(self):
+    followers = self.coOccurrence.getFollowers(5, since='Start')
+    self.assertEqual([('Mickey', 0., 'Minnie', 5.), ('Minnie', 5., 'Jerry', 8.)],
+                     self.getPairs(followers, 'Leader', 'Follower'))
+
+  def testUnknownLatencyOriginRaisesValueError(self):
+    with self.assertRaises(ValueError):
+      self.coOccurrence.getFollowers(5, since='Middle')
+
+  def testPairOverlapDurations(self):
+    durations = self.coOccurrence.getPairOverlapDurations()
+    self.assertEqual({('Jerry', 'Mickey'), ('Jerry', 'Minnie'), ('Mickey', 'Minnie')},
+                     set(durations))
+    self.assertEqual(5., durations['Mickey', 'Minnie'])
+    self.assertEqual(1., durations['Jerry', 'Minnie'])
+
+
+class TestCoOccurrenceAgainstBruteForce(TestCase):
+  def setUp(self):
+    generator = random.Random(0)
+    self.visits = []
+    for _ in range(300):
+      start = generator.randint(0, 2000)
+      self.visits.append(visit(generator.choice('ABCDE'), generator.randint(1, 4),
+                               start, start + generator.randint(0, 60),
+                               cage=generator.randint(1, 2)))
+
+    self.coOccurrence = VisitCoOccurrence(self.visits)
+
+  def sameCorner(self, a, b):
+    return a.Animal != b.Animal and (a.Cage, a.Corner) == (b.Cage, b.Corner)
+
+  def testOverlaps(self):
+    expected = sorted(sorted([id(a), id(b)]) for i, a in enumerate(self.visits)
+                      for b in self.visits[i + 1:]
+                      if self.sameCorner(a, b) and a.Start < b.End and b.Start < a.End)
+    overlaps = self.coOccurrence.getOverlaps()
+    self.assertEqual(expected, sorted(sorted([id(a), id(b)])
+                                      for a, b in zip(overlaps.First, overlaps.Second)))
+
+  def testFollowers(self):
+    window = timedelta(seconds=30)
+    expected = sorted((id(a), id(b)) for a in self.visits for b in self.visits
+                      if self.sameCorner(a, b) and a.End <= b.Start <= a.End + window
+                      and a.Start < b.Start)
+    followers = self.coOccurrence.getFollowers(window)
+    self.assertEqual(expected, sorted((id(a), id(b)) for a, b
+                                      in zip(followers.Leader, followers.Follower)))
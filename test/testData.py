@@ -26,7 +26,13 @@
 import sys
 import os
 import unittest
+import inspect
 import io
+import gc
+import shutil
+import tempfile
+import weakref
+import warnings
 
 from datetime import datetime, timedelta, timezone as dt_timezone
 from pytz import utc, timezone
@@ -39,8 +45,12 @@ from pymice._ICData import (ZipLoader_v_IntelliCage_Plus_3,
                             AirHardwareEvent, DoorHardwareEvent, LedHardwareEvent,
                             UnknownHardwareEvent, ICCage, ICCageManager)
 from pymice.Data import Data, IntIdentityManager
+from pymice._Columnar import (VISIT_COLUMNS, NOSEPOKE_COLUMNS, LOG_COLUMNS,
+                              ENVIRONMENT_COLUMNS, HARDWARE_COLUMNS,
+                              ColumnarReader)
 
 import minimock
+import numpy as np
 
 try:
   from ._TestTools import (Mock, MockIntDictManager, MockStrDictManager, BaseTest,
@@ -1651,52 +1661,35 @@ class ICCageManagerTest(unittest.TestCase):
     self.assertRaises(AttributeError, lambda: setattr(self.cageManager, 'Nonexistingattr', None))
 
 
-class DataTest(unittest.TestCase):
-  def testDel(self):
-    ICCage = pm._ICData.ICCage
-
-    def getMockCage(n):
-      cage = minimock.Mock('ICCage', tracker=None)
-      cage._del_ = lambda: cagesDeleted.add(n)
-      return cage
-
-    pm._ICData.ICCage = minimock.Mock('ICCage',
-                                      returns_func=getMockCage,
-                                      tracker=None)
-
-    deleted = set()
-    cagesDeleted = set()
-    toDelete = []
-    cagesToDelete = []
-    data = pm.Data.Data() # XXX: ugly test -> split testing of ICCageManager and Data.__del__
-    data._setCageManager(pm._ICData.ICCageManager())
-
-    def makeCloneInjector(cage, label):
-      toDelete.append(label)
-      cagesToDelete.append(cage)
-      cloneInjector = minimock.Mock('CloneInjector', tracker=None)
-      def cloneReporter(sourceManager, cageManager, *args):
-        cageManager[cage] # FIXME: what is it doing?
-        clone = minimock.Mock(label, tracker=None)
-        clone._del_.mock_returns_func = lambda: deleted.add(label)
-        return clone
-
-      cloneInjector.clone.mock_returns_func = cloneReporter
-      return cloneInjector
-
-    data.insertVisits([makeCloneInjector(1, 'Visit')])
-    data.insertLog([makeCloneInjector(2, 'Log')])
-    data.insertEnv([makeCloneInjector(3, 'Env')])
-    data.insertHw([makeCloneInjector(4, 'Hw')])
-    data.__del__()
+class DataTeardownTest(unittest.TestCase):
+  def setUp(self):
+    self.gcEnabled = gc.isenabled()
+    gc.disable()
 
-    for label in toDelete:
-      self.assertIn(label, deleted)
+  def tearDown(self):
+    if self.gcEnabled:
+      gc.enable()
 
-    for cage in cagesToDelete:
-      self.assertIn(cage, cagesDeleted)
+  def loadData(self):
+    return pm.Loader(os.path.join(os.path.dirname(__file__),
+                                  'data', 'legacy_data.zip'))
+
+  def testVisitsOutliveData(self):
+    data = self.loadData()
+    visits = data.getVisits(order='Start')
+    del data
+    self.assertEqual(['Minnie', 'Mickey', 'Jerry'],
+                     [str(v.Animal) for v in visits])
+    for visit in visits:
+      self.assertIs(visit.Corner.Cage, visit.Cage)
+      for nosepoke in visit.Nosepokes:
+        self.assertIs(visit, nosepoke.Visit)
 
-    pm._ICData.ICCage = ICCage
+  def testNodesFreedWithoutGarbageCollection(self):
+    data = self.loadData()
+    visits = [weakref.ref(v) for v in data.getVisits()]
+    del data
+    self.assertEqual([None] * len(visits), [v() for v in visits])
 
 
 class MockNodesProvider:
@@ -1835,6 +1828,37 @@ class LoaderIntegrationTest(BaseTest, MockNodesProvider):
                      [t.hour if t is not None else t for t in times])
 
 
+class GarbageCollectorAwareLoaderTest(unittest.TestCase):
+  class Loader(pm.Loader):
+    def _loadData(self, fname):
+      self.gcEnabledWhileLoading = gc.isenabled()
+      pm.Loader._loadData(self, fname)
+
+  def setUp(self):
+    self.gcEnabled = gc.isenabled()
+    gc.enable()
+    self.path = os.path.join(os.path.dirname(__file__),
+                             'data', 'legacy_data.zip')
+
+  def tearDown(self):
+    if not self.gcEnabled:
+      gc.disable()
+
+  def testCollectorSuspendedWhileLoading(self):
+    data = self.Loader(self.path)
+    self.assertFalse(data.gcEnabledWhileLoading)
+    self.assertTrue(gc.isenabled())
+
+  def testCollectorNotSuspendedOnDemand(self):
+    data = self.Loader(self.path, suspendGc=False)
+    self.assertTrue(data.gcEnabledWhileLoading)
+
+  def testMergerRestoresCollector(self):
+    data = pm.Loader(self.path)
+    Merger(data, suspendGc=True)
+    self.assertTrue(gc.isenabled())
+
+
 class LoadLegacyDataTest(LoaderIntegrationTest):
   DATA_FILE = 'legacy_data.zip'
 
@@ -1978,6 +2002,672 @@ class LoadIntelliCagePlus3DataTest(LoaderIntegrationTest):
                      [h.Type for h in self.data.getHardwareEvents(order='DateTime')])
 
 
+class GivenIntelliCagePlus3DataAndValidationReport(LoaderIntegrationTest):
+  DATA_FILE = 'icp3_data.zip'
+  REPORT = [pm.LogAnalyser.ExcludeMiceData(datetime(2012, 12, 18, 11, 18, tzinfo=utc),
+                                           datetime(2012, 12, 18, 11, 19, tzinfo=utc),
+                                           logType='Presence', cage=1, corner=2),
+            pm.LogAnalyser.ExcludeMiceData(datetime(2012, 12, 18, 11, 20, 4, tzinfo=utc),
+                                           datetime(2012, 12, 18, 11, 21, tzinfo=utc),
+                                           logType='Lickometer', cage=1, corner=3, side=6),
+            pm.LogAnalyser.ExcludeMiceData(datetime(2012, 12, 18, 11, tzinfo=utc),
+                                           datetime(2012, 12, 18, 12, tzinfo=utc),
+                                           logType='Lickometer', cage=2, corner=3, side=5)]
+
+  def testVisitsExclusionMask(self):
+    visits = self.data.getVisits(order='Start')
+    for report in [self.REPORT, pm.ValidationReport(self.REPORT)]:
+      self.assertEqual([False, True, False],
+                       self.data.getVisitsExclusionMask(report, visits=visits).tolist())
+
+  def testVisitsExclusionMaskAgreesWithFailureInspector(self):
+    visits = self.data.getVisits(order='Start')
+    inspector = pm.FailureInspector('Presence')
+    self.assertEqual([not inspector(self.REPORT, (v.Start, v.End),
+                                    cage=v.Cage, corner=v.Corner)
+                      for v in visits],
+                     self.data.getVisitsExclusionMask(self.REPORT, visits=visits).tolist())
+
+  def testNosepokesExclusionMask(self):
+    nosepokes = [n for v in self.data.getVisits(order='Start') for n in v.Nosepokes]
+    self.assertEqual([3, 5, 6], [n.Side for n in nosepokes])
+    self.assertEqual([False, False, True],
+                     self.data.getNosepokesExclusionMask(self.REPORT, nosepokes=nosepokes).tolist())
+
+  def testDefaultMasksCoverAllVisitsAndNosepokes(self):
+    visits = self.data.getVisits()
+    nosepokes = [n for v in visits for n in v.Nosepokes]
+    self.assertEqual(self.data.getVisitsExclusionMask(self.REPORT, visits=visits).tolist(),
+                     self.data.getVisitsExclusionMask(self.REPORT).tolist())
+    self.assertEqual(self.data.getNosepokesExclusionMask(self.REPORT, nosepokes=nosepokes).tolist(),
+                     self.data.getNosepokesExclusionMask(self.REPORT).tolist())
+
+  def testValidVisits(self):
+    self.assertEqual([1, 3],
+                     [v.Corner for v in self.data.getValidVisits(self.REPORT, order='Start')])
+
+  def testValidNosepokes(self):
+    visits = self.data.getVisits(order='Start')
+    self.assertEqual([3, 5],
+                     [n.Side for n in self.data.getValidNosepokes(self.REPORT, visits=visits)])
+
+  def testEmptyReport(self):
+    self.assertEqual(3, len(self.data.getValidVisits([])))
+    self.assertFalse(self.data.getNosepokesExclusionMask([]).any())
+
+
+class GivenIntelliCagePlus3DataAndTimeline(LoaderIntegrationTest):
+  DATA_FILE = 'icp3_data.zip'
+  LOADER_FLAGS = {'getLog': True,
+                  'getEnv': True,
+                  'getHw': True}
+  TIMELINE = """\
+[Early]
+start = 2012-12-18 11:00
+end = 2012-12-18 11:18:55.421
+tzinfo = UTC
+
+[Late]
+start = 2012-12-18 11:18:55.421
+end = 2012-12-18 12:00
+tzinfo = UTC
+
+[All]
+start = 2012-12-18 10:00
+end = 2012-12-18 13:00
+tzinfo = UTC
+"""
+
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    with open(os.path.join(self.path, 'config.txt'), 'w') as fh:
+      fh.write(self.TIMELINE)
+
+    self.timeline = pm.Timeline(self.path)
+    super(GivenIntelliCagePlus3DataAndTimeline, self).setUp()
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  def testPartitionByAnimal(self):
+    partitions = self.data.partitionBy(self.timeline)
+    self.assertEqual({('Early', 'Minnie'), ('Late', 'Mickey'),
+                      ('Late', 'Jerry'), ('All', 'Minnie'),
+                      ('All', 'Mickey'), ('All', 'Jerry')},
+                     set(partitions))
+    for phase, mouse in partitions:
+      partition = partitions[phase, mouse]
+      self.assertEqual((phase, mouse), (partition.Phase, partition.Key))
+      start, end = self.timeline.getTimeBounds(phase)
+      self.assertEqual(self.data.getVisits(mice=mouse, start=start, end=end,
+                                           order='Start'),
+                       partition.getVisits())
+      self.assertEqual([n for v in partition.getVisits() for n in v.Nosepokes],
+                       partition.getNosepokes())
+      self.assertEqual(self.data.getLog(start=start, end=end, order='DateTime'),
+                       partition.getLog())
+      self.assertEqual(self.data.getEnvironment(start=start, end=end,
+                                                order=('DateTime', 'Cage')),
+                       partition.getEnvironment(order=('DateTime', 'Cage')))
+
+  def testPartitionByCageSplitsEnvironment(self):
+    partitions = self.data.partitionBy(self.timeline, phases='All', by='Cage')
+    self.assertEqual({('All', 1), ('All', 2), ('All', None)}, set(partitions))
+    self.assertEqual([], partitions['All', None].getVisits())
+    self.assertEqual(self.data.getLog(order='DateTime'),
+                     partitions['All', None].getLog())
+    for key in [('All', 1), ('All', 2)]:
+      cage = key[1]
+      self.assertEqual([e for e in self.data.getEnvironment(order='DateTime')
+                        if e.Cage == cage],
+                       partitions[key].getEnvironment())
+      self.assertEqual([h for h in self.data.getHardwareEvents(order='DateTime')
+                        if h.Cage == cage],
+                       partitions[key].getHardwareEvents())
+
+  def testPartitionByManyAttributes(self):
+    partitions = self.data.partitionBy(self.timeline, phases=['All'],
+                                       by=('Cage', 'Corner'))
+    self.assertEqual({('All', (1, 1)), ('All', (1, 2)), ('All', (1, 3)),
+                      ('All', (None, None))},
+                     set(partitions))
+
+  def testVisitSequencesSplitByPhases(self):
+    sequences = self.data.getVisitSequences(self.timeline, phases='All')
+    visits = sequences.getVisits()
+    self.assertEqual({('All', 'Minnie'), ('All', 'Mickey'), ('All', 'Jerry')},
+                     set(visits))
+    for phase, mouse in visits:
+      self.assertEqual(self.data.getVisits(mice=mouse, order='Start'),
+                       visits[phase, mouse].tolist())
+
+  def testVisitSequencesOfSelectedMice(self):
+    sequences = self.data.getVisitSequences(mice='Mickey')
+    self.assertEqual(['Mickey'], list(sequences.getVisits()))
+
+  def testCoOccurrenceOfVisitsInDifferentCorners(self):
+    coOccurrence = self.data.getCoOccurrence()
+    self.assertEqual([], coOccurrence.getOverlaps().First.tolist())
+    self.assertEqual([], list(coOccurrence.getPairOverlapDurations()))
+    self.assertEqual([], coOccurrence.getFollowers(3600, since='Start').Leader.tolist())
+
+  def testPartitionsShareStorage(self):
+    partitions = self.data.partitionBy(self.timeline, phases=['Early', 'All'])
+    early = partitions['Early', 'Minnie']
+    self.assertEqual(1, early.count('visits'))
+    self.assertEqual(len(self.data.getLog(*self.timeline.getTimeBounds('Early'))),
+                     early.count('log'))
+    self.assertIs(partitions['All', 'Mickey'].getIndices('log'),
+                  partitions['All', 'Jerry'].getIndices('log'))
+
+
+class GivenIntelliCagePlus3DataIteratingEvents(LoaderIntegrationTest):
+  DATA_FILE = 'icp3_data.zip'
+  LOADER_FLAGS = {'getLog': True,
+                  'getEnv': True,
+                  'getHw': True}
+
+  def getEventTime(self, kindEvent):
+    kind, event = kindEvent
+    return event.Start if kind in ('visits', 'nosepokes') else event.DateTime
+
+  def getAllEvents(self):
+    visits = self.data.getVisits()
+    return {'visits': visits,
+            'nosepokes': [n for v in visits for n in v.Nosepokes],
+            'log': self.data.getLog(),
+            'environment': self.data.getEnvironment(),
+            'hardware': self.data.getHardwareEvents()}
+
+  def testEventsAreInTimeOrder(self):
+    events = list(self.data.iterEvents())
+    times = list(map(self.getEventTime, events))
+    self.assertEqual(sorted(times), times)
+    for kind, objects in self.getAllEvents().items():
+      self.assertEqual(sorted(map(id, objects)),
+                       sorted(id(e) for k, e in events if k == kind))
+
+  def testEventsAreYieldedLazily(self):
+    events = self.data.iterEvents()
+    self.assertTrue(inspect.isgenerator(events))
+    self.assertEqual(min(self.data.getEnvironment(order='DateTime')[0].DateTime,
+                         self.data.getLog(order='DateTime')[0].DateTime),
+                     self.getEventTime(next(events)))
+
+  def testKindsFilter(self):
+    self.assertEqual([('visits', v) for v in self.data.getVisits(order='Start')],
+                     list(self.data.iterEvents(kinds='visits')))
+    self.assertEqual({'log', 'hardware'},
+                     {k for k, _ in self.data.iterEvents(kinds=['log', 'hardware'])})
+
+  def testTimeBounds(self):
+    start = datetime(2012, 12, 18, 11, 18, 55, 421000, tzinfo=utc)
+    end = datetime(2012, 12, 18, 12, 0, tzinfo=utc)
+    events = list(self.data.iterEvents(start=start, end=end))
+    expected = [(kind, e) for kind, objects in self.getAllEvents().items()
+                for e in objects
+                if start <= self.getEventTime((kind, e)) < end]
+    self.assertEqual(len(expected), len(events))
+    self.assertEqual(sorted(self.data.getVisits(start=start, end=end), key=id),
+                     sorted((e for k, e in events if k == 'visits'), key=id))
+
+  def testCagesFilter(self):
+    events = list(self.data.iterEvents(cages=2))
+    self.assertTrue(events)
+    for kind, event in events:
+      self.assertEqual(2, (event.Visit if kind == 'nosepokes' else event).Cage)
+
+    self.assertEqual(len([e for e in self.data.getEnvironment() if e.Cage == 2]),
+                     len([e for k, e in events if k == 'environment']))
+    self.assertEqual([], [e for k, e in events if k == 'log'])
+
+  def testNosepokeCagesOfDataInsertedManyTimes(self):
+    merged = Merger(pm.Loader(os.path.join(self.dataDir(), 'legacy_data.zip')),
+                    self.data)
+    for cage in [1, 2]:
+      expected = [n for v in merged.getVisits(order='Start') if v.Cage == cage
+                  for n in v.Nosepokes]
+      self.assertEqual(sorted(map(id, expected)),
+                       sorted(id(n) for _, n in merged.iterEvents(cages=cage,
+                                                                  kinds='nosepokes')))
+
+  def testUnknownKindRaisesValueError(self):
+    with self.assertRaises(ValueError):
+      self.data.iterEvents(kinds=['visits', 'licks']).__next__()
+
+
+class GivenIntelliCagePlus3DataJoinedAsof(LoaderIntegrationTest):
+  DATA_FILE = 'icp3_data.zip'
+  LOADER_FLAGS = {'getLog': True,
+                  'getEnv': True,
+                  'getHw': True}
+
+  def findLatest(self, objects, time, **attributes):
+    candidates = [o for o in objects if o.DateTime <= time and
+                  all(getattr(o, a) == v for a, v in attributes.items())]
+    return max(candidates, key=lambda o: o.DateTime) if candidates else None
+
+  def testVisitsJoinedWithEnvironmentOfTheirCage(self):
+    result = self.data.asofJoin()
+    environment = self.data.getEnvironment()
+    self.assertEqual(self.data.getVisits(), result.Left.tolist())
+    for visit, temperature, illumination in zip(result.Left, result.Temperature,
+                                                result.Illumination):
+      expected = self.findLatest(environment, visit.Start, Cage=visit.Cage)
+      self.assertEqual(expected.Temperature, temperature)
+      self.assertEqual(expected.Illumination, illumination)
+
+  def testToleranceLeavesUnmatchedRows(self):
+    result = self.data.asofJoin(tolerance=timedelta(seconds=1),
+                                columns='Temperature')
+    self.assertEqual(['Left', 'Temperature'], sorted(result))
+    self.assertTrue(np.isnan(result.Temperature).all())
+
+  def testForwardDirection(self):
+    result = self.data.asofJoin(self.data.getLog(), 'environment', by=None,
+                                direction='forward', columns='DateTime')
+    for entry, dateTime in zip(result.Left, result.DateTime):
+      later = [e.DateTime for e in self.data.getEnvironment()
+               if e.DateTime >= entry.DateTime]
+      self.assertEqual(min(later) if later else None, dateTime)
+
+  def testNosepokesJoinedWithDoorStates(self):
+    result = self.data.asofJoin('nosepokes', 'hardware',
+                                by=[('Visit.Cage', 'Cage'), 'Side'],
+                                where={'Type': [1]}, columns='State')
+    doors = [h for h in self.data.getHardwareEvents() if h.Type == 1]
+    for nosepoke, state in zip(result.Left, result.State):
+      expected = [h for h in doors if h.DateTime <= nosepoke.Start and
+                  h.Cage == nosepoke.Visit.Cage and h.Side == nosepoke.Side]
+      if expected:
+        self.assertEqual(max(expected, key=lambda h: h.DateTime).State, state)
+
+      else:
+        self.assertTrue(np.isnan(state))
+
+  def testNosepokesJoinedThroughCageOfTheirVisitsByDefault(self):
+    result = self.data.asofJoin('nosepokes')
+    expected = self.data.asofJoin('nosepokes', by=[('Visit.Cage', 'Cage')])
+    self.assertEqual(expected.Left.tolist(), result.Left.tolist())
+    self.assertEqual(np.isnan(expected.Temperature).tolist(),
+                     np.isnan(result.Temperature).tolist())
+    for nosepoke, temperature in zip(result.Left, result.Temperature):
+      latest = self.findLatest(self.data.getEnvironment(), nosepoke.Start,
+                               Cage=nosepoke.Visit.Cage)
+      if latest is None:
+        self.assertTrue(np.isnan(temperature))
+
+      else:
+        self.assertEqual(latest.Temperature, temperature)
+
+  def testUnknownKindRaisesValueError(self):
+    with self.assertRaises(ValueError):
+      self.data.asofJoin(right='weather')
+
+  def testHardwareTimelineAgreesWithAsofJoin(self):
+    timeline = self.data.getHardwareTimeline()
+    nosepokes = [n for v in self.data.getVisits() for n in v.Nosepokes]
+    states = timeline.getStateAt([n.Start for n in nosepokes],
+                                 [n.Visit.Cage for n in nosepokes],
+                                 [n.Visit.Corner for n in nosepokes],
+                                 [n.Side for n in nosepokes], 'Door')
+    joined = self.data.asofJoin('nosepokes', 'hardware',
+                                by=[('Visit.Cage', 'Cage'),
+                                    ('Visit.Corner', 'Corner'), 'Side'],
+                                where={'Type': [1]}, columns='State')
+    self.assertEqual(np.where(np.isnan(joined.State), -1, joined.State).tolist(),
+                     states.tolist())
+
+
+class GivenIntelliCagePlus3DataNosepokeSummary(LoaderIntegrationTest):
+  DATA_FILE = 'icp3_data.zip'
+  SUMMARY = [('NosepokeNumber', len, None),
+             ('NosepokeDuration', lambda ns: sum((n.Duration for n in ns), timedelta(0)), True),
+             ('LickNumber', lambda ns: sum(n.LickNumber for n in ns), None),
+             ('LickDuration', lambda ns: sum((n.LickDuration for n in ns), timedelta(0)), True),
+             ('LickContactTime', lambda ns: sum((n.LickContactTime for n in ns), timedelta(0)), True)]
+
+  def testVisitPropertiesArePrecomputed(self):
+    for visit in self.data.getVisits():
+      self.assertIsNotNone(visit._summary)
+      for name, aggregate, _ in self.SUMMARY:
+        self.assertEqual(aggregate(visit.Nosepokes), getattr(visit, name))
+
+  def testSummaryColumns(self):
+    summary = self.data.getNosepokeSummary()
+    self.assertEqual(self.data.getVisits(), summary.Visit.tolist())
+    for name, _, isDuration in self.SUMMARY:
+      expected = [getattr(v, name) for v in summary.Visit]
+      if isDuration:
+        expected = [x.total_seconds() for x in expected]
+
+      self.assertEqual(expected, summary[name].tolist())
+
+  def testSummaryOfSelectedVisits(self):
+    summary = self.data.getNosepokeSummary(mice=['Mickey', 'Jerry'])
+    self.assertEqual(self.data.getVisits(mice=['Mickey', 'Jerry']),
+                     summary.Visit.tolist())
+    self.assertEqual(25, summary.LickNumber.sum())
+
+
+class GivenIntelliCagePlus3DataWithoutNosepokesSummary(LoaderIntegrationTest):
+  DATA_FILE = 'icp3_data.zip'
+  LOADER_FLAGS = {'getNp': False}
+
+  def testSummaryIsMissing(self):
+    summary = self.data.getNosepokeSummary()
+    self.assertEqual(3, len(summary.Visit))
+    self.assertTrue(np.isnan(summary.NosepokeNumber).all())
+    self.assertIsNone(summary.Visit[0].LickDuration)
+
+
+class RoundTripTest(LoaderIntegrationTest):
+  LOADER_FLAGS = {'getLog': True,
+                  'getEnv': True,
+                  'getHw': True}
+  TARGET = 'data.zip'
+  TIMEZONES_KEPT = True
+  SOURCES_KEPT = True
+
+  def setUp(self):
+    super(RoundTripTest, self).setUp()
+    self.path = tempfile.mkdtemp()
+    self.target = os.path.join(self.path, self.TARGET)
+    self.save(self.data, self.target)
+    self.loaded = self.load(self.target, **self.LOADER_FLAGS)
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  def save(self, data, path, **kwargs):
+    raise NotImplementedError
+
+  def load(self, path, **flags):
+    raise NotImplementedError
+
+  def assertSameNodes(self, columns, expected, loaded):
+    self.assertEqual(len(expected), len(loaded))
+    for name, _ in columns:
+      if name.startswith('_') and not self.SOURCES_KEPT:
+        continue
+
+      self.assertEqual([getattr(x, name) for x in expected],
+                       [getattr(x, name) for x in loaded], name)
+      if self.TIMEZONES_KEPT and name in ('Start', 'End', 'DateTime'):
+        self.assertEqual([getattr(x, name).utcoffset() for x in expected],
+                         [getattr(x, name).utcoffset() for x in loaded])
+
+  def testVisitsAndNosepokes(self):
+    expected = self.data.getVisits(order='Start')
+    loaded = self.loaded.getVisits(order='Start')
+    self.assertSameNodes(VISIT_COLUMNS, expected, loaded)
+    self.assertSameNodes(NOSEPOKE_COLUMNS,
+                         [n for v in expected for n in v.Nosepokes],
+                         [n for v in loaded for n in v.Nosepokes])
+    for visit in loaded:
+      self.assertIs(visit.Corner.Cage, visit.Cage)
+      for nosepoke in visit.Nosepokes:
+        self.assertIs(visit, nosepoke.Visit)
+        self.assertIs(visit.Corner, nosepoke.Side.Corner)
+
+  def testLogEnvironmentHardware(self):
+    self.assertSameNodes(LOG_COLUMNS,
+                         self.data.getLog(order='DateTime'),
+                         self.loaded.getLog(order='DateTime'))
+    self.assertSameNodes(ENVIRONMENT_COLUMNS,
+                         self.data.getEnvironment(order=('DateTime', 'Cage')),
+                         self.loaded.getEnvironment(order=('DateTime', 'Cage')))
+    self.assertSameNodes(HARDWARE_COLUMNS,
+                         self.data.getHardwareEvents(order='DateTime'),
+                         self.loaded.getHardwareEvents(order='DateTime'))
+    self.assertEqual([type(h) for h in self.data.getHardwareEvents(order='DateTime')],
+                     [type(h) for h in self.loaded.getHardwareEvents(order='DateTime')])
+
+  def testAnimalsAndGroups(self):
+    self.assertEqual(self.data.getAnimal(), self.loaded.getAnimal())
+    for name in self.data.getAnimal():
+      expected = self.data.getAnimal(name)
+      loaded = self.loaded.getAnimal(name)
+      self.assertEqual((expected.Tag, expected.Sex, expected.Notes),
+                       (loaded.Tag, loaded.Sex, loaded.Notes))
+
+    self.assertEqual(self.data.getGroup(), self.loaded.getGroup())
+    for name in self.data.getGroup():
+      self.assertEqual(sorted(map(str, self.data.getGroup(name).Animals)),
+                       sorted(map(str, self.loaded.getGroup(name).Animals)))
+
+    self.assertEqual(self.data.getCage('Minnie'), self.loaded.getCage('Minnie'))
+
+  def testNotRequestedDataNotLoaded(self):
+    loaded = self.load(self.target, getNp=False)
+    self.assertEqual([], loaded.getLog())
+    self.assertEqual([None] * len(self.data.getVisits()),
+                     [v.Nosepokes for v in loaded.getVisits()])
+
+  def testFingerprint(self):
+    self.assertIsNotNone(self.loaded._fingerprint())
+
+  def testExistingTargetNotOverwritten(self):
+    with self.assertRaises(ValueError):
+      self.save(self.data, self.target)
+
+    self.save(self.data, self.target, force=True)
+
+
+class MergedDataMixin(object):
+  def loadData(self):
+    return Merger(pm.Loader(self.dataPath(), **self.LOADER_FLAGS),
+                  pm.Loader(os.path.join(self.dataDir(), 'legacy_data.zip'),
+                            **self.LOADER_FLAGS),
+                  **self.LOADER_FLAGS)
+
+
+class ColumnarRoundTripTest(RoundTripTest):
+  DATA_FILE = 'icp3_data.zip'
+  TARGET = 'data'
+
+  def save(self, data, path, **kwargs):
+    data.saveColumnar(path, **kwargs)
+
+  def load(self, path, **flags):
+    return pm.ColumnarLoader(path, **flags)
+
+  def testSession(self):
+    self.assertEqual((self.data.icSessionStart, self.data.icSessionEnd),
+                     (self.loaded.icSessionStart, self.loaded.icSessionEnd))
+
+  def testManifestSourcesAndCages(self):
+    reader = ColumnarReader(self.target)
+    manifest = reader.manifest
+    reader.close()
+    self.assertEqual(sorted(set(str(v._source) for v in self.data.getVisits())),
+                     manifest['sources'])
+    self.assertEqual(sorted(set(int(v.Cage) for v in self.data.getVisits())),
+                     manifest['cages'])
+
+
+class ColumnarZipRoundTripTest(ColumnarRoundTripTest):
+  TARGET = 'data.zip'
+
+
+class ColumnarMergedRoundTripTest(MergedDataMixin, ColumnarRoundTripTest):
+  pass
+
+
+class IntelliCageRoundTripTest(RoundTripTest):
+  DATA_FILE = 'icp3_data.zip'
+  TIMEZONES_KEPT = False
+  SOURCES_KEPT = False
+  PARALLEL = False
+
+  def save(self, data, path, **kwargs):
+    data.saveIntelliCage(path, parallel=self.PARALLEL, **kwargs)
+
+  def load(self, path, **flags):
+    return pm.Loader(path, **flags)
+
+  def testVisitsRenumbered(self):
+    self.assertEqual(list(range(1, len(self.loaded.getVisits()) + 1)),
+                     [v._id for v in self.loaded.getVisits(order='Start')])
+
+  def testTimezoneOfTheEarliestVisitUsed(self):
+    self.assertEqual(self.data.getStart().utcoffset(),
+                     self.loaded.getVisits(order='Start')[0].Start.utcoffset())
+
+
+class IntelliCageParallelRoundTripTest(IntelliCageRoundTripTest):
+  PARALLEL = True
+
+
+class IntelliCageMergedRoundTripTest(MergedDataMixin, IntelliCageRoundTripTest):
+  def testTimezoneConverted(self):
+    tz = dt_timezone(timedelta(hours=-5))
+    self.save(self.data, self.target, force=True, tz=tz)
+    loaded = self.load(self.target, **self.LOADER_FLAGS)
+    self.assertSameNodes(VISIT_COLUMNS,
+                         self.data.getVisits(order='Start'),
+                         loaded.getVisits(order='Start'))
+    self.assertEqual([timedelta(hours=-5)] * 6,
+                     [v.Start.utcoffset() for v in loaded.getVisits()])
+
+
+class LiveLoaderTest(unittest.TestCase):
+  FLAGS = {'getLog': True, 'getEnv': True, 'getHw': True}
+  TABLES = ['Visits', 'Nosepokes', 'Log', 'Environment', 'HardwareEvents']
+
+  def setUp(self):
+    self.source = os.path.join(os.path.dirname(__file__), 'data', 'icp3_data')
+    self.tmp = tempfile.mkdtemp()
+    self.path = os.path.join(self.tmp, 'session')
+    shutil.copytree(self.source, self.path)
+    self.content = {}
+    for table in self.TABLES:
+      with open(self.tablePath(table), 'rb') as fh:
+        self.content[table] = fh.read()
+
+      self.writeTable(table, 2)
+
+    self.live = pm.LiveLoader(self.path, **self.FLAGS)
+    self.updates = []
+    self.live.addCallback(lambda data, new: self.updates.append(new))
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp)
+
+  def tablePath(self, table):
+    return os.path.join(self.path, 'IntelliCage', table + '.txt')
+
+  def writeTable(self, table, lines=None):
+    content = self.content[table]
+    if lines is not None:
+      content = b'\n'.join(content.split(b'\n')[:lines]) + b'\n'
+
+    with open(self.tablePath(table), 'wb') as fh:
+      fh.write(content)
+
+  def visitKeys(self, data):
+    return [(v.Start, v.End, str(v.Animal), v._line,
+             [(n.Start, n.Side, n._line) for n in v.Nosepokes])
+            for v in data.getVisits(order='Start')]
+
+  def testInitiallyLoadsRowsPresent(self):
+    self.assertEqual(1, len(self.live.getVisits()))
+    self.assertEqual(1, len(self.live.getLog()))
+
+  def testUpdateAppendsOnlyNewRows(self):
+    for table in self.TABLES:
+      self.writeTable(table)
+
+    new = self.live.update()
+    self.assertEqual(2, len(new['visits']))
+    self.assertEqual([new], self.updates)
+
+    expected = pm.Loader(self.source, **self.FLAGS)
+    self.assertEqual(self.visitKeys(expected), self.visitKeys(self.live))
+    self.assertEqual(len(expected.getLog()), len(self.live.getLog()))
+    self.assertEqual(len(expected.getEnvironment()),
+                     len(self.live.getEnvironment()))
+    self.assertEqual(len(expected.getHardwareEvents()),
+                     len(self.live.getHardwareEvents()))
+    self.assertEqual(expected.icSessionEnd, self.live.icSessionEnd)
+    self.assertEqual(expected.getCage('Jerry'), self.live.getCage('Jerry'))
+    self.assertEqual(1, len(self.live.getVisits(mice='Jerry')))
+
+  def testIncompleteRowLeftForNextUpdate(self):
+    with open(self.tablePath('Visits'), 'wb') as fh:
+      fh.write(self.content['Visits'][:-5])
+
+    self.assertEqual(1, len(self.live.update()['visits']))
+    self.writeTable('Visits')
+    self.assertEqual(1, len(self.live.update()['visits']))
+    self.assertEqual(3, len(self.live.getVisits()))
+
+  def testNosepokesWaitForTheirVisit(self):
+    self.writeTable('Nosepokes')
+    self.live.update()
+    self.writeTable('Visits')
+    self.live.update()
+    self.assertEqual([1, 2], sorted(len(v.Nosepokes)
+                                    for v in self.live.getVisits()
+                                    if v.Nosepokes))
+
+  def testNosepokesAppendedToTheirEarlierVisit(self):
+    self.writeTable('Visits')
+    self.live.update()
+    self.writeTable('Nosepokes')
+    new = self.live.update()
+    self.assertEqual(2, len(new['nosepokes']))
+    self.assertEqual([], new['visits'])
+
+    expected = pm.Loader(self.source, **self.FLAGS)
+    self.assertEqual(self.visitKeys(expected), self.visitKeys(self.live))
+    for visit in self.live.getVisits():
+      for nosepoke in visit.Nosepokes:
+        self.assertIs(visit, nosepoke.Visit)
+
+    expectedSummary = expected.getNosepokeSummary()
+    summary = self.live.getNosepokeSummary()
+    for name in ['NosepokeNumber', 'LickNumber', 'LickDuration']:
+      self.assertEqual(sorted(expectedSummary[name].tolist()),
+                       sorted(summary[name].tolist()), name)
+
+    self.assertEqual(sorted(v.NosepokeNumber for v in expected.getVisits()),
+                     sorted(v.NosepokeNumber for v in self.live.getVisits()))
+    self.assertEqual(3, len(list(self.live.iterEvents(kinds='nosepokes'))))
+
+  def testOrphanedNosepokesDropped(self):
+    live = pm.LiveLoader(self.path, orphanUpdates=2, **self.FLAGS)
+    self.writeTable('Nosepokes')
+    with warnings.catch_warnings(record=True) as caught:
+      warnings.simplefilter('always')
+      for _ in range(3):
+        live.update()
+
+    self.assertEqual(['1 nosepokes of 1 unknown visits dropped after 2 updates.',
+                      '2 nosepokes of 1 unknown visits dropped after 2 updates.'],
+                     [str(w.message) for w in caught])
+    self.writeTable('Visits')
+    live.update()
+    self.assertEqual(3, len(live.getVisits()))
+    self.assertEqual([], [v for v in live.getVisits() if v.Nosepokes])
+
+  def testNoCallbackWithoutNewData(self):
+    self.live.update()
+    self.assertEqual([], self.updates)
+
+  def testFollowUntilStopped(self):
+    self.live.addCallback(lambda data, new: data.stop())
+    for table in self.TABLES:
+      self.writeTable(table)
+
+    self.live.follow(interval=0)
+    self.assertEqual(1, len(self.updates))
+
+  def testDataFrozen(self):
+    with self.assertRaises(Data.UnableToInsertIntoFrozen):
+      self.live.insertVisits([])
+
+
 class LoadUncompressedIntelliCagePlus3DataTest(LoadIntelliCagePlus3DataTest):
   DATA_FILE = 'icp3_data'
 
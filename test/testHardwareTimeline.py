@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2015-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+from unittest import TestCase
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+from pytz import utc
+
+from pymice._HardwareTimeline import HardwareTimeline
+
+
+Event = namedtuple('Event', ['DateTime', 'Cage', 'Corner', 'Side', 'Type', 'State'])
+
+def event(seconds, state, side=1, type=1, cage=1, corner=1):
+  return Event(datetime.fromtimestamp(seconds, utc), cage, corner, side, type, state)
+
+
+class TestGivenHardwareTimeline(TestCase):
+  def setUp(self):
+    self.timeline = HardwareTimeline([event(30, 1, side=2),
+                                      event(10, 1),
+                                      event(20, 0),
+                                      event(15, 1),
+                                      event(40, 0, side=2),
+                                      event(50, 1, type=0, side=None)])
+
+  def testKeys(self):
+    self.assertEqual([(1, 1, 1, 1), (1, 1, 2, 1), (1, 1, None, 0)],
+                     sorted(self.timeline.getKeys(), key=lambda k: (k[2] is None, k)))
+
+  def testRepeatedStatesAreMerged(self):
+    intervals = self.timeline.getIntervals(1, 1, 1, 'Door')
+    self.assertEqual([10., 20.], intervals.Start.tolist())
+    self.assertEqual([20., np.inf], intervals.End.tolist())
+    self.assertEqual([1, 0], intervals.State.tolist())
+    self.assertEqual(5, len(self.timeline))
+
+  def testUnknownDeviceRaisesKeyError(self):
+    with self.assertRaises(KeyError):
+      self.timeline.getIntervals(2, 1, 1, 1)
+
+  def testStateAtScalarTime(self):
+    self.assertEqual(1, self.timeline.getStateAt(datetime.fromtimestamp(15, utc),
+                                                 1, 1, 1, 1))
+    self.assertEqual(-1, self.timeline.getStateAt(5., 1, 1, 1, 1))
+    self.assertEqual(2, self.timeline.getStateAt(5., 1, 1, 1, 1, default=2))
+
+  def testStateAtManyTimesAndDevices(self):
+    self.assertEqual([-1, 1, 0, 1, 0, 1, -1],
+                     self.timeline.getStateAt(np.array([5., 10., 25., 35., 45., 60., 60.]),
+                                              1, 1, [1, 1, 1, 2, 2, None, 3],
+                                              [1, 1, 1, 1, 1, 'Air', 1]).tolist())
+
+  def testDurationInWindow(self):
+    self.assertEqual(10., self.timeline.getDuration(1, 0., 100., 1, 1, 1, 1))
+    self.assertEqual(5., self.timeline.getDuration(1, 12., 17., 1, 1, 1, 1))
+    self.assertEqual(80., self.timeline.getDuration(0, 0., 100., 1, 1, 1, 1))
+
+  def testDurationsOfManyWindows(self):
+    self.assertEqual([10., 2., 0., 10.],
+                     self.timeline.getDuration(1, [0., 18., 0., 30.],
+                                               [100., 100., 30., 40.],
+                                               1, 1, [1, 1, 2, 2], 1).tolist())
+
+  def testOpenEndedLastInterval(self):
+    self.assertEqual(50., self.timeline.getDuration(1, 0., 100., 1, 1, None, 'Air'))
+
+
+class TestGivenEmptyHardwareTimeline(TestCase):
+  def setUp(self):
+    self.timeline = HardwareTimeline([])
+
+  def testHasNoKeys(self):
+    self.assertEqual([], self.timeline.getKeys())
+    self.assertEqual(0, len(self.timeline))
+
+  def testQueriesReportNoState(self):
+    self.assertEqual([-1], self.timeline.getStateAt([1.], 1, 1, 1, 1).tolist())
+    self.assertEqual(0., self.timeline.getDuration(1, 0., 10., 1, 1, 1, 1))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2015-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+import os
+import io
+import csv
+import shutil
+import zipfile
+import tempfile
+from unittest import TestCase
+from datetime import timedelta, timezone
+
+import pytz
+
+from pymice.ICFixer import ICFixer, fixArchive, main, _TimeConverter
+
+
+class TestTimeConverter(TestCase):
+  def testConvertsBetweenFixedOffsets(self):
+    convert = _TimeConverter(timezone(timedelta(hours=1)),
+                             timezone(timedelta(hours=-2)))
+    self.assertEqual(['2012-12-18 09:13:14.139000', '',
+                      '2012-12-17 22:00:00.000000'],
+                     convert(['2012-12-18 12:13:14.139', '',
+                              '2012-12-18 01:00:00']))
+
+  def testRespectsDaylightSavingTime(self):
+    convert = _TimeConverter(pytz.timezone('Europe/Warsaw'), pytz.utc)
+    self.assertEqual(['2012-12-18 11:00:00.000000',
+                      '2012-06-18 10:00:00.000000'],
+                     convert(['2012-12-18 12:00:00', '2012-06-18 12:00:00']))
+
+  def testAmbiguousTimeRaisesError(self):
+    convert = _TimeConverter(pytz.timezone('Europe/Warsaw'), pytz.utc)
+    with self.assertRaises(pytz.AmbiguousTimeError):
+      convert(['2012-10-28 02:30:00'])
+
+
+class TestICFixer(TestCase):
+  SOURCE = os.path.join(os.path.dirname(__file__), 'data', 'icp3_data.zip')
+
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.target = os.path.join(self.path, 'fixed.zip')
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  def readTable(self, path, member):
+    with zipfile.ZipFile(path) as zf:
+      with zf.open(member) as fh:
+        return list(csv.reader(io.TextIOWrapper(fh, encoding='utf-8'),
+                               delimiter='\t'))
+
+  def testColumnsRenamedAndDecimalCommasConverted(self):
+    ICFixer(self.SOURCE).toZIP(self.target, chunkSize=2)
+    original = self.readTable(self.SOURCE, 'IntelliCage/Visits.txt')
+    fixed = self.readTable(self.target, 'IntelliCage/Visits.txt')
+    self.assertEqual(['VisitID', 'Tag', 'Start', 'End', 'Module'], fixed[0][:5])
+    self.assertEqual(len(original), len(fixed))
+    self.assertEqual(original[2][2], fixed[2][2])
+    self.assertEqual('4.50001', fixed[2][10])
+    self.assertEqual(['Name', 'Tag', 'Sex', 'Group', 'Notes'],
+                     self.readTable(self.target, 'Animals.txt')[0])
+
+  def testOtherMembersCopied(self):
+    ICFixer(self.SOURCE).toZIP(self.target)
+    with zipfile.ZipFile(self.SOURCE) as original, \
+         zipfile.ZipFile(self.target) as fixed:
+      self.assertEqual(sorted(original.namelist()), sorted(fixed.namelist()))
+      self.assertEqual(original.read('Sessions.xml'),
+                       fixed.read('Sessions.xml'))
+
+  def testTimesConvertedToOutputTimezone(self):
+    ICFixer(self.SOURCE,
+            timezone(timedelta(hours=1))).toZIP(self.target, pytz.utc)
+    nosepokes = self.readTable(self.target, 'IntelliCage/Nosepokes.txt')
+    self.assertEqual('2012-12-18 11:18:56.421000', nosepokes[1][1])
+
+  def testMainProcessesManyArchivesInParallel(self):
+    targets = [os.path.join(self.path, '%d.zip' % i) for i in range(3)]
+    main(['-j', '2', '--tz', 'Europe/Warsaw', '--tz-out', 'UTC']
+         + [x for target in targets for x in (self.SOURCE, target)])
+    for target in targets:
+      self.assertEqual(self.readTable(fixArchive(self.SOURCE, self.target,
+                                                 'Europe/Warsaw', 'UTC'),
+                                      'IntelliCage/Log.txt'),
+                       self.readTable(target, 'IntelliCage/Log.txt'))
@@ -63,7 +63,7 @@ class ICNodeTest(BaseTest):
   def checkDel(self, obj, skip=()):
     slots = set('_' + cls.__name__ + s if s.startswith('__') else s \
                 for cls in obj.__class__.__mro__ if hasattr(cls, '__slots__')\
-                for s in cls.__slots__)
+                for s in cls.__slots__ if s != '__weakref__')
     for attr in slots:
       if attr in skip:
         continue
@@ -406,6 +406,15 @@ class TestVisit(ICNodeTest):
     self.assertEqual(self.visit.LickContactTime, timedelta(seconds=1.25))
     self.assertIs(self.minimalVisit.LickContactTime, None)
 
+  def testPrecomputedNosepokeSummary(self):
+    self.visit._setNosepokeSummary((1, timedelta(seconds=2), 3,
+                                    timedelta(seconds=4), timedelta(seconds=5)))
+    self.assertEqual([1, timedelta(seconds=2), 3,
+                      timedelta(seconds=4), timedelta(seconds=5)],
+                     [self.visit.NosepokeNumber, self.visit.NosepokeDuration,
+                      self.visit.LickNumber, self.visit.LickDuration,
+                      self.visit.LickContactTime])
+
   def testRepr(self):
     self.assertEqual(repr(self.visit),
                      u'< Visit of "animal" to corner #2 of cage #4 (at 1970-01-01 00:00:00.000) >')
@@ -497,12 +506,18 @@ class TestNosepoke(ICNodeTest):
 
   def testVisit(self):
     self.assertRaises(AttributeError, lambda: self.nosepoke.Visit)
-    visit = object()
+    visit = Mock()
     self.nosepoke._bindToVisit(visit)
     self.assertIs(self.nosepoke.Visit, visit)
     self.assertRaises(AttributeError,
                       lambda: setattr(self.nosepoke, 'Visit', 12))
 
+  def testVisitNotKeptAlive(self):
+    visit = Mock()
+    self.nosepoke._bindToVisit(visit)
+    del visit
+    self.assertRaises(ReferenceError, lambda: self.nosepoke.Visit)
+
   def testDuration(self):
     self.assertEqual(self.nosepoke.Duration, timedelta(seconds=315))
 
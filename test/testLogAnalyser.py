@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2015-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+import io
+import logging
+import sys
+from unittest import TestCase
+from collections import namedtuple
+from datetime import datetime, timedelta
+from math import ceil
+
+import numpy as np
+from pytz import UTC
+
+from pymice._Tools import toTimestampUTC
+from pymice.LogAnalyser import (LickometerLogAnalyzer, PresenceLogAnalyzer,
+                                DataValidator, LogView, ValidationReport,
+                                FailureInspector,
+                                contiguousRegions, ExcludeMiceData)
+
+
+LogEntry = namedtuple('LogEntry', ['DateTime', 'Category', 'Type',
+                                   'Cage', 'Corner', 'Side', 'Notes'])
+
+class FakeData(object):
+  def __init__(self, log, cages):
+    self.__log = list(log)
+    self.__cages = frozenset(cages)
+
+  def getLog(self, order=None):
+    self.getLogCalls = getattr(self, 'getLogCalls', 0) + 1
+    if order is None:
+      return list(self.__log)
+
+    return sorted(self.__log, key=lambda l: getattr(l, order))
+
+  def getInmates(self):
+    return self.__cages
+
+
+START = datetime(2012, 12, 18, 12, tzinfo=UTC)
+
+def makeLog(n, seed=0, hours=48):
+  random = np.random.RandomState(seed)
+  log = []
+  for _ in range(n):
+    side = int(random.randint(1, 9))
+    if random.rand() < 0.7:
+      logType, notes = 'Lickometer', 'Lickometer is active but nosepoke is inactive'
+
+    else:
+      logType, notes = 'Presence', 'Presence signal without antenna registration.'
+
+    log.append(LogEntry(START + timedelta(seconds=float(random.uniform(0, hours * 3600.))),
+                        'Warning', logType,
+                        int(random.randint(1, 4)), (side + 1) // 2, side, notes))
+
+  return log
+
+
+def excludedAsTuple(excluded):
+  return (excluded.startTime, excluded.endTime, excluded.logType,
+          excluded.notes, sorted(excluded.location.items()))
+
+
+class TestContiguousRegions(TestCase):
+  def testRegions(self):
+    self.assertEqual([(0, 2), (3, 4)],
+                     contiguousRegions([True, True, False, True]))
+
+  def testNoRegions(self):
+    self.assertEqual([], contiguousRegions(np.zeros(5, dtype=bool)))
+
+
+class TestLickometerLogAnalyzer(TestCase):
+  def setUp(self):
+    self.analyzer = LickometerLogAnalyzer(shortThreshold=1)
+
+  def referenceAnalysis(self, md):
+    # the original, per (cage, side) rescanning algorithm
+    results = []
+    log = md.getLog()
+    for cage in md.getInmates():
+      for side in range(1, 9):
+        tt = np.array([toTimestampUTC(l.DateTime) for l in log
+                       if l.Type == 'Lickometer' and l.Cage == cage and l.Side == side])
+        if len(tt) > 0:
+          ttMin = tt.min()
+          nBins = ceil((tt.max() - ttMin) / 3600.)
+          medBins = np.linspace(ttMin, ttMin + nBins * 3600., int(nBins) + 1)
+          medHist, _ = np.histogram(tt, bins=medBins)
+          for a, b in contiguousRegions(medHist > self.analyzer.medThreshold):
+            results.append(ExcludeMiceData(startTime=datetime.fromtimestamp(medBins[a], UTC),
+                                           endTime=datetime.fromtimestamp(medBins[b], UTC),
+                                           logType='Lickometer',
+                                           cage=cage, corner=(side + 1) // 2, side=side,
+                                           notes=str(sum(medHist[a:b])) + ' cases. ' + self.analyzer.notes))
+
+    return results
+
+  def testEmptyLog(self):
+    self.assertEqual((), self.analyzer(FakeData([], [1, 2])))
+
+  def testAgreesWithReferenceAnalysis(self):
+    md = FakeData(makeLog(2000), [1, 2])
+    result = self.analyzer(md)
+    self.assertIsInstance(result, tuple)
+    self.assertTrue(len(result) > 0)
+    self.assertEqual(list(map(excludedAsTuple, self.referenceAnalysis(md))),
+                     list(map(excludedAsTuple, result)))
+
+  def testOverThresholdHour(self):
+    log = [LogEntry(START + timedelta(minutes=i), 'Warning', 'Lickometer',
+                    1, 2, 3, 'Lickometer is active but nosepoke is inactive')
+           for i in range(0, 300, 2)]
+    result = self.analyzer(FakeData(log, [1]))
+    self.assertEqual(1, len(result))
+    self.assertEqual(START, result[0].startTime)
+    self.assertEqual(START + timedelta(hours=5), result[0].endTime)
+    self.assertEqual({'cage': 1, 'corner': 2, 'side': 3}, result[0].location)
+    self.assertTrue(result[0].notes.startswith('150 cases.'))
+
+
+class TestPresenceLogAnalyzer(TestCase):
+  def setUp(self):
+    self.analyzer = PresenceLogAnalyzer()
+
+  def referenceAnalysis(self, md):
+    # the original, per (cage, corner) rescanning algorithm
+    results = []
+    log = md.getLog(order='DateTime')
+    for cage in md.getInmates():
+      for corner in range(1, 5):
+        tt = np.array([toTimestampUTC(l.DateTime) for l in log
+                       if l.Cage == cage and l.Corner == corner and l.Notes.startswith('Presence signal')])
+        if len(tt) > 0:
+          idcs = np.where(np.diff(tt) < 30.)[0]
+          tt = np.delete(tt, np.unique(np.array([idcs, idcs + 1])))
+          if len(tt) > 0:
+            tds = np.diff(tt)
+            mask = np.zeros_like(tt)
+            mask[0] += 0.5
+            mask[-1] += 0.5
+            idcs2 = np.where(tds > 1800.)[0]
+            mask[idcs2] += 0.5
+            mask[idcs2 + 1] += 0.5
+            tt = np.delete(tt, np.where(mask > 0.75))
+
+          if len(tt) > 0:
+            ttMin = tt.min()
+            span = tt.max() - ttMin
+            nBins = ceil(span / (24 * 3600.))
+            longBins = np.linspace(ttMin, ttMin + nBins * 24 * 3600., int(nBins) + 1)
+            hist, _ = np.histogram(tt, bins=longBins)
+            if (hist > 4).any():
+              nBins = ceil(span / 3600.)
+              bins = np.linspace(ttMin, ttMin + nBins * 3600., int(nBins) + 1)
+              hist, _ = np.histogram(tt, bins=bins)
+              for a, b in contiguousRegions(hist):
+                results.append(ExcludeMiceData(startTime=datetime.fromtimestamp(bins[a], UTC),
+                                               endTime=datetime.fromtimestamp(bins[b], UTC),
+                                               logType='Presence',
+                                               cage=cage, corner=corner,
+                                               notes=str(sum(hist[a:b])) + ' cases. ' + self.analyzer.notes))
+
+    return results
+
+  def testEmptyLog(self):
+    self.assertEqual((), self.analyzer(FakeData([], [1, 2])))
+
+  def testAgreesWithReferenceAnalysis(self):
+    md = FakeData(makeLog(3000, seed=1, hours=96), [1, 2, 3])
+    result = self.analyzer(md)
+    self.assertIsInstance(result, tuple)
+    self.assertTrue(len(result) > 0)
+    self.assertEqual(list(map(excludedAsTuple, self.referenceAnalysis(md))),
+                     list(map(excludedAsTuple, result)))
+
+  def testCloseAndIsolatedWarningsIgnored(self):
+    log = [LogEntry(START + timedelta(seconds=s), 'Warning', 'Presence',
+                    1, 1, None, 'Presence signal without antenna registration.')
+           for s in [0, 10, 5000, 9000, 9020]]
+    self.assertEqual((), self.analyzer(FakeData(log, [1])))
+
+  def testNothingPrinted(self):
+    stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    try:
+      self.analyzer(FakeData(makeLog(500), [1, 2, 3]))
+      printed = sys.stdout.getvalue()
+
+    finally:
+      sys.stdout = stdout
+
+    self.assertEqual('', printed)
+
+  def testDiagnosticsLogged(self):
+    analyzer = PresenceLogAnalyzer(logger=logging.getLogger('testPresenceLogAnalyzer'))
+    with self.assertLogs('testPresenceLogAnalyzer', logging.DEBUG) as logs:
+      analyzer(FakeData(makeLog(500), [1, 2, 3]))
+
+    self.assertTrue(len(logs.records) > 0)
+
+
+class TestLogView(TestCase):
+  def setUp(self):
+    self.log = makeLog(200)
+    self.view = LogView(FakeData(self.log, [1, 2]))
+
+  def testSortedByDateTime(self):
+    timestamps = self.view.getTimestamps()
+    self.assertEqual(sorted(toTimestampUTC(l.DateTime) for l in self.log),
+                     timestamps.tolist())
+
+  def testMasks(self):
+    self.assertEqual(sum(1 for l in self.log if l.Type == 'Lickometer'),
+                     self.view.typeIs('Lickometer').sum())
+    self.assertEqual(sum(1 for l in self.log if l.Notes.startswith('Presence')),
+                     self.view.notesStartWith('Presence').sum())
+
+  def testGroupTimestamps(self):
+    groups = self.view.groupTimestamps(self.view.typeIs('Presence'), 'Cage', 'Corner')
+    for (cage, corner), timestamps in groups.items():
+      self.assertEqual(sorted(toTimestampUTC(l.DateTime) for l in self.log
+                              if l.Type == 'Presence' and l.Cage == cage and l.Corner == corner),
+                       timestamps.tolist())
+
+  def testEmptyLog(self):
+    view = LogView(FakeData([], [1]))
+    self.assertEqual(0, len(view))
+    self.assertEqual({}, view.groupTimestamps(view.notesStartWith('Presence'), 'Cage'))
+
+
+class TestDataValidator(TestCase):
+  def setUp(self):
+    self.md = FakeData(makeLog(3000, seed=1, hours=96), [1, 2, 3])
+    self.analyzers = [LickometerLogAnalyzer(shortThreshold=1),
+                      PresenceLogAnalyzer(),
+                      lambda md: ('custom',)]
+    self.expected = [excludedAsTuple(x) for x in self.analyzers[0](self.md)] \
+                    + [excludedAsTuple(x) for x in self.analyzers[1](self.md)] \
+                    + ['custom']
+
+  def checkValidator(self, validator):
+    self.md.getLogCalls = 0
+    result = validator(self.md)
+    self.assertIsInstance(result, tuple)
+    self.assertEqual(self.expected,
+                     [x if isinstance(x, str) else excludedAsTuple(x)
+                      for x in result])
+    self.assertEqual(1, self.md.getLogCalls)
+
+  def testSharedLogScan(self):
+    self.checkValidator(DataValidator(*self.analyzers))
+
+  def testConcurrentAnalyzers(self):
+    self.checkValidator(DataValidator(*self.analyzers, workers=3))
+
+
+class TestValidationReport(TestCase):
+  def setUp(self):
+    random = np.random.RandomState(2)
+    self.report = []
+    for _ in range(300):
+      start = int(random.randint(0, 40))
+      length = int(random.randint(0, 4))
+      side = int(random.randint(1, 5))
+      self.report.append(ExcludeMiceData(START + timedelta(hours=start),
+                                         START + timedelta(hours=start + length),
+                                         logType=['Lickometer', 'Presence'][random.randint(2)],
+                                         cage=int(random.randint(1, 3)),
+                                         corner=(side + 1) // 2,
+                                         side=side if random.rand() < 0.5 else None))
+
+    self.intervals = []
+    for _ in range(200):
+      start = int(random.randint(-2, 45))
+      self.intervals.append((START + timedelta(hours=start),
+                             START + timedelta(hours=start + int(random.randint(0, 3)))))
+
+    self.index = ValidationReport(self.report)
+
+  LOCATIONS = [{}, {'cage': 1}, {'cage': 2, 'corner': 1},
+               {'cage': 1, 'corner': 2, 'side': 3}, {'side': None},
+               {'cage': 3}, {'unknown': 5}]
+
+  def testIsReport(self):
+    self.assertEqual(self.report, list(self.index))
+    self.assertEqual(len(self.report), len(self.index))
+
+  def testFailureInspectorAgreesWithLinearScan(self):
+    for issue in ['Lickometer', 'Presence', 'Cage']:
+      inspector = FailureInspector(issue)
+      for location in self.LOCATIONS:
+        for interval in self.intervals:
+          self.assertEqual(inspector(self.report, interval, **location),
+                           inspector(self.index, interval, **location),
+                           (issue, location, interval))
+
+  def testBatchCheckAgreesWithLinearScan(self):
+    starts, ends = zip(*self.intervals)
+    for issue in ['Lickometer', 'Presence']:
+      inspector = FailureInspector(issue)
+      for location in self.LOCATIONS:
+        expected = [inspector(self.report, interval, **location)
+                    for interval in self.intervals]
+        for report in [self.report, self.index]:
+          self.assertEqual(expected,
+                           inspector.checkIntervals(report, starts, ends,
+                                                    **location).tolist())
+
+  def testEmptyReport(self):
+    self.assertTrue(FailureInspector('Presence')(ValidationReport([]),
+                                                 self.intervals[0]))
+
+  def testEventsAgreeWithLinearScan(self):
+    random = np.random.RandomState(3)
+    self.report.append(ExcludeMiceData(START, START + timedelta(hours=50),
+                                       logType='Presence', cage=2, corner=4,
+                                       side=None, note='extra'))
+    index = ValidationReport(self.report)
+    starts, ends = zip(*self.intervals)
+    cages = random.randint(1, 4, len(starts))
+    sides = random.randint(1, 9, len(starts))
+    corners = (sides + 1) // 2
+    for issue in ['Lickometer', 'Presence']:
+      inspector = FailureInspector(issue)
+      for locations in [{}, {'cage': cages}, {'cage': cages, 'corner': corners},
+                        {'cage': cages, 'corner': corners, 'side': sides}]:
+        expected = [not inspector(self.report, interval,
+                                  **{key: values[i] for key, values in locations.items()})
+                    for i, interval in enumerate(self.intervals)]
+        self.assertEqual(expected,
+                         index.overlapsEvents(issue, starts, ends, **locations).tolist(),
+                         (issue, sorted(locations)))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2015-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import pymice as pm
+from pymice._Merge import mergeSorted, ArchiveMerger
+from pymice.__main__ import main
+
+
+class TestMergeSorted(TestCase):
+  def testMergesStreams(self):
+    self.assertEqual([1, 2, 3, 4, 5, 6],
+                     list(mergeSorted([(2, lambda: [2, 5]),
+                                       (1, lambda: [1, 3, 6]),
+                                       (4, lambda: [4])],
+                                      key=lambda x: x)))
+
+  def testOpensStreamsLazily(self):
+    opened = []
+    def makeSource(stream):
+      def load():
+        opened.append(stream[0])
+        return stream
+      return stream[0], load
+
+    merged = mergeSorted([makeSource([1, 2]), makeSource([5, 6]),
+                          makeSource([3, 4])], key=lambda x: x)
+    self.assertEqual([1, 2, 3], [next(merged) for _ in range(3)])
+    self.assertEqual([1, 3], opened)
+
+  def testSkipsEmptyStreams(self):
+    self.assertEqual([1], list(mergeSorted([(None, lambda: []),
+                                            (1, lambda: [1])],
+                                           key=lambda x: x)))
+
+
+class TestArchiveMerger(TestCase):
+  FLAGS = {'getLog': True, 'getEnv': True, 'getHw': True}
+
+  @classmethod
+  def dataPath(cls, name):
+    return os.path.join(os.path.dirname(__file__), 'data', name)
+
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.paths = [self.dataPath('icp3_data.zip'),
+                  self.dataPath('legacy_data.zip')]
+    self.expected = pm.Merger(*[pm.Loader(path, **self.FLAGS)
+                                for path in self.paths],
+                              **self.FLAGS)
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  def assertSameVisits(self, expected, loaded):
+    key = lambda v: (v.Start, str(v.Animal), int(v.Cage), int(v.Corner),
+                     [(n.Start, n.End, int(n.Side), n.LickNumber)
+                      for n in v.Nosepokes])
+    self.assertEqual(list(map(key, expected.getVisits(order='Start'))),
+                     list(map(key, loaded.getVisits(order='Start'))))
+
+  def testDuplicatedArchivesMergedOnce(self):
+    with ArchiveMerger(self.paths + [self.dataPath('icp3_data')],
+                       jobs=2, **self.FLAGS) as merger:
+      data = merger.getData()
+      self.assertEqual(3, merger.duplicates['visits'])
+
+    self.assertSameVisits(self.expected, data)
+    self.assertEqual(len(self.expected.getLog()), len(data.getLog()))
+    self.assertEqual(self.expected.getAnimal(), data.getAnimal())
+    self.assertEqual(self.expected.getGroup(), data.getGroup())
+
+  def testMergedIntelliCageArchive(self):
+    target = os.path.join(self.path, 'merged.zip')
+    with ArchiveMerger(self.paths, **self.FLAGS) as merger:
+      merger.saveIntelliCage(target)
+
+    loaded = pm.Loader(target, **self.FLAGS)
+    self.assertSameVisits(self.expected, loaded)
+    self.assertEqual([(h.DateTime, h.Type, h.State)
+                      for h in self.expected.getHardwareEvents(order='DateTime')],
+                     [(h.DateTime, h.Type, h.State)
+                      for h in loaded.getHardwareEvents(order='DateTime')])
+
+  def testTemporaryStoresRemoved(self):
+    merger = ArchiveMerger(self.paths)
+    directory = merger._ArchiveMerger__directory
+    merger.close()
+    self.assertFalse(os.path.exists(directory))
+
+  def testCommandLine(self):
+    target = os.path.join(self.path, 'merged')
+    main(['merge', '-f', 'columnar', '-o', target] + self.paths)
+    self.assertSameVisits(self.expected, pm.ColumnarLoader(target))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2015-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+import os
+import shutil
+import tempfile
+import warnings
+from datetime import datetime
+from unittest import TestCase
+
+import numpy as np
+import pytz
+import matplotlib.dates as mpd
+
+from pymice._Metadata import Timeline
+from pymice._Tools import toTimestampUTC
+
+TIMELINE = """\
+[Adaptation]
+start = 2012-12-18 12:30
+end = 2012-12-19 12:30
+tzinfo = UTC
+
+[Overlapping]
+start = 2012-12-19 00:00
+end = 2012-12-20 00:00
+tzinfo = UTC
+
+[Inside]
+start = 2012-12-18 18:00
+end = 2012-12-18 19:00
+tzinfo = UTC
+
+[Later]
+start = 2012-12-21 00:00
+end = 2012-12-22 00:00:30
+tzinfo = UTC
+"""
+
+
+def utc(*args):
+  return datetime(*args, tzinfo=pytz.UTC)
+
+
+class TestTimeline(TestCase):
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    with open(os.path.join(self.path, 'config.txt'), 'w') as fh:
+      fh.write(TIMELINE)
+
+    self.timeline = Timeline(self.path)
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  def referencePhase(self, time):
+    for phase in self.timeline.sections():
+      start, end = self.timeline.getTimeBounds(phase)
+      if start <= time < end:
+        return phase
+
+  def testGetTimeBounds(self):
+    self.assertEqual((utc(2012, 12, 21), utc(2012, 12, 22, 0, 0, 30)),
+                     self.timeline.getTimeBounds('Later'))
+    self.assertEqual((utc(2012, 12, 18, 12, 30), utc(2012, 12, 22, 0, 0, 30)),
+                     self.timeline.getTimeBounds(['Later', 'Adaptation']))
+
+  def testGetPhaseFollowsSectionOrder(self):
+    for time, phase in [(utc(2012, 12, 18, 12, 29), None),
+                        (utc(2012, 12, 18, 12, 30), 'Adaptation'),
+                        (utc(2012, 12, 18, 18, 30), 'Adaptation'),
+                        (utc(2012, 12, 19, 6), 'Adaptation'),
+                        (utc(2012, 12, 19, 12, 30), 'Overlapping'),
+                        (utc(2012, 12, 20), None),
+                        (utc(2012, 12, 22, 0, 0, 29), 'Later'),
+                        (utc(2012, 12, 22, 0, 0, 30), None)]:
+      self.assertEqual(phase, self.timeline.getPhase(time), time)
+      self.assertEqual(phase, self.timeline.getPhase(toTimestampUTC(time)))
+
+  def testGetPhaseDefault(self):
+    self.assertEqual('Unknown',
+                     self.timeline.getPhase(utc(2000, 1, 1), 'Unknown'))
+
+  def testGetPhasesMatchesReference(self):
+    start = toTimestampUTC(utc(2012, 12, 18))
+    timestamps = start + np.random.RandomState(0).uniform(0, 5 * 86400, 1000)
+    times = [datetime.fromtimestamp(t, pytz.UTC) for t in timestamps]
+    expected = [self.referencePhase(t) for t in times]
+    self.assertEqual(expected, self.timeline.getPhases(timestamps).tolist())
+    self.assertEqual(expected, self.timeline.getPhases(times).tolist())
+    self.assertEqual(expected,
+                     self.timeline.getPhases(np.array(timestamps * 1e6,
+                                                      dtype='datetime64[us]')).tolist())
+
+  def testGetPhasesDefault(self):
+    self.assertEqual(['Unknown', 'Later'],
+                     self.timeline.getPhases([utc(2000, 1, 1),
+                                              utc(2012, 12, 21, 1)],
+                                             default='Unknown').tolist())
+
+  def testFormatter(self):
+    self.assertEqual('Adaptation',
+                     self.timeline(mpd.date2num(utc(2012, 12, 19, 6))))
+    self.assertEqual('Unknown',
+                     self.timeline(mpd.date2num(utc(2012, 12, 20, 6))))
+
+  def testCacheInvalidatedOnModification(self):
+    time = utc(2012, 12, 18, 18, 30)
+    self.assertEqual('Adaptation', self.timeline.getPhase(time))
+    self.timeline.remove_section('Adaptation')
+    self.assertEqual('Inside', self.timeline.getPhase(time))
+    self.timeline.set('Inside', 'end', '2012-12-18 18:15')
+    self.assertEqual(None, self.timeline.getPhase(time))
+    self.assertEqual(utc(2012, 12, 18, 18, 15),
+                     self.timeline.getTimeBounds('Inside')[1])
+    self.timeline.add_section('New')
+    self.timeline.set('New', 'start', '2012-12-18 18:00')
+    self.timeline.set('New', 'end', '2012-12-18 19:00')
+    self.timeline.set('New', 'tzinfo', 'UTC')
+    self.assertEqual('New', self.timeline.getPhase(time))
+
+  def testInvertedPhaseWarnsOnceAndIsNeverMatched(self):
+    self.timeline.set('Later', 'end', '2012-12-20 23:00')
+    with warnings.catch_warnings(record=True) as caught:
+      warnings.simplefilter('always')
+      self.assertEqual(None, self.timeline.getPhase(utc(2012, 12, 20, 23, 30)))
+      self.timeline.getTimeBounds('Later')
+
+    self.assertEqual(1, len(caught))
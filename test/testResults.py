@@ -23,9 +23,14 @@
 #                                                                             #
 ###############################################################################
 
+import os
+import shutil
+import tempfile
 from unittest import TestCase
 
-from pymice._Results import lazyAttribute
+import numpy as np
+
+from pymice._Results import lazyAttribute, ResultsCSV
 
 class TestLazyAttribute(TestCase):
   class TestObject(object):
@@ -58,3 +63,121 @@ class TestLazyAttribute(TestCase):
     self.assertEqual(1, self.functionCall)
     self.assertEqual(1337, self.obj.dynamicAttribute)
     self.assertEqual(1, self.functionCall)
+
+
+class TestResultsCSV(TestCase):
+  def setUp(self):
+    self.path = tempfile.mkdtemp()
+    self.filename = os.path.join(self.path, 'results.csv')
+
+  def tearDown(self):
+    shutil.rmtree(self.path)
+
+  def readLines(self):
+    with open(self.filename) as fh:
+      return fh.read().splitlines()
+
+  def writtenLines(self, results):
+    results._ResultsCSV__fh.flush()
+    return self.readLines()
+
+  def testRowsWrittenOnClose(self):
+    with ResultsCSV(self.filename) as results:
+      results.addRow()
+      results.addField('b', 1)
+      results.addField('a', 2)
+      results.addRow()
+      results.addField('c', 3)
+
+    self.assertEqual(['a,b,c', '2,1,', ',,3'], self.readLines())
+
+  def testAddRowsColumns(self):
+    with ResultsCSV(self.filename, inOrder=True) as results:
+      self.assertEqual([0, 1], results.addRows({'x': np.array([1, 2]),
+                                                'y': ['a', 'b']}))
+      results.setRow(1)
+      results.addField('z', 3.5)
+      self.assertEqual(2, results.getField('x', id=1))
+
+    self.assertEqual(['x,y,z', '1,a,', '2,b,3.5'], self.readLines())
+
+  def testAddRowsColumnsOfUnequalLength(self):
+    with ResultsCSV(self.filename) as results:
+      with self.assertRaises(ValueError):
+        results.addRows({'x': [1, 2], 'y': [1]})
+
+  def testStreamingWritesCompleteRowsInOrder(self):
+    results = ResultsCSV(self.filename, fields=('a', 'b'), inOrder=True,
+                         streaming=True, bufferSize=1)
+    first = results.addRow()
+    results.addField('a', 1)
+    second = results.addRow()
+    results.addField('b', 4)
+    results.addField('a', 3)
+    self.assertEqual(['a,b'], self.writtenLines(results))
+    results.addField('b', 2, id=first)
+    self.assertEqual(['a,b', '1,2', '3,4'], self.writtenLines(results))
+    with self.assertRaises(KeyError):
+      results.getField('a', id=second)
+
+    results.addRows({'b': [6, 8], 'a': [5, 7]})
+    self.assertEqual(['a,b', '1,2', '3,4', '5,6', '7,8'],
+                     self.writtenLines(results))
+    results.addRow()
+    results.addField('a', 9)
+    results.close()
+    self.assertEqual(['a,b', '1,2', '3,4', '5,6', '7,8', '9,'],
+                     self.readLines())
+
+  def testStreamingBuffersRows(self):
+    results = ResultsCSV(self.filename, fields=('a',), streaming=True,
+                         bufferSize=3)
+    results.addRows({'a': [1, 2]})
+    self.assertEqual(['a'], self.writtenLines(results))
+    results.addRows({'a': [3]})
+    self.assertEqual(['a', '1', '2', '3'], self.writtenLines(results))
+    results.close()
+
+  def testStreamingKeepsRowsOrderBehindIncompleteRow(self):
+    with ResultsCSV(self.filename, streaming=True) as results:
+      results.declareFields('a', 'b')
+      results.addRow()
+      results.addField('a', 1)
+      results.addRows({'a': [3], 'b': [4]})
+      results.addField('b', 2)
+
+    self.assertEqual(['a,b', '1,2', '3,4'], self.readLines())
+
+  def testStreamingRejectsUndeclaredFields(self):
+    with ResultsCSV(self.filename, fields=('a',), streaming=True) as results:
+      results.addRow()
+      with self.assertRaises(ValueError):
+        results.addField('b', 1)
+
+      with self.assertRaises(ValueError):
+        results.addRows({'b': [1]})
+
+  def testStreamingRejectsDuplicatedWrittenID(self):
+    with ResultsCSV(self.filename, fields=('a',), streaming=True) as results:
+      results.addRow('x')
+      results.addField('a', 1)
+      with self.assertRaises(ValueError):
+        results.addRow('x')
+
+  def testStreamingRejectsDuplicatedWrittenGeneratedID(self):
+    with ResultsCSV(self.filename, fields=('a',), streaming=True) as results:
+      results.addRows({'a': [1, 2]})
+      with self.assertRaises(ValueError):
+        results.addRow(1)
+
+      with self.assertRaises(KeyError):
+        results.getField('a', id=0)
+
+      self.assertEqual(2, results.addRow())
+
+  def testStreamingDoesNotStoreGeneratedIDs(self):
+    with ResultsCSV(self.filename, fields=('a',), streaming=True) as results:
+      results.addRows({'a': list(range(100))})
+      results.addRow()
+      results.addField('a', 100)
+      self.assertEqual(set(), results._ResultsCSV__writtenIDs)
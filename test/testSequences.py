@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# encoding: utf-8
+###############################################################################
+#                                                                             #
+#    PyMICE library                                                           #
+#                                                                             #
+#    Copyright (C) 2015-2017 Jakub M. Dzik a.k.a. Kowalski, S. Łęski          #
+#    (Laboratory of Neuroinformatics; Nencki Institute of Experimental        #
+#    Biology of Polish Academy of Sciences)                                   #
+#                                                                             #
+#    This software is free software: you can redistribute it and/or modify    #
+#    it under the terms of the GNU General Public License as published by     #
+#    the Free Software Foundation, either version 3 of the License, or        #
+#    (at your option) any later version.                                      #
+#                                                                             #
+#    This software is distributed in the hope that it will be useful,         #
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of           #
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the            #
+#    GNU General Public License for more details.                             #
+#                                                                             #
+#    You should have received a copy of the GNU General Public License        #
+#    along with this software.  If not, see http://www.gnu.org/licenses/.     #
+#                                                                             #
+###############################################################################
+
+from unittest import TestCase
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+from pytz import utc
+
+from pymice._Sequences import VisitSequences
+
+
+Animal = namedtuple('Animal', ['Name'])
+Visit = namedtuple('Visit', ['Animal', 'Cage', 'Corner', 'Start', 'End', 'Door'])
+
+def toDatetime(seconds):
+  return datetime.fromtimestamp(seconds, utc)
+
+def visit(animal, corner, start, end, door='left', cage=1):
+  return Visit(Animal(animal), cage, corner, toDatetime(start),
+               None if end is None else toDatetime(end), door)
+
+
+class MockTimeline(object):
+  def __init__(self, **phases):
+    self.phases = phases
+
+  def sections(self):
+    return sorted(self.phases)
+
+  def getTimeBounds(self, phase):
+    return tuple(map(toDatetime, self.phases[phase]))
+
+
+class TestGivenVisitSequences(TestCase):
+  def setUp(self):
+    self.sequences = VisitSequences([visit('Mickey', 2, 100, 110),
+                                     visit('Minnie', 1, 0, 5),
+                                     visit('Mickey', 1, 0, 10),
+                                     visit('Mickey', 1, 40, 45, door='right'),
+                                     visit('Mickey', 2, 20, 30),
+                                     visit('Minnie', 3, 50, 60)])
+
+  def testCorners(self):
+    self.assertEqual([(1, 1), (1, 2), (1, 3)], self.sequences.getCorners())
+
+  def testVisitsAreSortedByStart(self):
+    self.assertEqual([0, 20, 40, 100],
+                     [v.Start.timestamp() for v in self.sequences.getVisits()['Mickey']])
+
+  def testTransitionMatrices(self):
+    matrices = self.sequences.getTransitionMatrices()
+    self.assertEqual({'Mickey', 'Minnie'}, set(matrices))
+    self.assertEqual([[0, 2, 0], [1, 0, 0], [0, 0, 0]], matrices['Mickey'].tolist())
+    self.assertEqual([[0, 0, 1], [0, 0, 0], [0, 0, 0]], matrices['Minnie'].tolist())
+
+  def testIntervals(self):
+    intervals = self.sequences.getIntervals()
+    self.assertEqual([10., 10., 55.], intervals['Mickey'].tolist())
+    self.assertEqual([45.], intervals['Minnie'].tolist())
+    self.assertEqual([20., 20., 60.],
+                     self.sequences.getIntervals(since='Start')['Mickey'].tolist())
+
+  def testUnknownIntervalOriginRaisesValueError(self):
+    with self.assertRaises(ValueError):
+      self.sequences.getIntervals(since='Middle')
+
+  def testIntervalHistograms(self):
+    histograms = self.sequences.getIntervalHistograms([0, 20, 50])
+    self.assertEqual([2, 0], histograms['Mickey'].tolist())
+    self.assertEqual([0, 1], histograms['Minnie'].tolist())
+
+  def testRevisitLatencies(self):
+    latencies = self.sequences.getRevisitLatencies()
+    self.assertEqual([30., 70.], latencies['Mickey'].tolist())
+    self.assertEqual([], latencies['Minnie'].tolist())
+
+  def testRunLengths(self):
+    runs = self.sequences.getRunLengths('Door')['Mickey']
+    self.assertEqual(['left', 'right', 'left'], runs.Value.tolist())
+    self.assertEqual([2, 1, 1], runs.Length.tolist())
+    runs = self.sequences.getRunLengths(lambda v: v.Cage)
+    self.assertEqual([4], runs['Mickey'].Length.tolist())
+
+
+class TestGivenVisitSequencesSplitByPhases(TestCase):
+  def setUp(self):
+    timeline = MockTimeline(Early=(0, 50), Late=(50, 200), All=(0, 200))
+    self.sequences = VisitSequences([visit('Mickey', 1, 0, 10),
+                                     visit('Mickey', 2, 20, None),
+                                     visit('Mickey', 1, 60, 70),
+                                     visit('Minnie', 1, 30, 40)],
+                                    timeline, phases=['Early', 'All'])
+
+  def testGroupsArePhaseAnimalPairs(self):
+    self.assertEqual({('Early', 'Mickey'), ('Early', 'Minnie'),
+                      ('All', 'Mickey'), ('All', 'Minnie')},
+                     set(self.sequences.getTransitionMatrices()))
+
+  def testTransitionsWithinPhases(self):
+    matrices = self.sequences.getTransitionMatrices()
+    self.assertEqual([[0, 1], [0, 0]], matrices['Early', 'Mickey'].tolist())
+    self.assertEqual([[0, 1], [1, 0]], matrices['All', 'Mickey'].tolist())
+
+  def testMissingEndGivesNaNInterval(self):
+    intervals = self.sequences.getIntervals()['All', 'Mickey']
+    self.assertEqual(10., intervals[0])
+    self.assertTrue(np.isnan(intervals[1]))
+
+
+class TestGivenNoVisits(TestCase):
+  def testResultsAreEmpty(self):
+    sequences = VisitSequences([])
+    self.assertEqual([], sequences.getCorners())
+    self.assertEqual([], list(sequences.getTransitionMatrices()))
+    self.assertEqual([], list(sequences.getIntervals()))
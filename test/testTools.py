@@ -25,10 +25,12 @@
 
 import collections
 import datetime
+import gc
 import operator
 import unittest
 
-from pymice._Tools import groupBy, convertTime, AdditiveDict, MissingIdentityDict
+from pymice._Tools import (groupBy, convertTime, AdditiveDict, MissingIdentityDict,
+                           GarbageCollectorSuspension, toTimestampsUTC)
 
 Pair = collections.namedtuple('Pair', ['a', 'b'])
 
@@ -97,6 +99,24 @@ class TestConvertTime(unittest.TestCase):
       self.assertEqual(value, getattr(time, attr))
 
 
+class TestToTimestampsUTC(unittest.TestCase):
+  def testConvertsDatetimesNumbersAndNone(self):
+    utc = datetime.timezone.utc
+    self.assertEqual([60., 2.5, 3.],
+                     toTimestampsUTC([datetime.datetime(1970, 1, 1, 0, 1, tzinfo=utc),
+                                      2.5, 3]).tolist())
+    self.assertTrue(all(x != x for x in toTimestampsUTC([None, None])))
+
+  def testScalarGivesOneElementArray(self):
+    self.assertEqual([60.],
+                     toTimestampsUTC(datetime.datetime(1970, 1, 1, 0, 1,
+                                                       tzinfo=datetime.timezone.utc)).tolist())
+    self.assertEqual([1.5], toTimestampsUTC(1.5).tolist())
+
+  def testEmpty(self):
+    self.assertEqual([], toTimestampsUTC([]).tolist())
+
+
 class TestAdditiveDict(unittest.TestCase):
   DictClass = AdditiveDict
 
@@ -152,5 +172,64 @@ class TestIdentityDict(TestAdditiveDict):
     self.checkMissingKey(d)
 
 
+class TestGarbageCollectorSuspension(unittest.TestCase):
+  def setUp(self):
+    self.gcEnabled = gc.isenabled()
+
+  def tearDown(self):
+    if self.gcEnabled:
+      gc.enable()
+
+    else:
+      gc.disable()
+
+  def testCollectorDisabledWithinContext(self):
+    gc.enable()
+    with GarbageCollectorSuspension():
+      self.assertFalse(gc.isenabled())
+
+    self.assertTrue(gc.isenabled())
+
+  def testCollectorLeftDisabledIfDisabledBefore(self):
+    gc.disable()
+    with GarbageCollectorSuspension():
+      self.assertFalse(gc.isenabled())
+
+    self.assertFalse(gc.isenabled())
+
+  def testCollectorNotSuspendedOnDemand(self):
+    gc.enable()
+    with GarbageCollectorSuspension(suspend=False):
+      self.assertTrue(gc.isenabled())
+
+  def testCollectorRestoredOnException(self):
+    gc.enable()
+    with self.assertRaises(ValueError):
+      with GarbageCollectorSuspension():
+        raise ValueError
+
+    self.assertTrue(gc.isenabled())
+
+  @unittest.skipUnless(hasattr(gc, 'freeze'), 'gc.freeze() not available')
+  def testObjectsNotFrozenByDefault(self):
+    gc.unfreeze()
+    with GarbageCollectorSuspension():
+      objects = [[] for _ in range(10)]
+
+    self.assertEqual(0, gc.get_freeze_count())
+
+  @unittest.skipUnless(hasattr(gc, 'freeze'), 'gc.freeze() not available')
+  def testObjectsFrozenOnDemand(self):
+    gc.unfreeze()
+    try:
+      with GarbageCollectorSuspension(freeze=True):
+        objects = [[] for _ in range(10)]
+
+      self.assertGreaterEqual(gc.get_freeze_count(), len(objects))
+
+    finally:
+      gc.unfreeze()
+
+
 if __name__ == '__main__':
   unittest.main()